@@ -0,0 +1,94 @@
+# anomaly_service.py
+# 进程级异常检测服务：订阅遥测，把批次连同检测状态交给独立进程中的 engine.anomaly.detect 计算，
+# GUI 线程只负责收发数据，检测计算不占用 GIL。同一时刻只有一个批次在计算 (下一批要用上一批返回的状态)，
+# 计算期间到达的批次先暂存，完成后合并成一批提交。
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+
+from PyQt5.QtCore import QObject, QTimer, QCoreApplication, pyqtSignal
+
+from telemetry_hub import get_hub
+from engine.anomaly import new_state, detect
+from engine.telemetry import concat_batches
+
+ANALYSIS_RATE = 2       # 每秒最多提交的批次数
+POLL_INTERVAL_MS = 100  # 检查计算结果的间隔
+EVENT_HISTORY = 1000    # 保留的最近事件数，供后打开的页面查询
+
+
+class AnomalyService(QObject):
+    events_ready = pyqtSignal(list) # 一批新的异常事件，格式见 engine.anomaly.detect
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = self._create_executor()
+        self._state = new_state()
+        self._future = None
+        self._pending = []
+        self.events = deque(maxlen=EVENT_HISTORY)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self._poll)
+        self._poll_timer.start(POLL_INTERVAL_MS)
+        self.hub = get_hub()
+        self.subscription = self.hub.subscribe(self._on_batch, max_rate=ANALYSIS_RATE)
+
+    @staticmethod
+    def _create_executor():
+        # 使用 spawn 启动工作进程：GUI 进程中已有多个线程，fork 出的子进程可能继承被占用的锁。
+        # 打包成 exe 后依赖 main.py 入口处的 multiprocessing.freeze_support()
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+
+    def _on_batch(self, batch):
+        self._pending.append(batch)
+        self._submit()
+
+    def _submit(self):
+        if self._future is not None or not self._pending:
+            return
+        batch = concat_batches(self._pending)
+        self._pending = []
+        self._future = self._executor.submit(detect, self._state, batch)
+
+    def _poll(self):
+        if self._future is None or not self._future.done():
+            return
+        future, self._future = self._future, None
+        try:
+            self._state, events = future.result()
+        except Exception as e:
+            # 这一批丢弃，状态保持上一批的结果；工作进程意外退出时重建进程池
+            print(f"异常检测失败: {e}")
+            events = []
+            if isinstance(e, BrokenProcessPool):
+                self._executor = self._create_executor()
+        if events:
+            self.events.extend(events)
+            self.events_ready.emit(events)
+        self._submit()
+
+    def events_between(self, t0, t1):
+        """最近事件中时间戳在 [t0, t1] 内的部分"""
+        return [e for e in self.events if t0 <= e['ts'] <= t1]
+
+    def shutdown(self):
+        self._poll_timer.stop()
+        self.hub.unsubscribe(self.subscription)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+
+def get_anomaly_service():
+    """返回全局唯一的异常检测服务 (首次调用时启动工作进程并订阅遥测)"""
+    global _service
+    if _service is None:
+        _service = AnomalyService(QCoreApplication.instance())
+    return _service
+
+def close_anomaly_service():
+    global _service
+    if _service is not None:
+        _service.shutdown()
+        _service = None
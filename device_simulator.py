@@ -1,83 +1,239 @@
 # device_simulator.py
 import time
-import random
+from collections import deque
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from engine.clock import SimClock
+from engine.line_engine import LineArrayEngine, MODES
+from engine.recorder import TelemetryReader
+from engine.telemetry import new_batch, write_records
+from engine.vision import FrameGenerator, InspectionPipeline
+from engine.spectrum import SAMPLE_RATE, VibrationGenerator, RollingSpectrum
+
 class LineSimulatorThread(QThread):
-    data_updated = pyqtSignal(dict)
+    # 一批 engine.telemetry.TELEMETRY_DTYPE 记录 (一维结构化数组)
+    batch_ready = pyqtSignal(object)
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, clock=None, seed=None, ui_rate=25, max_batch=4096):
+        """
+        :param clock: 仿真时钟，默认为实时模式；传入 SimClock(speed=None) 可全速生成数据
+        :param seed: 随机种子，相同种子可复现同一段产线行为
+        :param ui_rate: 每秒最多发出的批次数，与采样频率无关
+        :param max_batch: 单个批次的最大记录数，缓冲区写满时立即发出
+        """
         super().__init__(parent)
+        self.emit_interval = 1.0 / ui_rate
+        self._buffer = new_batch(max_batch)
+        self._pending = 0
+        self._last_emit = 0.0
         self.is_running = False
         self.is_paused = False
         self.mode = 'normal' # 'normal', 'high_speed', 'energy_saving'
+        self.clock = clock or SimClock()
+        self.seed = seed
         self.reset_state()
 
     def set_mode(self, mode):
         """外部接口，用于切换仿真模式"""
-        if mode in ['normal', 'high_speed', 'energy_saving']:
+        if mode in MODES:
             self.mode = mode
+            self.engine.set_mode(mode)
             print(f"仿真模式已切换到: {mode}")
 
     def reset_state(self):
-        # ... (此方法保持不变)
-        self.devices = {
-            'extruder': {'name': '挤出机', 'status': 'idle', 'temp': 85.0, 'pressure': 0.0},
-            'cooling_tank': {'name': '冷却水槽', 'status': 'idle', 'temp': 25.0, 'level': 80.0},
-            'tractor': {'name': '牵引机', 'status': 'idle', 'speed': 0.0},
-            'winder': {'name': '收卷机', 'status': 'idle', 'tension': 0.0},
-        }
-        self.line_status = 'stopped'; self.fault_timer = 0; self.run_timer = 0
+        # 状态机与随机扰动由向量化引擎负责，这里只是单条产线的视图
+        self.engine = LineArrayEngine(n_lines=1, seed=self.seed)
+        self.engine.set_mode(self.mode)
 
     def run(self):
         self.is_running = True
         while self.is_running:
-            while self.is_paused:
-                time.sleep(0.1)
-                if not self.is_running: return
+            if self.is_paused:
+                self._flush()
+                while self.is_paused:
+                    time.sleep(0.1)
+                    if not self.is_running: return
+                self.clock.resync()
 
-            self.run_timer += 1
-            
-            # --- 核心逻辑：根据不同模式调整参数 ---
-            speed_factor = 1.0
-            power_factor = 1.0
-            if self.mode == 'high_speed':
-                speed_factor = 1.2
-                power_factor = 1.3
-            elif self.mode == 'energy_saving':
-                speed_factor = 0.8
-                power_factor = 0.75
-            
-            # ... (状态机逻辑基本不变，但应用了上面的因子)
-            if self.fault_timer > 0:
-                self.line_status = 'fault'; self.fault_timer -= 1
-                self.devices['extruder']['status'] = 'fault'; self.devices['tractor']['speed'] = 0
-            elif self.run_timer % 30 < 20:
-                self.line_status = 'running'
-                for device in self.devices.values(): device['status'] = 'running'
-                self.devices['extruder']['temp'] += random.uniform(-0.5, 0.5) * power_factor
-                self.devices['extruder']['pressure'] = (1.8 + random.uniform(-0.1, 0.1)) * power_factor
-                self.devices['cooling_tank']['temp'] += random.uniform(-0.2, 0.2)
-                self.devices['tractor']['speed'] = (50.0 + random.uniform(-1, 1)) * speed_factor
-                self.devices['winder']['tension'] = 5.0 + random.uniform(-0.2, 0.2)
-            else:
-                self.line_status = 'idle'
-                for device in self.devices.values(): device['status'] = 'idle'
-                self.devices['extruder']['pressure'] = 0.0; self.devices['tractor']['speed'] = 0.0
+            self.engine.step()
+            sim_time = self.clock.advance()
             
-            if self.line_status == 'running' and random.random() < 0.05:
-                self.fault_timer = 5
-            
-            self.data_updated.emit({
-                'line_status': self.line_status, 'devices': self.devices,
-                'total_output': self.run_timer * 1.5 * speed_factor, # 总产量也受速度影响
-                'timestamp': time.strftime("%H:%M:%S")
-            })
-            time.sleep(1)
+            # 采样先写入预分配缓冲区，按界面刷新频率合并成批次发出
+            write_records(self.engine, sim_time, self._buffer[self._pending:self._pending + 1])
+            self._pending += 1
+            if self._pending == len(self._buffer) or time.monotonic() - self._last_emit >= self.emit_interval:
+                self._flush()
+            self.clock.wait()
+        self._flush()
+
+    def _flush(self):
+        """发出缓冲区中的记录；发出的是副本，可安全跨线程使用"""
+        if self._pending:
+            self.batch_ready.emit(self._buffer[:self._pending].copy())
+            self._pending = 0
+            self._last_emit = time.monotonic()
 
     def toggle_pause(self): # (为第一个3D页面保留)
         self.is_paused = not self.is_paused
 
     def stop(self):
         self.is_running = False; self.is_paused = False
-        self.quit(); self.wait()
\ No newline at end of file
+        self.quit(); self.wait()
+
+class ReplaySourceThread(QThread):
+    """从遥测记录目录回放数据，接口与 LineSimulatorThread 一致，页面无法区分数据来源"""
+    batch_ready = pyqtSignal(object)
+    finished_replay = pyqtSignal()
+
+    MIN_SPEED, MAX_SPEED = 1.0, 1000.0
+
+    def __init__(self, parent=None, root='telemetry_data', speed=1.0, ui_rate=25, max_batch=4096):
+        """
+        :param root: TelemetryRecorder 写出的记录目录
+        :param speed: 回放倍速 (1×–1000×)
+        """
+        super().__init__(parent)
+        self.reader = TelemetryReader(root)
+        self.is_running = False
+        self.is_paused = False
+        self.mode = 'normal' # 回放时模式由记录决定，仅为保持接口一致
+        self.emit_interval = 1.0 / ui_rate
+        self.max_batch = max_batch
+        self.set_speed(speed)
+        time_range = self.reader.time_range()
+        self.cursor = time_range[0] - 1e-6 if time_range else 0.0 # 已回放到的仿真时间
+        self._seek_to = None
+
+    def set_mode(self, mode):
+        print(f"回放模式下忽略仿真模式切换: {mode}")
+
+    def set_speed(self, speed):
+        self.speed = min(max(float(speed), self.MIN_SPEED), self.MAX_SPEED)
+
+    def play(self):
+        self.is_paused = False
+
+    def pause(self):
+        self.is_paused = True
+
+    def toggle_pause(self):
+        self.is_paused = not self.is_paused
+
+    def seek(self, ts):
+        """跳转到记录中的某个仿真时间 (epoch 秒)，在回放线程中生效"""
+        self._seek_to = ts
+
+    def run(self):
+        self.is_running = True
+        last_wall = time.monotonic()
+        while self.is_running:
+            time.sleep(self.emit_interval)
+            now = time.monotonic()
+            elapsed, last_wall = now - last_wall, now
+            if self._seek_to is not None:
+                self.cursor, self._seek_to = self._seek_to - 1e-6, None
+            if self.is_paused:
+                continue
+
+            # 第一条尚未回放的记录 (ts > cursor)
+            start = self.reader.index_range(None, self.cursor)[1]
+            if start >= len(self.reader):
+                self.is_paused = True
+                self.finished_replay.emit()
+                continue
+
+            target = self.cursor + elapsed * self.speed
+            next_ts = float(self.reader.read_slices('ts', start, start + 1)[0][0])
+            if next_ts > target + 60:
+                # 记录中存在长时间空档 (例如程序未运行)，直接跳到下一条记录
+                target = next_ts
+            stop = min(self.reader.index_range(None, target)[1], start + self.max_batch)
+            if stop > start:
+                batch = self.reader.read_records(start, stop)
+                self.cursor = float(batch['ts'][-1])
+                self.batch_ready.emit(batch)
+            else:
+                self.cursor = target
+
+    def stop(self):
+        self.is_running = False; self.is_paused = False
+        self.quit(); self.wait()
+
+class CameraStationThread(QThread):
+    """在线视觉工位：按相机帧率生成合成图像，提交线程池检测，按帧顺序发出检测结果"""
+    frame_ready = pyqtSignal(object, object) # (uint8 灰度帧, engine.vision.detect_defects 的结果)
+    stats_ready = pyqtSignal(float, float)   # (实际处理帧率, 按单帧耗时估算的处理上限)
+
+    def __init__(self, parent=None, fps=5.0, seed=None, defect_rate=0.05, workers=None):
+        """
+        :param fps: 相机帧率，None 表示不限速 (用于测算检测工位的处理能力)
+        :param defect_rate: 每帧缺陷数量的期望值
+        :param workers: 检测线程数，默认按 CPU 核数
+        """
+        super().__init__(parent)
+        self.fps = fps
+        self.generator = FrameGenerator(seed=seed, defect_rate=defect_rate)
+        self.workers = workers
+        self.is_running = False
+
+    def start(self, *args):
+        # 在启动前置位，避免线程尚未进入 run() 时调用 stop() 的停止请求被覆盖
+        self.is_running = True
+        super().start(*args)
+
+    def run(self):
+        pipeline = InspectionPipeline(self.workers)
+        in_flight = deque()
+        next_frame = last_stats = time.monotonic()
+        while self.is_running:
+            frame, _ = self.generator.generate()
+            in_flight.append((frame, pipeline.submit(frame)))
+            # 按提交顺序发出已完成的帧；积压超过线程数两倍时阻塞等待最早的一帧 (背压)
+            while in_flight and (in_flight[0][1].done() or len(in_flight) > 2 * pipeline.workers):
+                done_frame, future = in_flight.popleft()
+                self.frame_ready.emit(done_frame, future.result())
+
+            now = time.monotonic()
+            if now - last_stats >= 1.0:
+                self.stats_ready.emit(pipeline.fps, pipeline.capacity_fps)
+                last_stats = now
+            if self.fps:
+                next_frame = max(next_frame + 1.0 / self.fps, now - 1.0) # 落后超过 1 秒时不再追赶
+                time.sleep(max(0.0, next_frame - now))
+        pipeline.shutdown()
+
+    def stop(self):
+        self.is_running = False
+        self.quit(); self.wait()
+
+class VibrationStationThread(QThread):
+    """减速箱振动测点：按采样率实时生成振动信号，在线程内做滚动频谱分析，只把频谱结果发回GUI线程"""
+    spectrum_ready = pyqtSignal(object, object) # (新分段的 PSD 行 (分段数, 频点数), 当前各频带能量)
+
+    def __init__(self, parent=None, fs=SAMPLE_RATE, block_seconds=0.1, seed=None):
+        """
+        :param block_seconds: 每次读取的样本时长，决定频谱图的刷新节奏
+        """
+        super().__init__(parent)
+        self.fs = fs
+        self.block = int(fs * block_seconds)
+        self.generator = VibrationGenerator(fs, seed=seed)
+        self.analyzer = RollingSpectrum(fs)
+        self.is_running = False
+
+    def start(self, *args):
+        self.is_running = True
+        super().start(*args)
+
+    def run(self):
+        next_block = time.monotonic()
+        while self.is_running:
+            rows = self.analyzer.push(self.generator.generate(self.block))
+            if len(rows):
+                self.spectrum_ready.emit(rows, self.analyzer.band_energies())
+            next_block = max(next_block + self.block / self.fs, time.monotonic() - 1.0)
+            time.sleep(max(0.0, next_block - time.monotonic()))
+
+    def stop(self):
+        self.is_running = False
+        self.quit(); self.wait()
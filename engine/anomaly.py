@@ -0,0 +1,126 @@
+# engine/anomaly.py
+# 遥测异常检测：单变量 EWMA z 分数 (突变)、CUSUM (缓慢漂移) 和多变量马氏距离 (参数组合异常)。
+# 检测器是纯函数 detect(state, batch) -> (state, events)：状态只由 NumPy 数组组成，
+# 不依赖任何对象或界面，可以整体序列化后交给其他进程计算，结果再传回来作为下一批的输入。
+import numpy as np
+
+from .line_engine import STATUS_RUNNING
+
+# 参与检测的遥测通道及显示名称
+FEATURES = ('extruder_temp', 'extruder_pressure', 'tractor_speed', 'winder_tension')
+FEATURE_NAMES = ('挤出温度', '挤出压力', '牵引速度', '收卷张力')
+MIN_STD = np.array([0.2, 0.02, 0.2, 0.02]) # 各通道标准差下限，避免近乎恒定的通道出现极大的 z 分数
+
+ALPHA = 0.05       # 指数加权系数 (约 20 个样本的记忆)
+WARMUP = 30        # 每条产线运行满这么多个样本后才开始报警
+Z_LIMIT = 4.0      # 突变阈值
+CUSUM_K = 1.5      # CUSUM 允许偏移 (以标准差计)；挤出温度本身缓慢游走，偏移量取得较大
+CUSUM_H = 15.0     # CUSUM 报警阈值
+CHI2_LIMIT = 18.47 # 马氏距离平方阈值：4 自由度卡方分布的 99.9% 分位数
+COOLDOWN = 30.0    # 同一产线、同一检测器、同一通道两次报警的最小间隔 (秒)
+
+DETECTORS = ('ewma', 'cusum', 'mahalanobis')
+EWMA, CUSUM, MAHALANOBIS = range(len(DETECTORS))
+
+
+def new_state(n_lines=1):
+    """初始检测状态，每条产线一行"""
+    n = len(FEATURES)
+    return {
+        'count': np.zeros(n_lines, dtype=np.int64),
+        'mean': np.zeros((n_lines, n)),
+        'var': np.ones((n_lines, n)),
+        'cov': np.tile(np.eye(n), (n_lines, 1, 1)),
+        'cusum_pos': np.zeros((n_lines, n)),
+        'cusum_neg': np.zeros((n_lines, n)),
+        'last_alarm': np.full((n_lines, len(DETECTORS), n), -np.inf),
+    }
+
+
+def _grow(state, n_lines):
+    """批次中出现新的产线时扩展状态"""
+    old = len(state['count'])
+    if n_lines <= old:
+        return state
+    extra = new_state(n_lines - old)
+    return {key: np.concatenate((value, extra[key])) for key, value in state.items()}
+
+
+def detect(state, batch):
+    """
+    对一批遥测记录 (按时间顺序，每个时间步每条产线一条) 做异常检测。
+    只有运行中的记录参与检测和状态更新，启停和故障本身由状态日志记录。
+    :return: (新状态, 事件列表)；事件为 {'ts', 'line', 'detector', 'channel', 'score', 'message'}
+    """
+    state = _grow({key: value.copy() for key, value in state.items()}, int(batch['line'].max()) + 1 if len(batch) else 0)
+    running = batch[batch['line_status'] == STATUS_RUNNING]
+    if not len(running):
+        return state, []
+    values = np.column_stack([running[f].astype(np.float64) for f in FEATURES])
+    # 同一时间步的所有产线一起做向量化更新
+    steps = np.flatnonzero(np.diff(running['ts'], prepend=np.nan) != 0)
+    bounds = np.append(steps, len(running))
+    events = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        events.extend(_step(state, running['ts'][start], running['line'][start:stop].astype(np.int64), values[start:stop]))
+    return state, events
+
+
+def _step(state, ts, lines, x):
+    count = state['count'][lines]
+    # 每条产线的第一个样本直接作为均值初值，避免预热期间均值从 0 爬升
+    first = count == 0
+    state['mean'][lines[first]] = x[first]
+    mean, var = state['mean'][lines], state['var'][lines]
+    cov = state['cov'][lines]
+    warm = (count >= WARMUP)[:, None]
+
+    residual = x - mean
+    z = residual / np.maximum(np.sqrt(var), MIN_STD)
+
+    # CUSUM：累计标准化偏差，超过阈值后清零重新累计
+    cusum_pos = np.maximum(0.0, state['cusum_pos'][lines] + z - CUSUM_K) * warm
+    cusum_neg = np.maximum(0.0, state['cusum_neg'][lines] - z - CUSUM_K) * warm
+    drift = warm & ((cusum_pos > CUSUM_H) | (cusum_neg > CUSUM_H))
+
+    # 马氏距离：残差相对指数加权协方差的距离，捕捉单个通道都不越限的组合异常
+    scale = np.maximum(np.sqrt(np.diagonal(cov, axis1=1, axis2=2)), MIN_STD)
+    normalized = residual / scale
+    correlation = cov / (scale[:, :, None] * scale[:, None, :]) + np.eye(len(FEATURES)) * 1e-3
+    d2 = np.einsum('li,li->l', normalized, np.linalg.solve(correlation, normalized[:, :, None])[:, :, 0])
+
+    flags = np.zeros((len(lines), len(DETECTORS), len(FEATURES)), dtype=bool)
+    flags[:, EWMA] = warm & (np.abs(z) > Z_LIMIT)
+    flags[:, CUSUM] = drift
+    # 马氏距离报警记在偏差最大的通道上
+    outliers = np.flatnonzero(warm[:, 0] & (d2 > CHI2_LIMIT))
+    flags[outliers, MAHALANOBIS, np.argmax(np.abs(z[outliers]), axis=1)] = True
+    last_alarm = state['last_alarm'][lines]
+    flags &= ts - last_alarm >= COOLDOWN
+
+    events = []
+    for i, detector, feature in zip(*np.nonzero(flags)):
+        last_alarm[i, detector, feature] = ts
+        name = FEATURE_NAMES[feature]
+        if detector == EWMA:
+            score, message = z[i, feature], f"{name}突变 (z={z[i, feature]:.1f})"
+        elif detector == CUSUM:
+            rising = cusum_pos[i, feature] > CUSUM_H
+            score = cusum_pos[i, feature] if rising else -cusum_neg[i, feature]
+            message = f"{name}持续{'上升' if rising else '下降'}漂移"
+        else:
+            score, message = d2[i], f"多参数组合异常，{name}偏离最大 (D²={d2[i]:.1f})"
+        events.append({'ts': float(ts), 'line': int(lines[i]), 'detector': DETECTORS[detector],
+                       'channel': FEATURES[feature], 'score': float(score), 'message': message})
+    cusum_pos[drift] = 0.0
+    cusum_neg[drift] = 0.0
+
+    # 指数加权更新均值、方差和协方差
+    state['mean'][lines] = mean + ALPHA * residual
+    state['var'][lines] = (1 - ALPHA) * (var + ALPHA * residual ** 2)
+    state['cov'][lines] = (1 - ALPHA) * (cov + ALPHA * residual[:, :, None] * residual[:, None, :])
+    state['cusum_pos'][lines] = cusum_pos
+    state['cusum_neg'][lines] = cusum_neg
+    state['last_alarm'][lines] = last_alarm
+    state['count'][lines] += 1
+    return events
@@ -0,0 +1,47 @@
+# engine/clock.py
+# 仿真时钟：时间戳始终由仿真步数推算，与墙钟的关系只由 speed 决定。
+import time
+
+
+class SimClock:
+    """
+    单调递增的仿真时钟。
+    - speed=1.0: 实时模式，每个仿真步对应 tick_interval 秒墙钟时间
+    - speed=k:   k 倍速运行
+    - speed=None: 不等待，CPU 能跑多快就跑多快
+    """
+    def __init__(self, tick_interval=1.0, speed=1.0, start=None):
+        self.tick_interval = tick_interval
+        self.speed = speed
+        self.start = time.time() if start is None else start
+        self.ticks = 0
+        self.resync()
+
+    def now(self):
+        """当前仿真时间 (epoch 秒)"""
+        return self.start + self.ticks * self.tick_interval
+
+    def advance(self):
+        """前进一个仿真步，返回新的仿真时间"""
+        self.ticks += 1
+        return self.now()
+
+    def wait(self):
+        """按倍速等待到下一个仿真步的墙钟截止时间，按截止时间对齐以避免累积漂移"""
+        if not self.speed:
+            return
+        self._deadline += self.tick_interval / self.speed
+        delay = self._deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -1.0:
+            # 落后太多 (例如被暂停) 时不再追赶
+            self._deadline = time.monotonic()
+
+    def resync(self):
+        """以当前墙钟时刻作为倍速计时的起点，暂停恢复后调用"""
+        self._deadline = time.monotonic()
+
+    def set_speed(self, speed):
+        self.speed = speed
+        self.resync()
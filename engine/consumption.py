@@ -0,0 +1,45 @@
+# engine/consumption.py
+# 能耗与物耗成本模型：由设备状态、牵引速度和单价计算功率分布、单位成本和帕累托构成。
+import numpy as np
+
+from .line_engine import MODES, MODE_FACTORS
+
+DEFAULT_COSTS = {'electricity_price': 0.8, 'material_price': 12.5}
+
+
+def power_breakdown(extruder_running, tractor_running, winder_running, mode='normal'):
+    """各用电单元的实时功率 (kW)，挤出机和牵引机受模式功率因子影响"""
+    power_multiplier = MODE_FACTORS[MODES.index(mode), 1]
+    power_data = {
+        '挤出机': 25 if extruder_running else 1, '牵引机': 5 if tractor_running else 0.5,
+        '收卷机': 3 if winder_running else 0.5, '冷却系统': 2, '照明': 1, '热损耗': 4
+    }
+    power_data['挤出机'] *= power_multiplier; power_data['牵引机'] *= power_multiplier
+    return power_data
+
+
+def unit_costs(power_data, speed_m_per_min, costs):
+    """
+    计算单位长度成本。
+    :return: (单位电能成本 元/米, 单位物料成本 元/米, 物料成本 元/秒)
+    """
+    total_power = sum(power_data.values())
+    speed_mps = speed_m_per_min / 60.0
+    if speed_mps <= 0:
+        return 0.0, 0.0, 0.0
+    material_consumption_kgps = speed_mps / 100
+    elec_cost_per_sec = total_power * (costs['electricity_price'] / 3600)
+    mat_cost_per_sec = material_consumption_kgps * costs['material_price']
+    return elec_cost_per_sec / speed_mps, mat_cost_per_sec / speed_mps, mat_cost_per_sec
+
+
+def pareto(power_data, mat_cost_per_sec, costs):
+    """成本构成帕累托分析，返回 (标签, 每小时成本, 累计占比%)，按成本降序"""
+    all_costs = {k: v * costs['electricity_price'] for k, v in power_data.items()}
+    all_costs['原料'] = mat_cost_per_sec * 3600
+    sorted_costs = sorted(all_costs.items(), key=lambda item: item[1], reverse=True)
+    labels = [item[0] for item in sorted_costs]; values = [item[1] for item in sorted_costs]
+    total_cost = sum(values)
+    if total_cost == 0: cumulative_percentage = np.zeros(len(values))
+    else: cumulative_percentage = np.cumsum(values) / total_cost * 100
+    return labels, values, cumulative_percentage
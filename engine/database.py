@@ -0,0 +1,194 @@
+# engine/database.py
+# 本地 SQLite 持久化：工单、工单生产快照和缺陷样本。
+# 数据库使用 WAL 模式；高频变化 (例如每个批次都在变的 quantity_done) 只在内存中标记为脏，
+# 由 flush() 在一个事务里批量写入，同一条记录在两次 flush 之间无论改多少次都只写一次。
+import json
+import sqlite3
+import time
+
+OPEN_ORDER_STATUSES = ("待处理", "生产中", "已暂停", "故障暂停")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    product TEXT NOT NULL,
+    quantity_plan REAL NOT NULL,
+    quantity_done REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    device_id TEXT,
+    due REAL NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_status ON orders(status);
+CREATE INDEX IF NOT EXISTS orders_updated ON orders(updated_at);
+
+CREATE TABLE IF NOT EXISTS order_snapshots (
+    order_id TEXT PRIMARY KEY REFERENCES orders(id),
+    taken_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS defects (
+    id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    time TEXT NOT NULL,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    desc TEXT NOT NULL DEFAULT '',
+    x REAL, y REAL, w REAL, h REAL
+);
+CREATE INDEX IF NOT EXISTS defects_ts ON defects(ts, id);
+"""
+
+SCHEMA_VERSION = 1 # 保存在 PRAGMA user_version 中；0 为缺陷位置仍是 (x, y, size) 正方形的早期库
+
+ORDER_COLUMNS = ("id", "product", "quantity_plan", "quantity_done", "status", "device_id", "due", "priority")
+DEFECT_COLUMNS = ("id", "ts", "time", "type", "status", "desc")
+
+
+def _upsert_sql(table, columns, extra=()):
+    names = columns + tuple(extra)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in names if c != "id")
+    return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}")
+
+
+class Database:
+    """工单与缺陷样本的持久化层 (写回缓存 + 分页读取)，只应在创建它的线程中使用"""
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._dirty_orders = {}     # id -> 工单字典 (flush 时才读取其当前值)
+        self._dirty_snapshots = {}  # 工单 id -> (时间, 快照字典)
+        self._dirty_defects = {}    # id -> 缺陷字典
+        self._deleted_defects = set()
+
+    def _migrate(self):
+        """按 user_version 升级旧库的表结构 (CREATE TABLE IF NOT EXISTS 不会修改已存在的表)"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self._conn:
+            if version < 1:
+                # 缺陷位置由 (x, y, size) 正方形改为 (x, y, w, h) 矩形，旧列保留不用
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(defects)")}
+                if 'w' not in columns:
+                    self._conn.execute("ALTER TABLE defects ADD COLUMN w REAL")
+                    self._conn.execute("ALTER TABLE defects ADD COLUMN h REAL")
+                    if 'size' in columns:
+                        self._conn.execute("UPDATE defects SET w = size, h = size")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # --- 写入 (只标记，flush 时批量提交) ---
+    def save_order(self, order):
+        self._dirty_orders[order['id']] = order
+
+    def save_snapshot(self, order_id, snapshot, taken_at=None):
+        self._dirty_snapshots[order_id] = (time.time() if taken_at is None else taken_at, snapshot)
+
+    def save_defect(self, defect):
+        self._deleted_defects.discard(defect['id'])
+        self._dirty_defects[defect['id']] = defect
+
+    def delete_defect(self, defect_id):
+        self._dirty_defects.pop(defect_id, None)
+        self._deleted_defects.add(defect_id)
+
+    def save_defects(self, defects):
+        for defect in defects:
+            self.save_defect(defect)
+
+    def delete_defects(self, defect_ids):
+        for defect_id in defect_ids:
+            self.delete_defect(defect_id)
+
+    @property
+    def has_pending_writes(self):
+        return bool(self._dirty_orders or self._dirty_snapshots or self._dirty_defects or self._deleted_defects)
+
+    def flush(self):
+        """把所有待写入的变化放进一个事务提交"""
+        if not self.has_pending_writes:
+            return
+        now = time.time()
+        orders = [tuple(o[c] for c in ORDER_COLUMNS) + (now,) for o in self._dirty_orders.values()]
+        snapshots = [(order_id, taken_at, json.dumps(data, ensure_ascii=False))
+                     for order_id, (taken_at, data) in self._dirty_snapshots.items()]
+        defects = [tuple(d.get(c, "") for c in DEFECT_COLUMNS) + tuple(d.get("pos") or (None, None, None, None))
+                   for d in self._dirty_defects.values()]
+        with self._conn:
+            if orders:
+                self._conn.executemany(_upsert_sql("orders", ORDER_COLUMNS, ("updated_at",)), orders)
+            if snapshots:
+                self._conn.executemany("INSERT OR REPLACE INTO order_snapshots (order_id, taken_at, data) VALUES (?, ?, ?)", snapshots)
+            if defects:
+                self._conn.executemany(_upsert_sql("defects", DEFECT_COLUMNS, ("x", "y", "w", "h")), defects)
+            if self._deleted_defects:
+                self._conn.executemany("DELETE FROM defects WHERE id = ?", [(i,) for i in self._deleted_defects])
+        self._dirty_orders.clear(); self._dirty_snapshots.clear()
+        self._dirty_defects.clear(); self._deleted_defects.clear()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    # --- 读取 ---
+    def count(self, table):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def has_defect(self, defect_id):
+        """id 是否已被占用 (包括尚未 flush 的新样本)"""
+        if defect_id in self._dirty_defects:
+            return True
+        if defect_id in self._deleted_defects:
+            return False
+        return self._conn.execute("SELECT 1 FROM defects WHERE id = ?", (defect_id,)).fetchone() is not None
+
+    def max_defect_number(self):
+        """已保存缺陷 id 中最大的数字编号 (如 DEF-0012 -> 12)，没有样本时为 0；用于分配新 id，删除样本后也不会重复"""
+        row = self._conn.execute("SELECT MAX(CAST(substr(id, instr(id, '-') + 1) AS INTEGER)) FROM defects").fetchone()
+        return row[0] or 0
+
+    def load_orders(self, closed_limit=200):
+        """
+        启动时加载工单：全部未结工单 + 最近更新的 closed_limit 条已结工单，按创建顺序返回。
+        """
+        placeholders = ", ".join("?" * len(OPEN_ORDER_STATUSES))
+        rows = self._conn.execute(
+            f"SELECT {', '.join('o.' + c for c in ORDER_COLUMNS)}, s.data FROM orders o "
+            f"LEFT JOIN order_snapshots s ON s.order_id = o.id "
+            f"WHERE o.status IN ({placeholders}) OR o.rowid IN ("
+            f"  SELECT rowid FROM orders WHERE status NOT IN ({placeholders}) ORDER BY updated_at DESC LIMIT ?) "
+            f"ORDER BY o.rowid",
+            OPEN_ORDER_STATUSES + OPEN_ORDER_STATUSES + (closed_limit,)).fetchall()
+        orders = []
+        for row in rows:
+            order = dict(zip(ORDER_COLUMNS, row[:-1]))
+            if row[-1] is not None:
+                order['snapshot'] = json.loads(row[-1])
+            orders.append(order)
+        return orders
+
+    def load_defects(self, limit=200, before=None):
+        """
+        按时间倒序分页读取缺陷样本 (键集分页，翻页代价与总量无关)。
+        :param before: 上一页最后一条的 (ts, id)，None 表示从最新开始
+        """
+        columns = ", ".join(DEFECT_COLUMNS + ("x", "y", "w", "h"))
+        if before is None:
+            rows = self._conn.execute(f"SELECT {columns} FROM defects ORDER BY ts DESC, id DESC LIMIT ?", (limit,))
+        else:
+            rows = self._conn.execute(f"SELECT {columns} FROM defects WHERE (ts, id) < (?, ?) "
+                                      f"ORDER BY ts DESC, id DESC LIMIT ?", tuple(before) + (limit,))
+        defects = []
+        for row in rows:
+            defect = dict(zip(DEFECT_COLUMNS, row[:len(DEFECT_COLUMNS)]))
+            if row[-1] is not None:
+                defect['pos'] = tuple(int(v) for v in row[-4:])
+            defects.append(defect)
+        return defects
@@ -0,0 +1,119 @@
+# engine/decimation.py
+# 多分辨率 min/max 抽稀金字塔：第 0 层为原始采样，第 k 层每个桶汇总 factor**k 个原始点的最小/最大值。
+# 数据追加时逐层增量更新；绘图时按屏幕像素宽度选择合适的层，缩小到整个班次也只绘制约 2×宽度 个点。
+import numpy as np
+
+from .ring_buffer import RingBuffer
+
+
+class _Level:
+    """金字塔中的一层：已完成的桶存放在环形缓冲区中，未凑满的子桶暂存在 pending 中"""
+    def __init__(self, capacity, factor):
+        self.factor = factor
+        self.x = RingBuffer(capacity)
+        self.lo = RingBuffer(capacity)
+        self.hi = RingBuffer(capacity)
+        self._pending = (np.empty(0), np.empty(0), np.empty(0))
+
+    def feed(self, x, lo, hi):
+        """接收下一层完成的桶，按 factor 个一组合并，返回本层新完成的桶"""
+        px, plo, phi = self._pending
+        if len(px):
+            x, lo, hi = np.concatenate((px, x)), np.concatenate((plo, lo)), np.concatenate((phi, hi))
+        n_full = len(x) // self.factor * self.factor
+        self._pending = (x[n_full:], lo[n_full:], hi[n_full:])
+        if n_full == 0:
+            return None
+        done = (x[:n_full:self.factor],
+                lo[:n_full].reshape(-1, self.factor).min(axis=1),
+                hi[:n_full].reshape(-1, self.factor).max(axis=1))
+        self.x.extend(done[0]); self.lo.extend(done[1]); self.hi.extend(done[2])
+        return done
+
+    def partial(self):
+        """尚未凑满的桶汇总成一个 (x, min, max)，没有时返回 None"""
+        px, plo, phi = self._pending
+        if not len(px):
+            return None
+        return px[0], plo.min(), phi.max()
+
+
+class MinMaxPyramid:
+    """单通道的增量抽稀金字塔，横轴 x (通常为时间戳) 必须单调递增"""
+    def __init__(self, capacity, factor=4, min_level_size=64):
+        """
+        :param capacity: 原始采样的保留数量
+        :param factor: 相邻两层之间的聚合倍数
+        :param min_level_size: 最粗一层至少保留的桶数，决定层数
+        """
+        self.capacity = int(capacity)
+        self.factor = factor
+        self.min_level_size = min_level_size
+        self.x = RingBuffer(self.capacity)
+        self.y = RingBuffer(self.capacity)
+        self.levels = []
+        bucket = factor
+        while self.capacity // bucket >= min_level_size:
+            self.levels.append(_Level(self.capacity // bucket + 1, factor))
+            bucket *= factor
+
+    @classmethod
+    def from_arrays(cls, x, y, factor=4):
+        """为一段静态数据 (例如历史记录) 构建金字塔"""
+        pyramid = cls(max(len(x), 1), factor)
+        pyramid.extend(x, y)
+        return pyramid
+
+    def __len__(self):
+        return len(self.y)
+
+    def extend(self, x, y):
+        x = np.asarray(x, dtype=np.float64); y = np.asarray(y, dtype=np.float64)
+        self.x.extend(x); self.y.extend(y)
+        done = (x, y, y)
+        for level in self.levels:
+            done = level.feed(*done)
+            if done is None:
+                break
+
+    def resize(self, capacity):
+        """修改保留长度并由原始数据重建各层"""
+        x, y = self.x.view(capacity).copy(), self.y.view(capacity).copy()
+        self.__init__(capacity, self.factor, self.min_level_size)
+        self.extend(x, y)
+
+    def query(self, x_min=None, x_max=None, max_points=2000):
+        """
+        返回 [x_min, x_max] 区间内适合绘制的 (x, y)：
+        优先使用原始数据，点数超过 max_points 时改用能满足要求的最细一层 min/max 桶。
+        原始数据返回零拷贝视图；桶数据按 (最小, 最大) 交错展开。
+        """
+        raw_x = self.x.view()
+        if not len(raw_x):
+            return raw_x, self.y.view()
+        x_min = raw_x[0] if x_min is None else x_min
+        x_max = raw_x[-1] if x_max is None else x_max
+        i0, i1 = np.searchsorted(raw_x, [x_min, x_max], side='left')
+        i1 = min(i1 + 1, len(raw_x)) # 包含右边界外一点，保证曲线连到视口边缘
+        if i1 - i0 <= max_points or not self.levels:
+            return raw_x[i0:i1], self.y.view()[i0:i1]
+
+        for depth, level in enumerate(self.levels):
+            lx = level.x.view()
+            j0, j1 = np.searchsorted(lx, [x_min, x_max], side='left')
+            j0 = max(j0 - 1, 0); j1 = min(j1 + 1, len(lx))
+            if 2 * (j1 - j0) <= max_points or depth == len(self.levels) - 1:
+                return self._expand(level, j0, j1, depth)
+
+    def _expand(self, level, j0, j1, depth):
+        xs = [level.x.view()[j0:j1]]; los = [level.lo.view()[j0:j1]]; his = [level.hi.view()[j0:j1]]
+        if j1 == len(level.x):
+            # 末尾尚未凑满的桶：从本层到第 1 层各有一个部分桶，按时间先后拼接到末尾
+            for partial in (l.partial() for l in reversed(self.levels[:depth + 1])):
+                if partial is not None:
+                    xs.append([partial[0]]); los.append([partial[1]]); his.append([partial[2]])
+        x = np.concatenate(xs); lo = np.concatenate(los); hi = np.concatenate(his)
+        out_x = np.repeat(x, 2)
+        out_y = np.empty(2 * len(x))
+        out_y[0::2] = lo; out_y[1::2] = hi
+        return out_x, out_y
@@ -0,0 +1,99 @@
+# engine/defect_stats.py
+# 缺陷样本的增量统计：按类型分层的位置二维直方图 (热力图)，以及按分钟滚动的各类型缺陷率
+# (每分钟、每千米产量)。样本增删改时只更新对应的计数格，不会遍历全部样本。
+import numpy as np
+
+MAX_TYPES = 16 # 类型编码上限，与 DefectStore 的分类编码一一对应
+
+
+class DefectStats:
+    """位置热力图 + 滚动缺陷率，由 DefectStore 在样本变化时调用"""
+    def __init__(self, frame_size=(512, 128), bins=(64, 16), window_minutes=60):
+        """
+        :param frame_size: 图像宽高 (像素)，缺陷位置取外接框中心
+        :param bins: 热力图横向、纵向的格数
+        :param window_minutes: 滚动缺陷率的统计窗口 (分钟)
+        """
+        self.frame_size = frame_size
+        self.bins = bins
+        self.heatmap = np.zeros((MAX_TYPES, bins[1], bins[0]), dtype=np.int64)
+        self.window = window_minutes
+        self._counts = np.zeros((window_minutes, MAX_TYPES), dtype=np.int64) # 按 分钟 % 窗口 循环使用
+        self._output = np.zeros(window_minutes, dtype=np.float64)            # 每分钟产量 (米)
+        self._head = None  # 窗口内最新的分钟编号
+        self._first = None # 最早有数据的分钟编号，用于窗口未满时计算实际时长
+
+    # --- 样本变化 ---
+    def add(self, ts, types, pos, sign=1):
+        """
+        :param ts: 时间戳数组
+        :param types: 类型编码数组
+        :param pos: 与 ts 等长的 (x, y, w, h) 或 None 列表
+        :param sign: +1 为新增，-1 为撤销 (删除或改类型前的旧值)
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        types = np.asarray(types, dtype=np.int64)
+        if not len(ts):
+            return
+        self._add_heatmap(types, pos, sign)
+        self._add_rates(ts, types, sign)
+
+    def _add_heatmap(self, types, pos, sign):
+        has_pos = np.array([p is not None for p in pos], dtype=bool)
+        if not has_pos.any():
+            return
+        boxes = np.array([p for p in pos if p is not None], dtype=np.float64)
+        cx = (boxes[:, 0] + boxes[:, 2] / 2) / self.frame_size[0] * self.bins[0]
+        cy = (boxes[:, 1] + boxes[:, 3] / 2) / self.frame_size[1] * self.bins[1]
+        ix = np.clip(cx.astype(np.int64), 0, self.bins[0] - 1)
+        iy = np.clip(cy.astype(np.int64), 0, self.bins[1] - 1)
+        np.add.at(self.heatmap, (types[has_pos], iy, ix), sign)
+
+    def _add_rates(self, ts, types, sign):
+        minutes = (ts // 60).astype(np.int64)
+        self._advance(int(minutes.max()))
+        in_window = minutes > self._head - self.window
+        if not in_window.any():
+            return
+        minutes, types = minutes[in_window], types[in_window]
+        np.add.at(self._counts, (minutes % self.window, types), sign)
+        self._first = int(minutes.min()) if self._first is None else min(self._first, int(minutes.min()))
+
+    def add_output(self, ts, meters):
+        """累加一段时间的产量 (米)，用于计算每千米缺陷率"""
+        minute = int(ts // 60)
+        self._advance(minute)
+        if minute > self._head - self.window:
+            self._output[minute % self.window] += meters
+            self._first = minute if self._first is None else min(self._first, minute)
+
+    def _advance(self, minute):
+        """窗口前移到 minute，清空移出窗口的分钟格"""
+        if self._head is None:
+            self._head = minute
+            return
+        if minute <= self._head:
+            return
+        steps = min(minute - self._head, self.window)
+        expired = (self._head + 1 + np.arange(steps)) % self.window
+        self._counts[expired] = 0
+        self._output[expired] = 0.0
+        self._head = minute
+
+    # --- 查询 ---
+    def grid(self, type_code=None):
+        """热力图计数 (纵向格数, 横向格数)，type_code 为 None 时合计全部类型"""
+        return self.heatmap.sum(axis=0) if type_code is None else self.heatmap[type_code]
+
+    def rates(self, now):
+        """
+        窗口内各类型的缺陷率。
+        :return: (每分钟缺陷数数组, 每千米缺陷数数组或 None)，下标为类型编码
+        """
+        self._advance(int(now // 60))
+        counts = self._counts.sum(axis=0)
+        if self._first is None:
+            return np.zeros(MAX_TYPES), None
+        minutes = max(1, min(self.window, self._head - self._first + 1))
+        output = self._output.sum()
+        return counts / minutes, (counts / output * 1000 if output > 0 else None)
@@ -0,0 +1,111 @@
+# engine/eta.py
+# 流式工单完工时间预测：按产线维护牵引速度 (按模式系数归一化) 和开机率的指数加权均值，
+# 用 "有效产出速率 = 归一化速度 × 当前模式速度系数 × 开机率" 估算生产中和排队工单的完工时间。
+# 排队工单前方的累计剩余量只在工单增删或状态变化时重建，单个工单的预测是 O(1) 查表。
+import math
+
+import numpy as np
+
+from .line_engine import MODE_FACTORS, STATUS_RUNNING
+from .order_store import PENDING, ACTIVE, ANY_LINE
+
+OUTPUT_PER_SPEED = 10 / 60 # 每条记录 (1 秒) 的产量 = 牵引速度 (m/min) × 该系数
+
+
+def ewma_update(value, samples, alpha):
+    """把一段样本依次并入指数加权均值 (向量化的闭式形式)，value 为 None 时以首个样本为初值"""
+    samples = np.asarray(samples, dtype=np.float64)
+    if len(samples) == 0:
+        return value
+    if value is None:
+        value, samples = samples[0], samples[1:]
+    decay = 1.0 - alpha
+    weights = alpha * decay ** np.arange(len(samples) - 1, -1, -1)
+    return float(decay ** len(samples) * value + weights @ samples)
+
+
+class _LineRate:
+    """单条产线的流式速率统计"""
+    def __init__(self):
+        self.norm_speed = None  # 运行时牵引速度 / 模式速度系数 的 EWMA
+        self.duty = None        # 运行状态占比的 EWMA
+        self.mode = 0
+        self.ts = None          # 最近一条记录的仿真时间
+
+    def output_rate(self):
+        """当前模式下的期望产出速率 (米/秒)，没有运行数据时返回 None"""
+        if not self.norm_speed or not self.duty:
+            return None
+        return self.norm_speed * MODE_FACTORS[self.mode, 0] * OUTPUT_PER_SPEED * self.duty
+
+
+class EtaForecaster:
+    """基于 OrderStore 的全队列完工时间预测"""
+    def __init__(self, store, half_life=300):
+        """
+        :param half_life: EWMA 半衰期 (记录条数，即仿真秒数)
+        """
+        self.store = store
+        self.alpha = 1.0 - math.exp(-math.log(2) / half_life)
+        self.lines = {}
+        self._queue_version = None
+        self._ahead = {} # 工单 id -> [(产线, 前方排队工单的剩余总量)]
+
+    def update(self, line_id, batch):
+        """并入一个产线的遥测批次"""
+        if not len(batch):
+            return
+        line = self.lines.setdefault(line_id, _LineRate())
+        running = batch['line_status'] == STATUS_RUNNING
+        line.duty = ewma_update(line.duty, running, self.alpha)
+        if running.any():
+            rows = batch[running]
+            line.norm_speed = ewma_update(line.norm_speed, rows['tractor_speed'] / MODE_FACTORS[rows['mode'], 0], self.alpha)
+        line.mode = int(batch['mode'][-1])
+        line.ts = float(batch['ts'][-1])
+
+    def eta(self, order_id, active_orders):
+        """
+        预测工单完工时间 (仿真时间戳)，无法预测 (已结束、暂停或没有速率数据) 时返回 None。
+        :param active_orders: 产线 -> 正在生产的工单 id
+        """
+        order = self.store.get(order_id)
+        if order is None:
+            return None
+        if order['status'] == ACTIVE:
+            return self._finish_time(order['device_id'], 0.0, order, active_orders)
+        if order['status'] != PENDING:
+            return None
+        self._rebuild_queues()
+        times = [self._finish_time(line_id, ahead, order, active_orders) for line_id, ahead in self._ahead.get(order_id, ())]
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
+    def _finish_time(self, line_id, ahead, order, active_orders):
+        line = self.lines.get(line_id)
+        rate = line.output_rate() if line else None
+        if rate is None:
+            return None
+        if order['status'] != ACTIVE:
+            active = self.store.get(active_orders.get(line_id))
+            if active is not None:
+                ahead += active['quantity_plan'] - active['quantity_done']
+        remaining = max(order['quantity_plan'] - order['quantity_done'], 0.0)
+        return line.ts + (ahead + remaining) / rate
+
+    def _rebuild_queues(self):
+        """按派工顺序 (交期, 优先级) 为每条产线累加前方排队量；只在工单集合或状态变化后执行"""
+        version = (self.store.version, len(self.lines))
+        if self._queue_version == version:
+            return
+        self._queue_version = version
+        pending = sorted((self.store.get(i) for i in self.store.ids_with_status(PENDING)),
+                         key=lambda o: (o['due'], -o['priority']))
+        line_ids = set(self.lines) | {o['device_id'] for o in pending if o['device_id'] is not ANY_LINE}
+        self._ahead = {}
+        for line_id in line_ids:
+            ahead = 0.0
+            for order in pending:
+                if order['device_id'] in (line_id, ANY_LINE):
+                    self._ahead.setdefault(order['id'], []).append((line_id, ahead))
+                    ahead += order['quantity_plan'] - order['quantity_done']
@@ -0,0 +1,232 @@
+# engine/health.py
+# 设备健康度评估：与界面无关的纯计算部分，可在服务器或批处理任务中直接调用。
+import numpy as np
+
+# 部件 -> 关联的传感器通道
+COMPONENT_CHANNELS = {
+    'motor': 'motor_current',
+    'gearbox': 'gearbox_vibration',
+    'heater': 'heater_temp',
+}
+
+
+# 健康度规则：趋势规则对所有部件生效，波动性和峰值规则按部件类型配置 (未配置的不检查)
+TREND_WINDOW = 50     # 移动平均窗口
+TREND_RATIO = 1.1     # 近期平均值比早期高 10% 视为上升趋势
+HEALTH_RULES = {
+    'motor': {'peak': 15},     # 电机电流过载
+    'gearbox': {'std': 0.8},   # 减速箱振动过大
+    'heater': {'peak': 105},   # 加热器曾经过热
+}
+TREND_PENALTY, STD_PENALTY, PEAK_PENALTY = 20, 30, 25
+
+# 规则表：每个部件一行，不检查的项阈值为 inf
+RULE_DTYPE = np.dtype([
+    ('trend_ratio', 'f8'),
+    ('std_limit', 'f8'),
+    ('peak_limit', 'f8'),
+])
+
+
+def rule_table(kinds, overrides=None):
+    """
+    按部件类型生成规则表。
+    :param kinds: 每个部件的类型 ('motor' / 'gearbox' / 'heater' ...)
+    :param overrides: 可选，{部件下标: {字段: 阈值}}，用于个别部件的单独阈值
+    """
+    rules = np.empty(len(kinds), dtype=RULE_DTYPE)
+    rules['trend_ratio'] = TREND_RATIO
+    for kind in set(kinds):
+        mask = np.asarray(kinds) == kind
+        rules['std_limit'][mask] = HEALTH_RULES.get(kind, {}).get('std', np.inf)
+        rules['peak_limit'][mask] = HEALTH_RULES.get(kind, {}).get('peak', np.inf)
+    for i, fields in (overrides or {}).items():
+        for name, value in fields.items():
+            rules[name][i] = value
+    return rules
+
+
+def _apply_rules(rules, early_mean, recent_mean, std, peak, has_trend):
+    """
+    按规则表对一组部件的统计量扣分，返回健康度数组。
+    :param has_trend: 样本数是否已超过一个窗口 (标量或逐部件的布尔数组)
+    """
+    score = np.full(len(rules), 100.0)
+    score -= TREND_PENALTY * ((recent_mean > early_mean * rules['trend_ratio']) & has_trend)
+    score -= STD_PENALTY * (std > rules['std_limit'])
+    score -= PEAK_PENALTY * (peak > rules['peak_limit'])
+    return np.maximum(score, 0)
+
+
+def score_fleet(data, rules, window=TREND_WINDOW):
+    """
+    一次向量化计算全部部件的健康度。
+    :param data: (部件数, 样本数) 数组，每行一个部件的传感器序列
+    :param rules: 与部件一一对应的规则表 (RULE_DTYPE)
+    :return: 健康度数组 (部件数,)
+    """
+    data = np.asarray(data, dtype=np.float64)
+    # 首尾两个移动平均窗口即可判断趋势，不必对整段做卷积
+    has_trend = data.shape[1] > window
+    return _apply_rules(rules, data[:, :window].mean(axis=1), data[:, -window:].mean(axis=1),
+                        data.std(axis=1), data.max(axis=1), has_trend)
+
+
+def calculate_health_score(component_name, data):
+    """核心算法 1: 健康度评估引擎 (单个部件)"""
+    return float(score_fleet(np.asarray(data)[None, :], rule_table([component_name]))[0])
+
+
+class StreamingHealth:
+    """
+    多个部件的流式健康度：每来一个样本只更新常数个状态量，不保留也不重扫历史数据。
+    - 均值/方差：Welford 在线算法 (批量加入时用 Chan 合并公式)
+    - 峰值：累计最大值
+    - 趋势：最近 TREND_WINDOW 个样本的环形缓冲区 + 滑动和，与第一个完整窗口的均值比较
+    评分规则与 score_fleet 相同，对同一段数据两者结果一致。各部件的样本数可以不同 (只有部分设备在线)。
+    """
+    RESUM_INTERVAL = 100 * TREND_WINDOW # 定期重算滑动和，消除浮点累计误差
+
+    def __init__(self, rules, window=TREND_WINDOW):
+        """
+        :param rules: 规则表 (RULE_DTYPE)，样本向量按其顺序排列
+        """
+        self.rules = rules
+        n = len(rules)
+        self.window = window
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self._m2 = np.zeros(n)
+        self.peak = np.full(n, -np.inf)
+        self._ring = np.zeros((window, n))
+        self._window_sum = np.zeros(n)
+        self.baseline = np.full(n, np.nan) # 第一个完整窗口的均值
+
+    def update(self, values, columns=slice(None)):
+        """
+        加入一个样本向量。
+        :param columns: 样本对应的部件下标，默认为全部部件
+        """
+        x = np.asarray(values, dtype=np.float64)
+        count = self.count[columns] + 1
+        self.count[columns] = count
+        mean = self.mean[columns]
+        delta = x - mean
+        mean += delta / count
+        self.mean[columns] = mean
+        self._m2[columns] += delta * (x - mean)
+        self.peak[columns] = np.maximum(self.peak[columns], x)
+        slot = (count - 1) % self.window
+        cols = np.arange(len(self.count))[columns]
+        self._window_sum[columns] += x - self._ring[slot, cols]
+        self._ring[slot, cols] = x
+        full = count == self.window
+        if full.any():
+            self.baseline[cols[full]] = self._window_sum[cols[full]] / self.window
+        resum = count % self.RESUM_INTERVAL == 0
+        if resum.any():
+            self._window_sum[cols[resum]] = self._ring[:, cols[resum]].sum(axis=0)
+
+    def extend(self, samples, columns=slice(None)):
+        """
+        按时间顺序加入 (样本数, 部件数) 的一批样本；整批用合并公式一次加入，全部向量化。
+        :param columns: 样本列对应的部件下标，默认为全部部件
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        k = len(samples)
+        if k == 0:
+            return
+        cols = np.arange(len(self.count))[columns]
+        old = self.count[cols]
+        count = old + k
+        self.count[cols] = count
+        block_mean = samples.mean(axis=0)
+        delta = block_mean - self.mean[cols]
+        self.mean[cols] += delta * k / count
+        self._m2[cols] += ((samples - block_mean) ** 2).sum(axis=0) + delta ** 2 * old * k / count
+        self.peak[cols] = np.maximum(self.peak[cols], samples.max(axis=0))
+        # 窗口未满前环形缓冲区的前 old 个槽位就是全部历史样本；本批把窗口填满的部件确定基线
+        filled = (old < self.window) & (count >= self.window)
+        for j in np.flatnonzero(filled):
+            c, n_old = cols[j], old[j]
+            self.baseline[c] = (self._ring[:n_old, c].sum() + samples[:self.window - n_old, j].sum()) / self.window
+        tail = min(k, self.window)
+        slots = (count[None, :] - tail + np.arange(tail)[:, None]) % self.window
+        self._ring[slots, cols[None, :]] = samples[-tail:]
+        self._window_sum[cols] = self._ring[:, cols].sum(axis=0)
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / np.maximum(self.count, 1))
+
+    @property
+    def rolling_mean(self):
+        return self._window_sum / np.clip(self.count, 1, self.window)
+
+    def scores(self):
+        """全部部件的当前健康度数组"""
+        return _apply_rules(self.rules, self.baseline, self.rolling_mean, self.std, self.peak, self.count > self.window)
+
+
+def maintenance_suggestion(health_score):
+    """根据健康度给出维护建议"""
+    if health_score < 50:
+        return "立即检查，计划更换"
+    elif health_score < 80:
+        return "增加检查频率，注意异常"
+    return "状态良好，按计划维护"
+
+
+def create_mock_sensor_data(n_points=1000, seed=None):
+    """模拟设备各部件在过去一段时间的传感器数据"""
+    rng = np.random.default_rng(seed)
+    db = {
+        # 驱动电机电流 (A)，正常10A，后期有上升趋势
+        'motor_current': 10 + np.linspace(0, 3, n_points) + rng.standard_normal(n_points) * 0.5,
+        # 减速箱振动 (mm/s)，正常<0.5，后期波动变大
+        'gearbox_vibration': 0.3 + np.linspace(0, 0.8, n_points)**2 + rng.standard_normal(n_points) * 0.2,
+        # 加热器温度 (°C)，正常90°C，有几次过热峰值
+        'heater_temp': 90 + rng.standard_normal(n_points) * 1.5
+    }
+    # 制造峰值
+    db['heater_temp'][int(n_points * 0.3)] = 108
+    db['heater_temp'][int(n_points * 0.7)] = 106
+    return db
+
+
+def create_mock_fleet(n_assets, n_points=1000, seed=None):
+    """
+    模拟一个机群：每台挤出机有 COMPONENT_CHANNELS 中的全部部件，劣化程度随机。
+    :return: (设备编号列表, 部件类型列表, (部件数, 样本数) 数据数组)，部件按 设备 × 类型 排列
+    """
+    rng = np.random.default_rng(seed)
+    kinds = list(COMPONENT_CHANNELS) * n_assets
+    ramp = np.linspace(0, 1, n_points)
+    severity = rng.random((n_assets, 1)) ** 3 # 大多数设备状态良好，少数明显劣化
+    noise = rng.standard_normal((3, n_assets, n_points))
+    data = np.empty((n_assets, len(COMPONENT_CHANNELS), n_points))
+    data[:, 0] = 10 + ramp * 4 * severity + noise[0] * 0.5
+    data[:, 1] = 0.3 + (ramp * 1.2 * severity) ** 2 + noise[1] * (0.2 + 0.8 * severity)
+    data[:, 2] = 90 + noise[2] * 1.5
+    # 部分加热器出现过热峰值
+    spikes = np.flatnonzero(rng.random(n_assets) < severity[:, 0])
+    data[spikes, 2, rng.integers(0, n_points, len(spikes))] = 106 + rng.random(len(spikes)) * 4
+    assets = [f"EX-{i + 1:04d}" for i in range(n_assets)]
+    return assets, kinds, data.reshape(-1, n_points)
+
+
+def channels_from_telemetry(records):
+    """
+    由一条产线的遥测记录估算各部件传感器通道 (遥测中没有这几个测点，按工况换算)：
+    电机电流随挤出压力和牵引速度变化，加热器温度比熔体温度高约 5°C，
+    减速箱振动随转速和收卷张力波动变化。
+    :return: (记录数, 通道数) 数组，列顺序同 COMPONENT_CHANNELS
+    """
+    pressure = records['extruder_pressure'].astype(np.float64)
+    speed = records['tractor_speed'].astype(np.float64)
+    channels = {
+        'motor_current': 6.0 + 2.0 * pressure + 0.04 * speed,
+        'gearbox_vibration': 0.3 + 0.005 * speed + 0.5 * np.abs(records['winder_tension'] - 5.0) * (speed > 0),
+        'heater_temp': records['extruder_temp'] + 5.0,
+    }
+    return np.column_stack([channels[c] for c in COMPONENT_CHANNELS.values()])
@@ -0,0 +1,131 @@
+# engine/line_engine.py
+# 多产线向量化仿真引擎：N 条产线 × M 台设备的状态全部存放在 NumPy 数组中，一次 step 推进全部设备。
+import numpy as np
+
+# 每条产线上的设备顺序 (数组第二维)
+DEVICE_KEYS = ('extruder', 'cooling_tank', 'tractor', 'winder')
+DEVICE_NAMES = ('挤出机', '冷却水槽', '牵引机', '收卷机')
+EXTRUDER, COOLING_TANK, TRACTOR, WINDER = range(len(DEVICE_KEYS))
+
+# 状态编码
+STATUS_STOPPED, STATUS_RUNNING, STATUS_IDLE, STATUS_FAULT = 0, 1, 2, 3
+STATUS_NAMES = ('stopped', 'running', 'idle', 'fault')
+
+# 仿真模式及其 (速度因子, 功率因子)
+MODES = ('normal', 'high_speed', 'energy_saving')
+MODE_FACTORS = np.array([
+    [1.0, 1.0],
+    [1.2, 1.3],
+    [0.8, 0.75],
+])
+
+# 状态机参数：30 秒一个周期，前 20 秒运行；运行中每秒 5% 概率进入 5 秒故障
+CYCLE_LENGTH = 30
+RUN_LENGTH = 20
+FAULT_PROBABILITY = 0.05
+FAULT_DURATION = 5
+
+
+class LineArrayEngine:
+    """N 条产线的向量化状态机，与 LineSimulatorThread 的单线逻辑一致"""
+    def __init__(self, n_lines=1, seed=None, stagger=False):
+        """
+        :param n_lines: 产线数量
+        :param seed: 随机种子，相同种子产生相同的仿真序列
+        :param stagger: 是否错开各条产线的启停周期
+        """
+        self.n_lines = n_lines
+        self.n_devices = len(DEVICE_KEYS)
+        self.rng = np.random.default_rng(seed)
+        self.stagger = stagger
+        self.reset()
+
+    def reset(self):
+        shape = (self.n_lines, self.n_devices)
+        self.status = np.full(shape, STATUS_IDLE, dtype=np.uint8)
+        self.temp = np.zeros(shape)
+        self.pressure = np.zeros(shape)
+        self.speed = np.zeros(shape)
+        self.tension = np.zeros(shape)
+        self.level = np.zeros(shape)
+        self.temp[:, EXTRUDER] = 85.0
+        self.temp[:, COOLING_TANK] = 25.0
+        self.level[:, COOLING_TANK] = 80.0
+
+        self.line_status = np.full(self.n_lines, STATUS_STOPPED, dtype=np.uint8)
+        self.mode = np.zeros(self.n_lines, dtype=np.uint8)
+        self.run_timer = np.zeros(self.n_lines, dtype=np.int64)
+        self.fault_timer = np.zeros(self.n_lines, dtype=np.int64)
+        if self.stagger:
+            self.phase = self.rng.integers(0, CYCLE_LENGTH, self.n_lines)
+        else:
+            self.phase = np.zeros(self.n_lines, dtype=np.int64)
+
+    def set_mode(self, mode, lines=None):
+        """切换指定产线 (默认全部) 的仿真模式"""
+        if mode not in MODES:
+            raise ValueError(f"未知的仿真模式: {mode}")
+        if lines is None:
+            self.mode[:] = MODES.index(mode)
+        else:
+            self.mode[lines] = MODES.index(mode)
+
+    @property
+    def speed_factor(self):
+        return MODE_FACTORS[self.mode, 0]
+
+    @property
+    def power_factor(self):
+        return MODE_FACTORS[self.mode, 1]
+
+    @property
+    def total_output(self):
+        """各产线总产量 (米)，与单线模拟器的计算方式一致"""
+        return self.run_timer * 1.5 * self.speed_factor
+
+    def step(self):
+        """推进一秒：所有产线、所有设备一次性更新"""
+        n = self.n_lines
+        self.run_timer += 1
+        speed_factor = self.speed_factor
+        power_factor = self.power_factor
+
+        faulted = self.fault_timer > 0
+        running = ~faulted & ((self.run_timer + self.phase) % CYCLE_LENGTH < RUN_LENGTH)
+        idle = ~faulted & ~running
+
+        # 故障：挤出机报故障，牵引机停转，其余设备保持原状态
+        self.line_status[faulted] = STATUS_FAULT
+        self.fault_timer[faulted] -= 1
+        self.status[faulted, EXTRUDER] = STATUS_FAULT
+        self.speed[faulted, TRACTOR] = 0.0
+
+        # 运行：一次生成所有产线的随机扰动，再按掩码写回
+        noise = self.rng.uniform(-1.0, 1.0, size=(5, n))
+        self.line_status[running] = STATUS_RUNNING
+        self.status[running] = STATUS_RUNNING
+        self.temp[running, EXTRUDER] += (noise[0] * 0.5 * power_factor)[running]
+        self.pressure[running, EXTRUDER] = ((1.8 + noise[1] * 0.1) * power_factor)[running]
+        self.temp[running, COOLING_TANK] += (noise[2] * 0.2)[running]
+        self.speed[running, TRACTOR] = ((50.0 + noise[3]) * speed_factor)[running]
+        self.tension[running, WINDER] = (5.0 + noise[4] * 0.2)[running]
+
+        # 待机
+        self.line_status[idle] = STATUS_IDLE
+        self.status[idle] = STATUS_IDLE
+        self.pressure[idle, EXTRUDER] = 0.0
+        self.speed[idle, TRACTOR] = 0.0
+
+        # 运行中的产线随机进入故障
+        trip = running & (self.rng.random(n) < FAULT_PROBABILITY)
+        self.fault_timer[trip] = FAULT_DURATION
+
+    def run(self, n_ticks, clock):
+        """
+        连续推进 n_ticks 步的生成器，每步产出仿真时间戳。
+        配合 SimClock(speed=None) 可在数秒内生成一个班次的数据。
+        """
+        for _ in range(n_ticks):
+            self.step()
+            yield clock.advance()
+            clock.wait()
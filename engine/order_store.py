@@ -0,0 +1,110 @@
+# engine/order_store.py
+# 带索引的工单存储：id 哈希索引、按状态索引，以及按 (交期, 优先级) 排序的待处理优先队列。
+# 派工时从产线自己的队列和公共队列 (未指定产线的工单) 中取最早到期的工单，复杂度 O(log n)。
+import heapq
+import itertools
+
+PENDING = "待处理"
+ACTIVE = "生产中"
+ANY_LINE = None # device_id 为空的工单可以派给任意产线
+
+
+class OrderStore:
+    """工单存储；工单本身仍是字典，行顺序即添加顺序"""
+    def __init__(self, orders=()):
+        self.orders = []        # 行顺序
+        self._by_id = {}
+        self._row_of = {}
+        self._by_status = {}    # 状态 -> {id: None}，用 dict 保持插入顺序
+        self._queues = {}       # device_id -> [(交期, -优先级, 序号, id)]
+        self._queue_seq = {}    # id -> 最新入队序号，旧条目出队时被跳过 (惰性删除)
+        self._counter = itertools.count()
+        self.version = 0        # 工单增加或状态变化时递增，供依赖队列顺序的缓存判断是否失效
+        for order in orders:
+            self.add(order)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._by_id
+
+    def get(self, order_id):
+        return self._by_id.get(order_id)
+
+    def row_of(self, order_id):
+        return self._row_of.get(order_id)
+
+    def ids_with_status(self, status):
+        """某状态的全部工单 id (按加入该状态的先后顺序)"""
+        return list(self._by_status.get(status, ()))
+
+    def count(self, status):
+        return len(self._by_status.get(status, ()))
+
+    def add(self, order):
+        if order['id'] in self._by_id:
+            raise ValueError(f"工单已存在: {order['id']}")
+        order.setdefault('due', 0.0)
+        order.setdefault('priority', 0)
+        self._row_of[order['id']] = len(self.orders)
+        self.orders.append(order)
+        self._by_id[order['id']] = order
+        self._index_status(order)
+        self.version += 1
+        return order
+
+    def set_status(self, order_id, status):
+        order = self._by_id[order_id]
+        if order['status'] == status:
+            return order
+        self._by_status[order['status']].pop(order_id, None)
+        order['status'] = status
+        self._index_status(order)
+        self.version += 1
+        return order
+
+    def dispatch(self, line_id):
+        """
+        为产线挑选下一个待处理工单并置为生产中。
+        :return: 派出的工单，没有可派工单时返回 None
+        """
+        own = self._peek(line_id)
+        shared = self._peek(ANY_LINE) if line_id is not ANY_LINE else None
+        if own is None and shared is None:
+            return None
+        queue_key = line_id if shared is None or (own is not None and own <= shared) else ANY_LINE
+        order = self._by_id[heapq.heappop(self._queues[queue_key])[3]]
+        self._queue_seq.pop(order['id'], None)
+        if order['device_id'] is ANY_LINE:
+            order['device_id'] = line_id
+        return self.set_status(order['id'], ACTIVE)
+
+    def peek_pending(self, line_id):
+        """不出队地查看产线的下一个待处理工单"""
+        own = self._peek(line_id)
+        shared = self._peek(ANY_LINE) if line_id is not ANY_LINE else None
+        best = min((e for e in (own, shared) if e is not None), default=None)
+        return self._by_id[best[3]] if best else None
+
+    def _index_status(self, order):
+        self._by_status.setdefault(order['status'], {})[order['id']] = None
+        if order['status'] == PENDING:
+            seq = next(self._counter)
+            self._queue_seq[order['id']] = seq
+            entry = (order['due'], -order['priority'], seq, order['id'])
+            heapq.heappush(self._queues.setdefault(order['device_id'], []), entry)
+
+    def _peek(self, line_id):
+        """返回队首的有效条目；状态已变化或已重新入队的旧条目在这里被丢弃"""
+        queue = self._queues.get(line_id)
+        while queue:
+            entry = queue[0]
+            order = self._by_id[entry[3]]
+            if order['status'] == PENDING and self._queue_seq.get(order['id']) == entry[2]:
+                return entry
+            heapq.heappop(queue)
+        return None
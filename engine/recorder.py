@@ -0,0 +1,208 @@
+# engine/recorder.py
+# 追加式列存遥测记录器：每个字段一个定长段文件，读取端用 numpy.memmap 零拷贝按范围读取。
+#
+# 目录结构:
+#   <root>/index.json            段索引 (每段记录数与时间范围)
+#   <root>/seg_000000/<字段>.bin  该段某一字段的原始数组，长度固定为 segment_len
+import json
+import os
+
+import numpy as np
+
+from .telemetry import TELEMETRY_DTYPE
+
+INDEX_FILE = 'index.json'
+
+
+def _segment_name(number):
+    return f"seg_{number:06d}"
+
+
+def _field_path(root, segment_name, field):
+    return os.path.join(root, segment_name, f"{field}.bin")
+
+
+def _field_spec(dtype, field):
+    """返回 (标量类型, 每条记录的子形状)"""
+    base, _ = dtype.fields[field]
+    return (base.base, base.shape)
+
+
+class TelemetryRecorder:
+    """把遥测批次按字段追加写入定长段文件"""
+    def __init__(self, root, segment_len=65536, dtype=TELEMETRY_DTYPE):
+        """
+        :param root: 存储目录，已存在时在最后一段之后继续追加 (新记录的时间戳不能早于已有记录)
+        :param segment_len: 每段容纳的记录数 (1 Hz 下 65536 条约为 18 小时)
+        """
+        self.root = root
+        self.dtype = dtype
+        os.makedirs(root, exist_ok=True)
+        index = _load_index(root)
+        if index:
+            self.segment_len = index['segment_len']
+            self.segments = index['segments']
+        else:
+            self.segment_len = segment_len
+            self.segments = []
+        self._columns = None
+        if self.segments and self.segments[-1]['count'] < self.segment_len:
+            self._open_segment(self.segments[-1], mode='r+')
+
+    def append(self, batch):
+        """
+        追加一批记录，跨段时自动切换到新段。
+        读取端按时间戳二分查找，早于已记录末尾的批次 (例如虚拟时钟会话之后接着录制实时会话) 会抛出 ValueError，不写入任何数据。
+        """
+        if len(batch) and self.segments and self.segments[-1]['t1'] is not None \
+                and batch['ts'][0] < self.segments[-1]['t1']:
+            raise ValueError(f"遥测时间戳早于已记录的末尾 ({batch['ts'][0]:.3f} < {self.segments[-1]['t1']:.3f})，"
+                             f"请改用新的记录目录: {self.root}")
+        offset = 0
+        while offset < len(batch):
+            if self._columns is None:
+                self._new_segment()
+            segment = self.segments[-1]
+            n = min(len(batch) - offset, self.segment_len - segment['count'])
+            chunk = batch[offset:offset + n]
+            start = segment['count']
+            for field, column in self._columns.items():
+                column[start:start + n] = chunk[field]
+            segment['count'] += n
+            if segment['t0'] is None:
+                segment['t0'] = float(chunk['ts'][0])
+            segment['t1'] = float(chunk['ts'][-1])
+            offset += n
+            if segment['count'] == self.segment_len:
+                self._close_segment()
+
+    def flush(self):
+        """把已写入的数据和段索引落盘"""
+        if self._columns:
+            for column in self._columns.values():
+                column.flush()
+        _save_index(self.root, {
+            'segment_len': self.segment_len,
+            'fields': {name: [_field_spec(self.dtype, name)[0].str, list(_field_spec(self.dtype, name)[1])]
+                       for name in self.dtype.names},
+            'segments': self.segments,
+        })
+
+    def close(self):
+        self.flush()
+        self._columns = None
+
+    def _new_segment(self):
+        segment = {'name': _segment_name(len(self.segments)), 'count': 0, 't0': None, 't1': None}
+        self.segments.append(segment)
+        os.makedirs(os.path.join(self.root, segment['name']), exist_ok=True)
+        self._open_segment(segment, mode='w+')
+
+    def _open_segment(self, segment, mode):
+        self._columns = {}
+        for field in self.dtype.names:
+            base, shape = _field_spec(self.dtype, field)
+            self._columns[field] = np.memmap(_field_path(self.root, segment['name'], field), dtype=base,
+                                             mode=mode, shape=(self.segment_len,) + shape)
+
+    def _close_segment(self):
+        self.flush()
+        self._columns = None
+
+
+class TelemetryReader:
+    """以 memmap 方式只读打开记录目录，按时间或序号范围读取字段"""
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+        self.refresh()
+
+    def refresh(self):
+        """重新读取段索引 (记录器仍在写入时调用以看到新数据)"""
+        index = _load_index(self.root) or {'segment_len': 0, 'fields': {}, 'segments': []}
+        self.segment_len = index['segment_len']
+        self.fields = {name: (np.dtype(spec[0]), tuple(spec[1])) for name, spec in index['fields'].items()}
+        self.segments = [s for s in index['segments'] if s['count'] > 0]
+        self._offsets = np.cumsum([0] + [s['count'] for s in self.segments])
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def time_range(self):
+        if not self.segments:
+            return None
+        return self.segments[0]['t0'], self.segments[-1]['t1']
+
+    def column(self, segment, field):
+        """某一段某一字段的只读 memmap 视图 (只包含已写入部分)"""
+        key = (segment['name'], field)
+        if key not in self._maps:
+            base, shape = self.fields[field]
+            self._maps[key] = np.memmap(_field_path(self.root, segment['name'], field), dtype=base,
+                                        mode='r', shape=(self.segment_len,) + shape)
+        return self._maps[key][:segment['count']]
+
+    def index_range(self, t0=None, t1=None):
+        """返回时间范围 [t0, t1] 对应的全局记录序号范围 [start, stop)"""
+        start, stop = 0, len(self)
+        if t0 is not None:
+            start = self._search(t0, 'left')
+        if t1 is not None:
+            stop = self._search(t1, 'right')
+        return start, max(start, stop)
+
+    def read_slices(self, field, start, stop):
+        """按全局序号范围读取，返回各段内的 memmap 视图列表 (零拷贝)"""
+        views = []
+        first = max(int(np.searchsorted(self._offsets, start, 'right')) - 1, 0)
+        for i in range(first, len(self.segments)):
+            seg_start = self._offsets[i]
+            if seg_start >= stop:
+                break
+            lo, hi = max(start - seg_start, 0), min(stop - seg_start, self.segments[i]['count'])
+            if hi > lo:
+                views.append(self.column(self.segments[i], field)[lo:hi])
+        return views
+
+    def read(self, field, t0=None, t1=None):
+        """按时间范围读取一个字段；范围只落在一个段内时直接返回 memmap 视图"""
+        views = self.read_slices(field, *self.index_range(t0, t1))
+        if not views:
+            base, shape = self.fields.get(field, (np.dtype('f8'), ()))
+            return np.empty((0,) + shape, dtype=base)
+        return views[0] if len(views) == 1 else np.concatenate(views)
+
+    def read_records(self, start, stop):
+        """按全局序号范围组装成结构化批次 (复制)，供回放使用"""
+        batch = np.zeros(max(stop - start, 0), dtype=TELEMETRY_DTYPE)
+        for field in batch.dtype.names:
+            if field in self.fields:
+                views = self.read_slices(field, start, stop)
+                if views:
+                    batch[field] = views[0] if len(views) == 1 else np.concatenate(views)
+        return batch
+
+    def _search(self, t, side):
+        """时间戳在各段内单调递增，先按段的时间范围定位再在段内二分"""
+        for i, segment in enumerate(self.segments):
+            if (side == 'left' and t <= segment['t1']) or (side == 'right' and t < segment['t1']):
+                ts = self.column(segment, 'ts')
+                return int(self._offsets[i] + np.searchsorted(ts, t, side))
+        return len(self)
+
+
+def _load_index(root):
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f: return json.load(f)
+    except (json.JSONDecodeError, OSError): return None
+
+
+def _save_index(root, index):
+    # 先写临时文件再替换，避免写到一半时读取端看到损坏的索引
+    path = os.path.join(root, INDEX_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f: json.dump(index, f, indent=2)
+    os.replace(tmp_path, path)
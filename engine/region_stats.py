@@ -0,0 +1,26 @@
+# engine/region_stats.py
+# 深潜分析的区域统计：对时间轴上的一个区间计算各参数的最大/最小/均值/标准差。
+import numpy as np
+
+
+def region_index(time_data, x_min, x_max):
+    """返回区间 [x_min, x_max] 在有序时间轴上的下标范围"""
+    idx1, idx2 = np.searchsorted(time_data, [x_min, x_max])
+    return int(idx1), int(idx2)
+
+
+def region_stats(time_data, series, x_min, x_max):
+    """
+    :param series: 与时间轴等长的参数数组列表
+    :return: 每个参数的 (最大值, 最小值, 平均值, 标准差)，区间为空时为 None
+    """
+    idx1, idx2 = region_index(time_data, x_min, x_max)
+    results = []
+    for data in series:
+        data_slice = data[idx1:idx2]
+        if len(data_slice) > 0:
+            results.append((float(np.max(data_slice)), float(np.min(data_slice)),
+                            float(np.mean(data_slice)), float(np.std(data_slice))))
+        else:
+            results.append(None)
+    return results
@@ -0,0 +1,98 @@
+# engine/ring_buffer.py
+# 预分配的 NumPy 环形缓冲区：每个值写两份 (i 和 i+capacity)，因此最近 n 个值始终是一段连续内存，
+# view() 直接返回切片视图，无需拷贝或拼接。
+import numpy as np
+
+
+class RingBuffer:
+    """定长环形缓冲区，支持批量追加和零拷贝的连续视图"""
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=dtype)
+        self._write = 0   # 下一个写入位置 [0, capacity)
+        self._count = 0   # 当前有效数据量
+        self.total = 0    # 累计追加的数据量
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._data[self._write] = value
+        self._data[self._write + self.capacity] = value
+        self._write = (self._write + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.total += 1
+
+    def extend(self, values):
+        """批量追加；超过容量时只保留最后 capacity 个值"""
+        values = np.asarray(values)
+        n = len(values)
+        if n == 0:
+            return
+        self.total += n
+        if n >= self.capacity:
+            values = values[-self.capacity:]
+            self._data[:self.capacity] = values
+            self._data[self.capacity:] = values
+            self._write = 0
+            self._count = self.capacity
+            return
+        # 最多分成两段写入，每段同时写主副两份
+        first = min(n, self.capacity - self._write)
+        for start, chunk in ((self._write, values[:first]), (0, values[first:])):
+            if len(chunk):
+                self._data[start:start + len(chunk)] = chunk
+                self._data[start + self.capacity:start + self.capacity + len(chunk)] = chunk
+        self._write = (self._write + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def view(self, last=None):
+        """最近 last 个值 (默认全部) 的连续只读视图，按时间先后排列"""
+        n = self._count if last is None else min(last, self._count)
+        end = self._write + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self):
+        return self._data[self._write + self.capacity - 1] if self._count else None
+
+    def clear(self):
+        self._write = 0
+        self._count = 0
+
+    def resize(self, capacity):
+        """修改容量，保留最近的数据"""
+        kept = self.view(capacity).copy()
+        total = self.total
+        self.__init__(capacity, self._data.dtype)
+        self.extend(kept)
+        self.total = total
+
+
+class FrameRing:
+    """定长图像帧环形缓冲区：预分配 (capacity, *shape) 数组，按递增的帧号存取最近 capacity 帧"""
+    def __init__(self, capacity, shape, dtype=np.uint8):
+        self.capacity = int(capacity)
+        self.frames = np.zeros((self.capacity,) + tuple(shape), dtype=dtype)
+        self.next_no = 0 # 下一帧的帧号
+
+    def __len__(self):
+        return min(self.next_no, self.capacity)
+
+    def put(self, frame):
+        """写入一帧 (整块内存拷贝到预分配的槽位)，返回其帧号"""
+        frame_no = self.next_no
+        self.frames[frame_no % self.capacity] = frame
+        self.next_no += 1
+        return frame_no
+
+    def get(self, frame_no):
+        """返回帧号对应槽位的视图；帧已被覆盖或尚未写入时返回 None"""
+        if frame_no is None or not (self.next_no - self.capacity <= frame_no < self.next_no):
+            return None
+        return self.frames[frame_no % self.capacity]
+
+    @property
+    def latest_no(self):
+        return self.next_no - 1 if self.next_no else None
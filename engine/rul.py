@@ -0,0 +1,103 @@
+# engine/rul.py
+# 剩余寿命 (RUL) 预测：为每个部件保存按天分桶的健康度历史，用闭式最小二乘拟合线性劣化趋势，
+# 外推到故障阈值的时间即为剩余寿命。全部部件一次向量化拟合，结果缓存；
+# 只有收到新数据的部件 (脏标记) 才重新拟合，查询和全机群排名只读缓存。
+import numpy as np
+
+FAULT_THRESHOLD = 20  # 健康度低于此值视为故障
+MIN_FIT_POINTS = 3    # 少于这么多个历史点不做预测
+SECONDS_PER_DAY = 86400.0
+
+
+class RulService:
+    """多个部件的健康度历史 + 劣化趋势拟合缓存"""
+    def __init__(self, n_components, capacity=256, threshold=FAULT_THRESHOLD):
+        """
+        :param capacity: 每个部件保留的历史天数 (每天一个点)，超出后覆盖最早的点
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self._ts = np.zeros((n_components, capacity))
+        self._scores = np.zeros((n_components, capacity))
+        self.count = np.zeros(n_components, dtype=np.int64)
+        self._bucket_n = np.zeros(n_components, dtype=np.int64) # 最新一个点 (当天) 已合并的记录数
+        self._origin = None # 时间原点，拟合时以天为单位减去它，避免大数相减的精度损失
+        # 拟合缓存：score = slope * 天数 + intercept
+        self.slope = np.zeros(n_components)
+        self.intercept = np.full(n_components, 100.0)
+        self.dirty = np.zeros(n_components, dtype=bool)
+
+    def record(self, ts, scores, columns=slice(None)):
+        """
+        记录一组部件在 ts 时刻的健康度，只把这些部件标记为待拟合。
+        与部件最新一个点同一天的记录并入该点 (取平均)，高频记录不会挤掉较早的历史，拟合的时间尺度始终是天。
+        """
+        if self._origin is None:
+            self._origin = ts
+        cols = np.arange(len(self.count))[columns]
+        scores = np.broadcast_to(np.asarray(scores, dtype=np.float64), cols.shape)
+        day = (ts - self._origin) / SECONDS_PER_DAY
+        last = (self.count[cols] - 1) % self.capacity
+        same_day = (self.count[cols] > 0) & (np.floor(self._ts[cols, last]) == np.floor(day))
+
+        merge, merge_slots = cols[same_day], last[same_day]
+        self._bucket_n[merge] += 1
+        self._scores[merge, merge_slots] += (scores[same_day] - self._scores[merge, merge_slots]) / self._bucket_n[merge]
+
+        new = cols[~same_day]
+        slots = self.count[new] % self.capacity
+        self._ts[new, slots] = day
+        self._scores[new, slots] = scores[~same_day]
+        self._bucket_n[new] = 1
+        self.count[new] += 1
+        self.dirty[cols] = True
+
+    def refit(self):
+        """对所有脏部件做一次向量化最小二乘拟合，返回重新拟合的部件数"""
+        cols = np.flatnonzero(self.dirty)
+        if not len(cols):
+            return 0
+        x, y = self._ts[cols], self._scores[cols]
+        n = np.minimum(self.count[cols], self.capacity)
+        valid = np.arange(self.capacity)[None, :] < n[:, None]
+        x_mean = (x * valid).sum(axis=1) / n
+        y_mean = (y * valid).sum(axis=1) / n
+        dx = (x - x_mean[:, None]) * valid
+        sxx = (dx * dx).sum(axis=1)
+        sxy = (dx * (y - y_mean[:, None])).sum(axis=1)
+        slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+        self.slope[cols] = slope
+        self.intercept[cols] = y_mean - slope * x_mean
+        self.dirty[cols] = False
+        return len(cols)
+
+    def rul(self, now, columns=slice(None)):
+        """
+        剩余寿命 (天)。没有下降趋势或历史点不足时为 inf，已经低于阈值时为 0。
+        """
+        self.refit()
+        if self._origin is None:
+            return np.full(len(self.count[columns]), np.inf)
+        slope, intercept = self.slope[columns], self.intercept[columns]
+        days = (now - self._origin) / SECONDS_PER_DAY
+        predictable = (slope < 0) & (self.count[columns] >= MIN_FIT_POINTS)
+        fault_day = np.divide(self.threshold - intercept, slope, out=np.full(len(slope), np.inf), where=predictable)
+        return np.clip(fault_day - days, 0, None)
+
+    def ranking(self, now, k=10):
+        """距故障最近的 k 个部件下标 (只含有下降趋势的部件)，按剩余寿命升序"""
+        rul = self.rul(now)
+        candidates = np.flatnonzero(np.isfinite(rul))
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(rul[candidates], k)[:k]]
+        return candidates[np.argsort(rul[candidates], kind='stable')]
+
+    def history(self, i):
+        """一个部件的健康度历史 (相对时间原点的天数, 健康度)，按时间升序"""
+        n = min(int(self.count[i]), self.capacity)
+        order = np.argsort(self._ts[i, :n], kind='stable')
+        return self._ts[i, :n][order], self._scores[i, :n][order]
+
+    def day_of(self, ts):
+        """把时间戳换算成拟合用的天数坐标"""
+        return (ts - self._origin) / SECONDS_PER_DAY
@@ -1,4 +1,4 @@
-# pages/widgets/simulation_kernel.py
+# engine/simulation_kernel.py
 import numpy as np
 import random
 
@@ -36,8 +36,9 @@ class SimulationKernel:
 
 class GeneticOptimizer:
     """使用遗传算法寻找最优参数"""
-    def __init__(self, kernel, param_ranges, population_size=20, generations=30, mutation_rate=0.1):
+    def __init__(self, kernel, param_ranges, population_size=20, generations=30, mutation_rate=0.1, seed=None):
         self.kernel = kernel
+        self.rng = random.Random(seed) # 独立的随机源，批处理时可通过种子复现结果
         self.param_ranges = param_ranges # e.g., {'temp': (80, 100), 'speed': (40, 60)}
         self.population_size = population_size
         self.generations = generations
@@ -47,8 +48,8 @@ class GeneticOptimizer:
     def _create_individual(self):
         """创建一个随机的个体（一组参数）"""
         return {
-            'temp': random.uniform(*self.param_ranges['temp']),
-            'speed': random.uniform(*self.param_ranges['speed'])
+            'temp': self.rng.uniform(*self.param_ranges['temp']),
+            'speed': self.rng.uniform(*self.param_ranges['speed'])
         }
 
     def _calculate_fitness(self, results):
@@ -79,18 +80,18 @@ class GeneticOptimizer:
             # 4. 交叉和变异，产生新一代
             next_population = selected_population[:] # 复制精英个体
             while len(next_population) < self.population_size:
-                parent1, parent2 = random.choices(selected_population, k=2)
+                parent1, parent2 = self.rng.choices(selected_population, k=2)
                 
                 # 交叉
                 child = {
-                    'temp': random.choice([parent1['temp'], parent2['temp']]),
-                    'speed': random.choice([parent1['speed'], parent2['speed']])
+                    'temp': self.rng.choice([parent1['temp'], parent2['temp']]),
+                    'speed': self.rng.choice([parent1['speed'], parent2['speed']])
                 }
                 
                 # 变异
-                if random.random() < self.mutation_rate:
-                    child['temp'] += random.uniform(-2, 2)
-                    child['speed'] += random.uniform(-1, 1)
+                if self.rng.random() < self.mutation_rate:
+                    child['temp'] += self.rng.uniform(-2, 2)
+                    child['speed'] += self.rng.uniform(-1, 1)
                 
                 # 确保参数在范围内
                 child['temp'] = np.clip(child['temp'], *self.param_ranges['temp'])
@@ -0,0 +1,112 @@
+# engine/spectrum.py
+# 振动频谱分析：对连续到达的高采样率振动信号做滚动 Welch 估计 (分段加窗 FFT 后平均)，
+# 并按频带 (轴频、轴承故障频率、齿轮啮合频率等) 积分得到频带能量。
+# 窗函数、频率轴和频带积分矩阵在构造时一次算好；样本缓冲区预先分配并复用，
+# 每次 push 把新凑满的所有分段堆成一个二维数组做一次 rfft。
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SAMPLE_RATE = 5120   # 振动传感器采样率 (Hz)
+SHAFT_HZ = 25.0      # 输入轴转频 (1500 rpm)
+GEAR_TEETH = 23      # 齿数，啮合频率 = 转频 × 齿数
+BEARING_HZ = 162.5   # 轴承外圈故障特征频率 (BPFO ≈ 6.5 × 转频)
+
+# (名称, 下限 Hz, 上限 Hz)
+DEFAULT_BANDS = (
+    ("轴频", SHAFT_HZ - 5, SHAFT_HZ + 5),
+    ("轴承", BEARING_HZ - 10, BEARING_HZ + 10),
+    ("啮合", SHAFT_HZ * GEAR_TEETH - 30, SHAFT_HZ * GEAR_TEETH + 30),
+)
+
+
+class VibrationGenerator:
+    """减速箱振动信号 (mm/s)：转频 + 啮合频率及其边带 + 随时间增长的轴承故障分量 + 宽带噪声"""
+    def __init__(self, fs=SAMPLE_RATE, seed=None, bearing_severity=0.05, bearing_growth=0.001, noise=0.3):
+        """
+        :param bearing_severity: 轴承故障分量的初始幅值
+        :param bearing_growth: 轴承故障分量每秒增长的幅值，模拟劣化过程
+        """
+        self.fs = fs
+        self.rng = np.random.default_rng(seed)
+        self.bearing_severity = bearing_severity
+        self.bearing_growth = bearing_growth
+        self.noise = noise
+        self._n = 0 # 已生成的样本数，保证相邻块相位连续
+
+    def generate(self, n):
+        t = (self._n + np.arange(n)) / self.fs
+        self._n += n
+        mesh = SHAFT_HZ * GEAR_TEETH
+        bearing = self.bearing_severity + self.bearing_growth * t
+        signal = (0.4 * np.sin(2 * np.pi * SHAFT_HZ * t)
+                  + 0.6 * np.sin(2 * np.pi * mesh * t) * (1 + 0.3 * np.sin(2 * np.pi * SHAFT_HZ * t))
+                  + bearing * np.sin(2 * np.pi * BEARING_HZ * t))
+        return signal + self.rng.standard_normal(n) * self.noise
+
+
+class RollingSpectrum:
+    """滚动 Welch 功率谱密度与频带能量"""
+    def __init__(self, fs=SAMPLE_RATE, nperseg=1024, overlap=0.5, n_avg=8, bands=DEFAULT_BANDS):
+        """
+        :param nperseg: 每段 FFT 的点数
+        :param overlap: 相邻分段的重叠比例
+        :param n_avg: 参与平均的最近分段数
+        """
+        self.fs = fs
+        self.nperseg = nperseg
+        self.hop = nperseg - int(nperseg * overlap)
+        self.window = np.hanning(nperseg)
+        # 单边功率谱密度的归一化系数 (与 scipy.signal.welch 的 density 定标一致)
+        self._scale = 1.0 / (fs * (self.window ** 2).sum())
+        self.freqs = np.fft.rfftfreq(nperseg, 1.0 / fs)
+        self.bands = bands
+        df = self.freqs[1]
+        self._band_matrix = np.array([(self.freqs >= lo) & (self.freqs < hi) for _, lo, hi in bands], dtype=np.float64) * df
+        self._buf = np.zeros(4 * nperseg)
+        self._filled = 0
+        self._recent = np.zeros((n_avg, len(self.freqs))) # 最近 n_avg 段的 PSD (环形)
+        self._segments = 0
+        self.psd = np.zeros(len(self.freqs))
+
+    def push(self, samples):
+        """
+        加入一块新样本，返回这块样本凑满的新分段的 PSD，形状 (分段数, 频点数)，可直接作为频谱图的新行。
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        end = self._filled + len(samples)
+        if end > len(self._buf): # 只在单块样本比缓冲区还大时扩容
+            grown = np.zeros(max(2 * len(self._buf), end))
+            grown[:self._filled] = self._buf[:self._filled]
+            self._buf = grown
+        self._buf[self._filled:end] = samples
+        self._filled = end
+        if end < self.nperseg:
+            return np.zeros((0, len(self.freqs)))
+
+        n_seg = (end - self.nperseg) // self.hop + 1
+        segments = sliding_window_view(self._buf[:end], self.nperseg)[::self.hop][:n_seg]
+        spectrum = np.fft.rfft(segments * self.window, axis=1)
+        psd = (spectrum.real ** 2 + spectrum.imag ** 2) * self._scale
+        psd[:, 1:-1] *= 2 # 单边谱：除直流和奈奎斯特频点外能量折叠到正频率
+
+        # 未被分段用完的尾部样本移到缓冲区开头，供下一块继续拼接
+        consumed = n_seg * self.hop
+        rest = end - consumed
+        self._buf[:rest] = self._buf[consumed:end]
+        self._filled = rest
+
+        n_avg = len(self._recent)
+        tail = psd[-n_avg:]
+        self._recent[(self._segments + np.arange(len(tail))) % n_avg] = tail
+        self._segments += n_seg
+        self.psd = self._recent[:min(self._segments, n_avg)].mean(axis=0)
+        return psd
+
+    def band_energies(self, psd=None):
+        """各频带能量 (功率谱密度在频带内积分)；psd 为二维时逐行计算"""
+        return (self.psd if psd is None else psd) @ self._band_matrix.T
+
+    @property
+    def rms(self):
+        """当前平均谱对应的信号均方根值"""
+        return float(np.sqrt(self.psd.sum() * self.freqs[1]))
@@ -0,0 +1,80 @@
+# engine/telemetry.py
+# 定长遥测记录：每个仿真步、每条产线一条 NumPy 结构化记录，多条记录组成批次数组。
+# 记录不含对象引用，可以安全地跨线程传递，也可直接落盘和回放。
+import time
+
+import numpy as np
+
+from .line_engine import (DEVICE_KEYS, STATUS_NAMES, EXTRUDER, COOLING_TANK, TRACTOR, WINDER)
+
+TELEMETRY_DTYPE = np.dtype([
+    ('ts', 'f8'),                           # 仿真时间戳 (epoch 秒)
+    ('line', 'u2'),                         # 产线编号
+    ('line_status', 'u1'),                  # 产线状态编码，见 STATUS_NAMES
+    ('mode', 'u1'),                         # 仿真模式编码，见 MODES
+    ('status', 'u1', (len(DEVICE_KEYS),)),  # 各设备状态编码，顺序同 DEVICE_KEYS
+    ('extruder_temp', 'f4'),
+    ('extruder_pressure', 'f4'),
+    ('tank_temp', 'f4'),
+    ('tank_level', 'f4'),
+    ('tractor_speed', 'f4'),
+    ('winder_tension', 'f4'),
+    ('total_output', 'f8'),
+])
+
+
+def new_batch(n):
+    """分配一个可容纳 n 条记录的批次数组"""
+    return np.zeros(n, dtype=TELEMETRY_DTYPE)
+
+
+def records_from_engine(engine, ts):
+    """把引擎当前状态打包成一批新记录 (每条产线一条)，返回的数组与引擎不共享内存"""
+    return write_records(engine, ts, new_batch(engine.n_lines))
+
+
+def write_records(engine, ts, batch):
+    """把引擎当前状态写入调用方预分配的 batch (长度须等于产线数)，避免每步分配"""
+    batch['ts'] = ts
+    batch['line'] = np.arange(engine.n_lines)
+    batch['line_status'] = engine.line_status
+    batch['mode'] = engine.mode
+    batch['status'] = engine.status
+    batch['extruder_temp'] = engine.temp[:, EXTRUDER]
+    batch['extruder_pressure'] = engine.pressure[:, EXTRUDER]
+    batch['tank_temp'] = engine.temp[:, COOLING_TANK]
+    batch['tank_level'] = engine.level[:, COOLING_TANK]
+    batch['tractor_speed'] = engine.speed[:, TRACTOR]
+    batch['winder_tension'] = engine.tension[:, WINDER]
+    batch['total_output'] = engine.total_output
+    return batch
+
+
+def concat_batches(batches):
+    """合并多个批次；只有一个批次时直接返回，不复制"""
+    if len(batches) == 1:
+        return batches[0]
+    return np.concatenate(batches)
+
+
+def status_segments(batch):
+    """按产线状态把批次切分为连续片段，返回 [(状态名, 片段视图), ...]"""
+    codes = batch['line_status']
+    bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(codes)]))
+    return [(STATUS_NAMES[codes[s]], batch[s:e]) for s, e in zip(starts, ends)]
+
+
+def status_name(code):
+    return STATUS_NAMES[int(code)]
+
+
+def device_status(record, device_key):
+    """返回记录中某台设备的状态名"""
+    return STATUS_NAMES[int(record['status'][DEVICE_KEYS.index(device_key)])]
+
+
+def format_time(ts):
+    """把仿真时间戳格式化为页面显示用的 HH:MM:SS"""
+    return time.strftime("%H:%M:%S", time.localtime(float(ts)))
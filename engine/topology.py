@@ -0,0 +1,110 @@
+# engine/topology.py
+# 设备拓扑：产线 → 设备 → 部件 三级结构，从 JSON 配置读取，展开成扁平数组 (部件按设备连续排列)，
+# 健康度计算和拓扑图绘制都直接使用这些数组；布局按配置自动生成，不需要手工坐标。
+import json
+import os
+
+import numpy as np
+
+from .health import COMPONENT_CHANNELS
+
+COMPONENT_NAMES = {'motor': "驱动电机", 'gearbox': "减速箱", 'heater': "加热器"}
+
+# 没有配置文件时使用的默认拓扑：4 条产线，每条 50 台挤出机
+DEFAULT_TOPOLOGY = {
+    "components": list(COMPONENT_CHANNELS),
+    "lines": [{"name": f"{c}线", "machine_prefix": f"EX-{c}", "machine_count": 50} for c in "ABCD"],
+}
+
+
+class Topology:
+    """
+    配置格式：
+    {"components": [默认部件类型...],
+     "lines": [{"name": 产线名, "machine_prefix": 可选编号前缀, "components": 可选本线默认部件,
+                "machine_count": 同型设备台数, "machines": [{"name": 设备名, "components": [...]}, ...]}, ...]}
+    未给出名称的设备按 编号前缀 + 线内序号 命名。
+    """
+    def __init__(self, config):
+        default_components = config.get("components", list(COMPONENT_CHANNELS))
+        self.line_names, self.machine_names, self.kinds = [], [], []
+        machine_line, component_machine = [], []
+        for line in config["lines"]:
+            line_index = len(self.line_names)
+            self.line_names.append(line["name"])
+            prefix = line.get("machine_prefix", f"{line['name']}-")
+            # 先按 machine_count 批量生成同型设备，再追加逐台配置的设备
+            machines = [{} for _ in range(line.get("machine_count", 0))] + line.get("machines", [])
+            for index_in_line, machine in enumerate(machines):
+                machine_index = len(self.machine_names)
+                self.machine_names.append(machine.get("name", f"{prefix}{index_in_line + 1:03d}"))
+                machine_line.append(line_index)
+                kinds = machine.get("components", line.get("components", default_components))
+                if not kinds:
+                    raise ValueError(f"设备 {self.machine_names[-1]} 没有配置部件")
+                for kind in kinds:
+                    if kind not in COMPONENT_CHANNELS:
+                        raise ValueError(f"未知的部件类型: {kind}")
+                    self.kinds.append(kind)
+                    component_machine.append(machine_index)
+        self.machine_line = np.array(machine_line, dtype=np.int64)
+        self.component_machine = np.array(component_machine, dtype=np.int64)
+        # 每台设备第一个部件的下标 (部件按设备连续排列)，末尾附加部件总数
+        self.machine_start = np.searchsorted(self.component_machine, np.arange(len(self.machine_names) + 1))
+
+    @property
+    def n_machines(self):
+        return len(self.machine_names)
+
+    @property
+    def n_components(self):
+        return len(self.kinds)
+
+    def machine_components(self, machine):
+        return slice(int(self.machine_start[machine]), int(self.machine_start[machine + 1]))
+
+    def machine_worst(self, scores):
+        """每台设备最差部件的健康度 (一次 reduceat)"""
+        return np.minimum.reduceat(scores, self.machine_start[:-1])
+
+    def component_name(self, component):
+        machine = self.machine_names[self.component_machine[component]]
+        return f"{machine} {COMPONENT_NAMES[self.kinds[component]]}"
+
+
+def load_topology(path):
+    """读取拓扑配置文件，文件不存在时使用默认拓扑"""
+    if not os.path.exists(path):
+        return Topology(DEFAULT_TOPOLOGY)
+    with open(path, 'r', encoding='utf-8') as f:
+        return Topology(json.load(f))
+
+
+def auto_layout(topology, machines_per_row=20, machine_spacing=(160, 130), component_spacing=40, line_gap=90):
+    """
+    自动布局：每条产线占一个横向条带，设备按行排列，部件排在所属设备下方。
+    :return: (设备中心坐标 (设备数, 2), 部件中心坐标 (部件数, 2), 各产线条带的顶部纵坐标 (产线数,))
+    """
+    lines = topology.machine_line
+    # 设备在本产线内的序号
+    first_of_line = np.searchsorted(lines, lines)
+    index_in_line = np.arange(topology.n_machines) - first_of_line
+    rows_per_line = np.zeros(len(topology.line_names), dtype=np.int64)
+    np.maximum.at(rows_per_line, lines, index_in_line // machines_per_row + 1)
+    line_height = rows_per_line * machine_spacing[1] + line_gap
+    line_top = np.concatenate(([0], np.cumsum(line_height)[:-1])).astype(np.float64)
+
+    machine_pos = np.column_stack((
+        (index_in_line % machines_per_row) * machine_spacing[0],
+        line_top[lines] + line_gap + (index_in_line // machines_per_row) * machine_spacing[1],
+    )).astype(np.float64)
+
+    # 部件在所属设备下方一字排开、居中
+    owner = topology.component_machine
+    index_in_machine = np.arange(topology.n_components) - topology.machine_start[owner]
+    per_machine = np.diff(topology.machine_start)[owner]
+    component_pos = machine_pos[owner] + np.column_stack((
+        (index_in_machine - (per_machine - 1) / 2) * component_spacing,
+        np.full(topology.n_components, machine_spacing[1] * 0.4),
+    ))
+    return machine_pos, component_pos, line_top
@@ -0,0 +1,219 @@
+# engine/vision.py
+# 在线视觉检测：生成带有划痕、斑点、凹陷的合成管材表面图像，并用全向量化的流水线检测缺陷
+# (背景扣除 → 阈值分割 → 连通域标记 → 外接框)。InspectionPipeline 把帧分发到线程池处理并统计帧率；
+# NumPy 的大部分运算会释放 GIL，线程池即可利用多核，且无需在进程间拷贝图像。
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+DEFECT_TYPES = ("划痕", "斑点", "凹陷")
+
+
+class FrameGenerator:
+    """合成相机帧：圆柱面明暗 + 传感器噪声 + 随机注入的缺陷"""
+    def __init__(self, height=128, width=512, seed=None, defect_rate=0.3, noise=4.0):
+        """
+        :param defect_rate: 每帧缺陷数量的期望值 (泊松分布)
+        :param noise: 噪声标准差 (灰度级)
+        """
+        self.height, self.width = height, width
+        self.defect_rate = defect_rate
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        y = np.linspace(-1.0, 1.0, height, dtype=np.float32)
+        self.shading = (90 + 80 * np.sqrt(1 - 0.9 * y ** 2))[:, None] # 沿管轴方向不变，只随行变化
+
+    def generate(self):
+        """
+        :return: (uint8 灰度帧, [(缺陷类型, (x, y, w, h))] 真值)
+        """
+        frame = self.shading + self.rng.normal(0.0, self.noise, (self.height, self.width)).astype(np.float32)
+        painters = {"划痕": self._add_scratch, "斑点": self._add_spot, "凹陷": self._add_dent}
+        truth = []
+        for _ in range(self.rng.poisson(self.defect_rate)):
+            kind = DEFECT_TYPES[self.rng.integers(len(DEFECT_TYPES))]
+            truth.append((kind, painters[kind](frame)))
+        return np.clip(frame, 0, 255).astype(np.uint8), truth
+
+    def _window(self, cx, cy, rx, ry):
+        x0, x1 = max(int(cx - rx), 0), min(int(cx + rx) + 1, self.width)
+        y0, y1 = max(int(cy - ry), 0), min(int(cy + ry) + 1, self.height)
+        yy, xx = np.mgrid[y0:y1, x0:x1].astype(np.float32)
+        return (slice(y0, y1), slice(x0, x1)), xx, yy, (x0, y0, x1 - x0, y1 - y0)
+
+    def _add_scratch(self, frame):
+        """细长暗线，大致沿管轴方向"""
+        length = self.rng.uniform(40, 120)
+        angle = self.rng.uniform(-0.3, 0.3)
+        cx = self.rng.uniform(length / 2, self.width - length / 2)
+        cy = self.rng.uniform(15, self.height - 15)
+        dx, dy = np.cos(angle), np.sin(angle)
+        window, xx, yy, bbox = self._window(cx, cy, abs(dx) * length / 2 + 3, abs(dy) * length / 2 + 3)
+        along = np.clip((xx - cx) * dx + (yy - cy) * dy, -length / 2, length / 2)
+        dist = np.hypot(xx - (cx + along * dx), yy - (cy + along * dy))
+        frame[window] -= 60 * np.exp(-(dist / 1.2) ** 2)
+        return bbox
+
+    def _add_spot(self, frame):
+        """小而深的圆斑"""
+        r = self.rng.uniform(3, 7)
+        cx, cy = self.rng.uniform(10, self.width - 10), self.rng.uniform(10, self.height - 10)
+        window, xx, yy, bbox = self._window(cx, cy, r + 1, r + 1)
+        frame[window] -= 70 * np.clip(r + 0.5 - np.hypot(xx - cx, yy - cy), 0, 1)
+        return bbox
+
+    def _add_dent(self, frame):
+        """面积较大的浅凹坑，边缘柔和"""
+        r = self.rng.uniform(10, 18)
+        cx, cy = self.rng.uniform(r, self.width - r), self.rng.uniform(r, self.height - r)
+        window, xx, yy, bbox = self._window(cx, cy, r, r)
+        frame[window] -= 35 * np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * (r / 2) ** 2))
+        return bbox
+
+
+def _box_blur3(image):
+    """3×3 均值滤波 (边缘复制)"""
+    padded = np.pad(image, 1, mode='edge')
+    h, w = image.shape
+    out = np.zeros_like(image)
+    for dy in range(3):
+        for dx in range(3):
+            out += padded[dy:dy + h, dx:dx + w]
+    return out / 9
+
+
+def label_components(mask):
+    """
+    8 连通域标记 (行程编码 + 向量化的并查集传播)。
+    :return: (rows, starts, ends, labels) 每个行程的行号、列区间 [start, end) 与连通域编号 (0..K-1)
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1) # 按行优先顺序，与 starts 一一对应
+    n = len(rows)
+    if n == 0:
+        return rows, starts, ends, np.zeros(0, dtype=np.intp)
+
+    # 相邻两行中列区间相接 (含对角) 的行程互相连通；同一行的行程按列有序且不相交，
+    # 所以每个行程在上一行中的相接行程是一段连续下标，可用 searchsorted 一次求出
+    stride = w + 2
+    start_key = rows * stride + starts
+    end_key = rows * stride + ends
+    prev_row = (rows - 1) * stride
+    first = np.searchsorted(end_key, prev_row + starts, side='left')
+    last = np.searchsorted(start_key, prev_row + ends, side='right')
+    last = np.maximum(last, first)
+    counts = last - first
+    dst = np.repeat(np.arange(n), counts)
+    src = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    keep = rows[src] == rows[dst] - 1
+    src, dst = src[keep], dst[keep]
+
+    # 沿边传播最小编号并做指针跳跃，直到收敛
+    labels = np.arange(n)
+    while True:
+        before = labels.copy()
+        np.minimum.at(labels, dst, labels[src])
+        np.minimum.at(labels, src, labels[dst])
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            break
+    _, labels = np.unique(labels, return_inverse=True)
+    return rows, starts, ends, labels
+
+
+def classify_defect(w, h, area):
+    """按外接框形状与面积粗分类型：细长或填充率低的为划痕，其余按面积区分凹陷与斑点"""
+    if max(w, h) >= 20 and (max(w, h) >= 4 * min(w, h) or area < 0.5 * w * h):
+        return "划痕"
+    if area >= 230:
+        return "凹陷"
+    return "斑点"
+
+
+def detect_defects(frame, k=6.0, min_area=8):
+    """
+    检测单帧中的缺陷。
+    :param k: 阈值 = 差分图中位数 + k × 鲁棒标准差 (MAD)
+    :param min_area: 小于该像素数的连通域视为噪声
+    :return: [{'type', 'bbox': (x, y, w, h), 'area', 'contrast'}]
+    """
+    image = frame.astype(np.float32)
+    background = np.median(image, axis=1, keepdims=True) # 管面明暗沿轴向不变，逐行中位数即背景
+    diff = _box_blur3(np.abs(image - background))
+    center = np.median(diff)
+    sigma = 1.4826 * np.median(np.abs(diff - center))
+    mask = diff > center + k * max(sigma, 1e-3)
+
+    rows, starts, ends, labels = label_components(mask)
+    if not len(labels):
+        return []
+    k_count = labels.max() + 1
+    x0 = np.full(k_count, frame.shape[1]); np.minimum.at(x0, labels, starts)
+    x1 = np.zeros(k_count, dtype=np.intp); np.maximum.at(x1, labels, ends)
+    y0 = np.full(k_count, frame.shape[0]); np.minimum.at(y0, labels, rows)
+    y1 = np.zeros(k_count, dtype=np.intp); np.maximum.at(y1, labels, rows + 1)
+    area = np.bincount(labels, weights=ends - starts, minlength=k_count)
+    # 每个连通域的平均对比度：先对每行差分做前缀和，再按行程区间求和
+    row_cumsum = np.concatenate((np.zeros((diff.shape[0], 1), np.float32), np.cumsum(diff, axis=1)), axis=1)
+    run_sum = row_cumsum[rows, ends] - row_cumsum[rows, starts]
+    contrast = np.bincount(labels, weights=run_sum, minlength=k_count) / area
+
+    detections = []
+    for i in np.nonzero(area >= min_area)[0]:
+        w, h = int(x1[i] - x0[i]), int(y1[i] - y0[i])
+        detections.append({
+            'type': classify_defect(w, h, area[i]),
+            'bbox': (int(x0[i]), int(y0[i]), w, h),
+            'area': int(area[i]),
+            'contrast': float(contrast[i]),
+        })
+    return detections
+
+
+class InspectionPipeline:
+    """线程池检测流水线：submit() 返回 Future，并统计吞吐帧率与单帧耗时"""
+    def __init__(self, workers=None, window=100, **detect_kwargs):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.detect_kwargs = detect_kwargs
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inspection")
+        self._durations = deque(maxlen=window)   # 单帧检测耗时
+        self._completions = deque(maxlen=window) # 完成时刻
+        self.frames_done = 0
+
+    def submit(self, frame):
+        return self._executor.submit(self._process, frame)
+
+    def _process(self, frame):
+        started = time.perf_counter()
+        detections = detect_defects(frame, **self.detect_kwargs)
+        finished = time.perf_counter()
+        self._durations.append(finished - started)
+        self._completions.append(finished)
+        self.frames_done += 1
+        return detections
+
+    @property
+    def fps(self):
+        """最近窗口内实际完成的帧率"""
+        done = list(self._completions)
+        if len(done) < 2 or done[-1] <= done[0]:
+            return 0.0
+        return (len(done) - 1) / (done[-1] - done[0])
+
+    @property
+    def capacity_fps(self):
+        """按单帧平均耗时和线程数估算的处理上限"""
+        durations = list(self._durations)
+        if not durations:
+            return 0.0
+        return self.workers / (sum(durations) / len(durations))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,206 @@
+# headless.py
+# 无界面命令行入口：不依赖 PyQt5，可在服务器、批处理任务或基准测试中全速运行计算核心。
+#
+# 用法示例:
+#   python headless.py simulate --lines 100 --ticks 28800 --record telemetry_data
+#   python headless.py optimize --generations 50 --seed 1
+#   python headless.py health --seed 1
+#   python headless.py cost --mode high_speed --speed 60
+#   python headless.py vision --frames 2000 --workers 4
+#   python headless.py bench
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from engine.clock import SimClock
+from engine.line_engine import LineArrayEngine, MODES, STATUS_NAMES
+from engine.telemetry import records_from_engine
+from engine.recorder import TelemetryRecorder
+from engine.simulation_kernel import SimulationKernel, GeneticOptimizer
+from engine.health import (COMPONENT_CHANNELS, StreamingHealth, calculate_health_score, maintenance_suggestion,
+                           create_mock_sensor_data, create_mock_fleet, rule_table, score_fleet)
+from engine.consumption import DEFAULT_COSTS, power_breakdown, unit_costs
+from engine.vision import FrameGenerator, InspectionPipeline
+from engine.spectrum import SAMPLE_RATE, VibrationGenerator, RollingSpectrum
+from engine.anomaly import new_state, detect
+
+
+def cmd_simulate(args):
+    """全速推进 N 条产线，可选写入遥测记录目录"""
+    engine = LineArrayEngine(n_lines=args.lines, seed=args.seed, stagger=args.lines > 1)
+    engine.set_mode(args.mode)
+    clock = SimClock(speed=None, start=args.start)
+    recorder = TelemetryRecorder(args.record) if args.record else None
+
+    started = time.perf_counter()
+    for ts in engine.run(args.ticks, clock):
+        if recorder:
+            recorder.append(records_from_engine(engine, ts))
+    if recorder:
+        recorder.close()
+    elapsed = time.perf_counter() - started
+
+    devices = args.lines * engine.n_devices * args.ticks
+    print(f"仿真完成: {args.lines} 条产线 × {args.ticks} 步，耗时 {elapsed:.2f} 秒 "
+          f"({devices / elapsed:,.0f} 设备步/秒)")
+    counts = {name: int((engine.line_status == code).sum()) for code, name in enumerate(STATUS_NAMES)}
+    print(f"结束时产线状态分布: {counts}，总产量 {engine.total_output.sum():.1f} 米")
+
+
+def cmd_optimize(args):
+    """运行遗传算法寻优并输出推荐方案"""
+    kernel = SimulationKernel()
+    optimizer = GeneticOptimizer(kernel, {'temp': (80, 100), 'speed': (40, 60)},
+                                 population_size=args.population, generations=args.generations, seed=args.seed)
+    started = time.perf_counter()
+    best = optimizer.run_optimization()
+    elapsed = time.perf_counter() - started
+    results = kernel.run(best)
+    print(f"寻优完成 ({args.generations} 代，耗时 {elapsed:.2f} 秒)")
+    print(f"- 温度: {best['temp']:.2f} °C\n- 速度: {best['speed']:.2f} m/min")
+    print(f"- 产量: {results['output']:.0f} 米\n- 单位能耗: {results['unit_energy']:.3f} kWh/米\n- 缺陷率: {results['defect_rate']:.2%}")
+
+
+def cmd_health(args):
+    """对模拟传感器数据计算各部件健康度"""
+    db = create_mock_sensor_data(args.points, seed=args.seed)
+    for component, channel in COMPONENT_CHANNELS.items():
+        score = calculate_health_score(component, db[channel])
+        print(f"{component:8s} 健康度 {score:5.1f}  {maintenance_suggestion(score)}")
+    if args.assets:
+        assets, kinds, data = create_mock_fleet(args.assets, args.points, seed=args.seed)
+        started = time.perf_counter()
+        scores = score_fleet(data, rule_table(kinds))
+        elapsed = time.perf_counter() - started
+        print(f"机群 {args.assets} 台 ({len(kinds)} 个部件) 评估耗时 {elapsed * 1e3:.1f} ms，"
+              f"危险 {int((scores <= 50).sum())} 个，警告 {int(((scores > 50) & (scores <= 80)).sum())} 个")
+        for i in np.argsort(scores, kind='stable')[:5]:
+            print(f"  {assets[i // len(COMPONENT_CHANNELS)]} {kinds[i]:8s} 健康度 {scores[i]:5.1f}")
+
+
+def cmd_cost(args):
+    """按指定模式和速度计算单位成本"""
+    running = args.speed > 0
+    power_data = power_breakdown(running, running, running, args.mode)
+    costs = {'electricity_price': args.elec_price, 'material_price': args.mat_price}
+    unit_elec_cost, unit_mat_cost, _ = unit_costs(power_data, args.speed, costs)
+    print(f"总功率 {sum(power_data.values()):.1f} kW，单位电能成本 {unit_elec_cost:.3f} 元/米，单位物料成本 {unit_mat_cost:.3f} 元/米")
+
+
+def cmd_vision(args):
+    """测算视觉检测工位的处理能力：预先生成合成帧，再全部提交到线程池检测"""
+    generator = FrameGenerator(seed=args.seed, defect_rate=args.defect_rate)
+    frames, truth = zip(*(generator.generate() for _ in range(args.frames)))
+    pipeline = InspectionPipeline(args.workers)
+    started = time.perf_counter()
+    results = [future.result() for future in [pipeline.submit(frame) for frame in frames]]
+    elapsed = time.perf_counter() - started
+    pipeline.shutdown()
+    print(f"检测完成: {args.frames} 帧 ({frames[0].shape[1]}×{frames[0].shape[0]})，{pipeline.workers} 个线程，"
+          f"耗时 {elapsed:.2f} 秒，{args.frames / elapsed:.1f} fps")
+    print(f"注入缺陷 {sum(map(len, truth))} 个，检出 {sum(map(len, results))} 个")
+
+
+def cmd_bench(args):
+    """对各计算核心做简单的吞吐量基准测试"""
+    for n_lines in (1, 100, 2500):
+        engine = LineArrayEngine(n_lines=n_lines, seed=0, stagger=True)
+        ticks = 2000
+        started = time.perf_counter()
+        for _ in engine.run(ticks, SimClock(speed=None)):
+            pass
+        elapsed = time.perf_counter() - started
+        print(f"仿真步进 {n_lines:5d} 条产线: {elapsed / ticks * 1e3:.3f} ms/步")
+
+    engine = LineArrayEngine(n_lines=100, seed=0, stagger=True)
+    batches = [records_from_engine(engine, ts) for ts in engine.run(600, SimClock(speed=None))]
+    started = time.perf_counter()
+    _, events = detect(new_state(), np.concatenate(batches))
+    print(f"异常检测 (100 条产线 × 600 步): {(time.perf_counter() - started) * 1e3:.1f} ms，{len(events)} 个事件")
+
+    started = time.perf_counter()
+    GeneticOptimizer(SimulationKernel(), {'temp': (80, 100), 'speed': (40, 60)}, seed=0).run_optimization()
+    print(f"遗传算法寻优 (20×30): {time.perf_counter() - started:.3f} 秒")
+
+    db = create_mock_sensor_data(100000, seed=0)
+    started = time.perf_counter()
+    for component, channel in COMPONENT_CHANNELS.items():
+        calculate_health_score(component, db[channel])
+    print(f"健康度评估 (3 × 100000 点): {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    health = StreamingHealth(rule_table(list(COMPONENT_CHANNELS)))
+    samples = np.column_stack([db[channel] for channel in COMPONENT_CHANNELS.values()])[:10000]
+    started = time.perf_counter()
+    for row in samples:
+        health.update(row)
+    print(f"流式健康度更新: {(time.perf_counter() - started) / len(samples) * 1e6:.1f} µs/样本")
+
+    _, kinds, data = create_mock_fleet(3334, 1000, seed=0)
+    rules = rule_table(kinds)
+    started = time.perf_counter()
+    score_fleet(data, rules)
+    print(f"机群健康度评估 ({len(kinds)} 部件 × 1000 点): {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    signal = VibrationGenerator(seed=0).generate(SAMPLE_RATE * 60)
+    analyzer = RollingSpectrum()
+    block = SAMPLE_RATE // 10
+    started = time.perf_counter()
+    for i in range(0, len(signal), block):
+        analyzer.push(signal[i:i + block])
+    elapsed = time.perf_counter() - started
+    print(f"振动频谱分析 ({SAMPLE_RATE} Hz × 60 秒): {elapsed * 1e3:.1f} ms，{60 / elapsed:.0f} 倍实时")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="数字孪生计算核心的无界面运行入口")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('simulate', help="全速运行多产线仿真")
+    p.add_argument('--lines', type=int, default=1)
+    p.add_argument('--ticks', type=int, default=8 * 3600, help="仿真步数 (每步 1 秒仿真时间)")
+    p.add_argument('--mode', choices=MODES, default='normal')
+    p.add_argument('--seed', type=int, default=None)
+    p.add_argument('--start', type=float, default=None, help="起始仿真时间 (epoch 秒)，默认当前时间")
+    p.add_argument('--record', metavar='DIR', help="把遥测写入记录目录，可用 main.py --replay 回放")
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser('optimize', help="遗传算法参数寻优")
+    p.add_argument('--population', type=int, default=20)
+    p.add_argument('--generations', type=int, default=30)
+    p.add_argument('--seed', type=int, default=None)
+    p.set_defaults(func=cmd_optimize)
+
+    p = sub.add_parser('health', help="部件健康度评估")
+    p.add_argument('--points', type=int, default=1000)
+    p.add_argument('--seed', type=int, default=None)
+    p.add_argument('--assets', type=int, default=0, help="额外评估一个 N 台挤出机的模拟机群")
+    p.set_defaults(func=cmd_health)
+
+    p = sub.add_parser('cost', help="能耗与物耗成本计算")
+    p.add_argument('--mode', choices=MODES, default='normal')
+    p.add_argument('--speed', type=float, default=50.0, help="牵引速度 (m/min)")
+    p.add_argument('--elec-price', type=float, default=DEFAULT_COSTS['electricity_price'])
+    p.add_argument('--mat-price', type=float, default=DEFAULT_COSTS['material_price'])
+    p.set_defaults(func=cmd_cost)
+
+    p = sub.add_parser('vision', help="视觉检测工位吞吐量测算")
+    p.add_argument('--frames', type=int, default=1000)
+    p.add_argument('--workers', type=int, default=None, help="检测线程数，默认按 CPU 核数")
+    p.add_argument('--defect-rate', type=float, default=0.3, help="每帧缺陷数量的期望值")
+    p.add_argument('--seed', type=int, default=None)
+    p.set_defaults(func=cmd_vision)
+
+    p = sub.add_parser('bench', help="计算核心基准测试")
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,11 +1,21 @@
 # main.py
 
 import sys
+import argparse
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QDialog
 
+def parse_args(argv):
+    """解析本程序自己的参数，其余参数留给 Qt"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--replay', metavar='DIR', help="从遥测记录目录回放数据，代替实时模拟器")
+    parser.add_argument('--replay-speed', type=float, default=1.0, help="回放倍速 (1-1000)")
+    return parser.parse_known_args(argv)
+
 def main():
     """程序主入口，包含一个循环来处理登出和重新登录"""
-    app = QApplication(sys.argv)
+    args, qt_argv = parse_args(sys.argv)
+    app = QApplication(qt_argv)
     
     # 在 QApplication 实例化后，立即导入并应用 qt_material
     from qt_material import apply_stylesheet
@@ -20,6 +30,11 @@ def main():
     app.setOrganizationName("YourCompany")
     app.setApplicationName("DigitalTwinSystem")
 
+    if args.replay:
+        from telemetry_hub import get_hub
+        get_hub().use_replay(args.replay, args.replay_speed)
+        print(f"回放模式: {args.replay} ({args.replay_speed}×)")
+
     # 使用一个循环来控制整个应用的生命周期
     while True:
         # 尝试获取已登录的用户
@@ -71,4 +86,5 @@ def main():
             break
             
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # 打包后 spawn 出的异常检测工作进程会重新执行本文件，不能再打开 GUI
     main()
\ No newline at end of file
@@ -2,11 +2,15 @@
 
 from PyQt5.QtWidgets import QMainWindow, QStackedWidget, QWidget, QHBoxLayout, QAction
 from PyQt5.QtCore import Qt
+from functools import partial
 
 # --- 不再导入任何 pages, 只导入核心模块 ---
 import user_manager
 from widgets.side_menu import SideMenu
 import router # <-- 导入新的路由模块
+from telemetry_hub import get_hub
+from persistence import close_database
+from anomaly_service import close_anomaly_service
 
 class MainWindow(QMainWindow):
     def __init__(self, username, parent=None):
@@ -30,6 +34,9 @@ class MainWindow(QMainWindow):
         
         self.pages = {}
 
+        # 后台持续录制遥测数据，为深潜分析等页面提供真实历史数据
+        get_hub().start_recording()
+
         self.init_ui()
         self._create_actions_menu()
 
@@ -75,6 +82,35 @@ class MainWindow(QMainWindow):
         logout_action.triggered.connect(self._handle_logout)
         user_menu.addAction(logout_action)
 
+        if get_hub().is_replay:
+            self._create_replay_menu(menu_bar)
+
+    def _create_replay_menu(self, menu_bar):
+        """回放模式下的播放控制"""
+        replay_menu = menu_bar.addMenu("回放控制")
+        for text, slot in [("播放", self._replay_play), ("暂停", self._replay_pause), ("从头开始", self._replay_restart)]:
+            action = QAction(text, self); action.triggered.connect(slot); replay_menu.addAction(action)
+        replay_menu.addSeparator()
+        for speed in (1, 10, 100, 1000):
+            action = QAction(f"{speed}× 倍速", self)
+            action.triggered.connect(partial(self._replay_set_speed, speed))
+            replay_menu.addAction(action)
+
+    def _replay_play(self):
+        if get_hub().producer: get_hub().producer.play()
+
+    def _replay_pause(self):
+        if get_hub().producer: get_hub().producer.pause()
+
+    def _replay_restart(self):
+        producer = get_hub().producer
+        if producer and producer.reader.time_range():
+            producer.seek(producer.reader.time_range()[0])
+            producer.play()
+
+    def _replay_set_speed(self, speed):
+        if get_hub().producer: get_hub().producer.set_speed(speed)
+
     def _handle_logout(self):
         user_manager.logout_user()
         self.logout_triggered = True
@@ -85,4 +121,9 @@ class MainWindow(QMainWindow):
         for page in self.pages.values():
             if hasattr(page, 'closeEvent') and callable(page.closeEvent):
                 page.closeEvent(event)
+        # 所有页面取消订阅后，停止异常检测进程和共享的模拟器线程
+        close_anomaly_service()
+        get_hub().shutdown()
+        # 提交工单、缺陷等尚未落盘的批量写入
+        close_database()
         super().closeEvent(event)
\ No newline at end of file
@@ -1,10 +1,12 @@
 # pages/page_3d_twin.py
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from PyQt5.QtCore import QTimer
 import pyvista as pv
 from pyvistaqt import QtInteractor # pyvista 与 PyQt 集成的关键组件
 
-from device_simulator import LineSimulatorThread
+from telemetry_hub import get_hub
+from engine.telemetry import device_status, status_name
+
+MONITORED_LINE = 0 # 多产线遥测中展示的产线
 
 class Page3DTwin(QWidget):
     def __init__(self):
@@ -21,15 +23,10 @@ class Page3DTwin(QWidget):
         # --- 3. 初始化3D场景 ---
         self.setup_scene()
 
-        # --- 4. 启动模拟器 ---
-        # (我们将使用 QTimer 来从模拟器拉取数据，这是一种更稳健的方式)
-        self.simulator = LineSimulatorThread(self)
-        self.simulator.start()
-
-        # --- 5. 设置一个定时器来周期性更新UI ---
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_3d_scene)
-        self.update_timer.start(1000) # 每1000毫秒 (1秒) 更新一次
+        # --- 4. 订阅全局遥测中心 ---
+        # (3D 渲染开销较大，限速为每秒最多更新一次)
+        self.hub = get_hub()
+        self.subscription = self.hub.subscribe(self.update_3d_scene, max_rate=1)
         
     def setup_scene(self):
         """使用 PyVista API 创建3D场景"""
@@ -60,16 +57,12 @@ class Page3DTwin(QWidget):
         actor = self.plotter.add_mesh(machine, color="#B0BEC5", name=name)
         return actor
 
-    def update_3d_scene(self):
-        """核心逻辑：从模拟器获取最新数据并更新3D场景"""
-        # 注意：这里我们直接访问模拟器线程的属性
-        # 在简单场景下是可行的，因为Python的GIL提供了一定的线程安全
-        data = {
-            'line_status': self.simulator.line_status,
-            'devices': self.simulator.devices,
-            'total_output': self.simulator.run_timer * 1.5,
-        }
-
+    def update_3d_scene(self, batch):
+        """核心逻辑：根据遥测中心推送的数据更新3D场景 (只需要批次中最新的状态)"""
+        records = batch[batch['line'] == MONITORED_LINE]
+        if not len(records):
+            return
+        record = records[-1]
         status_colors = {
             'running': "#4CAF50",
             'idle': "#FFC107",
@@ -78,24 +71,23 @@ class Page3DTwin(QWidget):
         
         # 更新设备颜色
         for key, device_actor in self.devices_3d.items():
-            status = data['devices'][key]['status']
+            status = device_status(record, key)
             color = status_colors.get(status, "#B0BEC5")
             device_actor.prop.color = color
             
         # 更新产品流动动画
-        if data['line_status'] == 'running':
+        if status_name(record['line_status']) == 'running':
             self.product_actor.SetVisibility(True)
-            progress = (data['total_output'] % 100) / 100.0
+            progress = (float(record['total_output']) % 100) / 100.0
             x_pos = -10 + progress * 20
             self.product_actor.position = (x_pos, 1.5, 0)
         else:
             self.product_actor.SetVisibility(False)
             
     def closeEvent(self, event):
-        """确保在窗口关闭时停止后台线程和定时器"""
-        print("关闭3D孪生页面，正在停止模拟器和定时器...")
-        self.update_timer.stop()
-        if hasattr(self, 'simulator'):
-            self.simulator.stop()
+        """确保在窗口关闭时取消遥测订阅"""
+        print("关闭3D孪生页面，正在取消遥测订阅...")
+        if hasattr(self, 'subscription'):
+            self.hub.unsubscribe(self.subscription)
         self.plotter.close() # 关闭 pyvista 渲染器
         super().closeEvent(event)
\ No newline at end of file
@@ -5,10 +5,15 @@ from functools import partial
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
                              QGridLayout, QGroupBox, QPushButton, QDoubleSpinBox, 
                              QFormLayout)
-from PyQt5.QtCore import Qt, QTimer, QRectF # <-- 确保 QRectF 已导入
+from PyQt5.QtCore import Qt, QRectF # <-- 确保 QRectF 已导入
 from PyQt5.QtGui import QColor, QBrush, QPen, QPainterPath
 
-from device_simulator import LineSimulatorThread
+from telemetry_hub import get_hub
+from engine.line_engine import MODES
+from engine.telemetry import device_status
+from engine.consumption import DEFAULT_COSTS, power_breakdown, unit_costs, pareto
+
+MONITORED_LINE = 0 # 多产线遥测中参与能耗核算的产线
 
 # (SankeyNode 类保持不变)
 class SankeyNode(pg.GraphicsObject):
@@ -59,10 +64,11 @@ class SankeyFlow(pg.GraphicsObject):
 class PageConsumptionModel(QWidget):
     def __init__(self):
         super().__init__()
-        self.costs = {'electricity_price': 0.8, 'material_price': 12.5}
+        self.costs = dict(DEFAULT_COSTS)
         
-        self.simulator = LineSimulatorThread(self)
-        self.simulator.start()
+        self.hub = get_hub()
+        latest = self.hub.latest()
+        self._record = latest if latest is not None and latest['line'] == MONITORED_LINE else None # 该产线的最新记录
         
         main_layout = QGridLayout(self); main_layout.setContentsMargins(20, 20, 20, 20); main_layout.setSpacing(20)
         kpi_panel = self._create_kpi_panel()
@@ -74,8 +80,8 @@ class PageConsumptionModel(QWidget):
         main_layout.addWidget(console_panel, 1, 1)
         main_layout.setColumnStretch(0, 3); main_layout.setColumnStretch(1, 2)
         
-        self.timer = QTimer(self); self.timer.timeout.connect(self.update_data)
-        self.timer.start(1000)
+        # 能耗模型每秒刷新一次即可
+        self.subscription = self.hub.subscribe(self.update_data, max_rate=1)
         self.update_data()
     
     # ... (之后的所有方法都保持不变)
@@ -135,7 +141,7 @@ class PageConsumptionModel(QWidget):
         layout = QHBoxLayout(box)
         modes = {"节能模式": "energy_saving", "常规模式": "normal", "高速模式": "high_speed"}
         for text, mode in modes.items():
-            btn = QPushButton(text); btn.clicked.connect(partial(self.simulator.set_mode, mode)); layout.addWidget(btn)
+            btn = QPushButton(text); btn.clicked.connect(partial(self.hub.set_mode, mode)); layout.addWidget(btn)
         return box
         
     def _update_costs(self):
@@ -143,20 +149,16 @@ class PageConsumptionModel(QWidget):
         self.costs['material_price'] = self.mat_price_input.value()
         self.update_data()
 
-    def update_data(self):
-        data = {'line_status': self.simulator.line_status, 'devices': self.simulator.devices}
-        mode = self.simulator.mode; power_multiplier = 1.3 if mode == 'high_speed' else 0.75 if mode == 'energy_saving' else 1.0
-        power_data = {
-            '挤出机': 25 if data['devices']['extruder']['status'] == 'running' else 1, '牵引机': 5 if data['devices']['tractor']['status'] == 'running' else 0.5,
-            '收卷机': 3 if data['devices']['winder']['status'] == 'running' else 0.5, '冷却系统': 2, '照明': 1, '热损耗': 4
-        }
-        power_data['挤出机'] *= power_multiplier; power_data['牵引机'] *= power_multiplier
+    def update_data(self, batch=None):
+        if batch is not None:
+            records = batch[batch['line'] == MONITORED_LINE]
+            if len(records): self._record = records[-1]
+        record = self._record
+        if record is None: return
+        power_data = power_breakdown(device_status(record, 'extruder') == 'running', device_status(record, 'tractor') == 'running',
+                                     device_status(record, 'winder') == 'running', MODES[int(record['mode'])])
         total_power = sum(power_data.values())
-        speed_mps = data['devices']['tractor']['speed'] / 60.0; material_consumption_kgps = (speed_mps / 100) if speed_mps > 0 else 0
-        if speed_mps > 0:
-            elec_cost_per_sec = total_power * (self.costs['electricity_price'] / 3600); unit_elec_cost = elec_cost_per_sec / speed_mps
-            mat_cost_per_sec = material_consumption_kgps * self.costs['material_price']; unit_mat_cost = mat_cost_per_sec / speed_mps
-        else: unit_elec_cost = unit_mat_cost = 0; mat_cost_per_sec = 0
+        unit_elec_cost, unit_mat_cost, mat_cost_per_sec = unit_costs(power_data, float(record['tractor_speed']), self.costs)
         self.unit_elec_cost_label.findChild(QLabel).setText(f"{unit_elec_cost:.3f}")
         self.unit_mat_cost_label.findChild(QLabel).setText(f"{unit_mat_cost:.3f}")
         self.total_power_label.findChild(QLabel).setText(f"{total_power:.1f}")
@@ -184,18 +186,11 @@ class PageConsumptionModel(QWidget):
             current_y += width * scale
 
     def _update_pareto(self, power_data, mat_cost_per_sec):
-        elec_cost_per_hour = {k: v * self.costs['electricity_price'] for k, v in power_data.items()}; all_costs = elec_cost_per_hour
-        all_costs['原料'] = mat_cost_per_sec * 3600
-        sorted_costs = sorted(all_costs.items(), key=lambda item: item[1], reverse=True)
-        labels = [item[0] for item in sorted_costs]; values = [item[1] for item in sorted_costs]
-        total_cost = sum(values)
-        if total_cost == 0: cumulative_percentage = np.zeros(len(values))
-        else: cumulative_percentage = np.cumsum(values) / total_cost * 100
+        labels, values, cumulative_percentage = pareto(power_data, mat_cost_per_sec, self.costs)
         self.pareto_bars.setOpts(x=np.arange(len(labels)), height=values, width=0.6)
         self.pareto_curve.setData(np.arange(len(labels)), cumulative_percentage)
         self.pareto_plot.getAxis('bottom').setTicks([list(enumerate(labels))]); self.pareto_plot.getAxis('bottom').setTextPen('w')
         
     def closeEvent(self, event):
-        self.timer.stop()
-        if hasattr(self, 'simulator'): self.simulator.stop()
+        if hasattr(self, 'subscription'): self.hub.unsubscribe(self.subscription)
         super().closeEvent(event)
\ No newline at end of file
@@ -1,21 +1,31 @@
 # pages/page_dashboard.py
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
-                             QGraphicsView, QGraphicsScene, QGridLayout, QListWidget)
+                             QGraphicsView, QGraphicsScene, QGridLayout, QListWidget, QComboBox)
 from PyQt5.QtCore import Qt
-from collections import deque
 import pyqtgraph as pg
 
-from device_simulator import LineSimulatorThread
+from telemetry_hub import get_hub
+from anomaly_service import get_anomaly_service
+from engine.telemetry import device_status, status_name, status_segments, format_time
+from engine.decimation import MinMaxPyramid
 from .widgets.digital_twin_widgets import MachineItem
 
+# 曲线可选的历史长度 (显示文本, 秒)
+HISTORY_OPTIONS = [("1 分钟", 60), ("10 分钟", 600), ("1 小时", 3600), ("8 小时", 8 * 3600)]
+SAMPLE_INTERVAL = 1.0 # 模拟器每条记录对应的仿真秒数
+MONITORED_LINE = 0    # 多产线遥测 (例如回放多产线记录) 中展示的产线
+
 class PageDashboard(QWidget):
-    def __init__(self):
+    def __init__(self, history_seconds=600):
         super().__init__()
         
-        # 数据存储
-        self.max_data_points = 60
-        self.temp_data = deque(maxlen=self.max_data_points)
-        self.pressure_data = deque(maxlen=self.max_data_points)
+        # 数据存储：基于环形缓冲区的抽稀金字塔，绘图时按屏幕宽度选择分辨率
+        self.history_seconds = history_seconds
+        capacity = int(history_seconds / SAMPLE_INTERVAL)
+        self.temp_data = MinMaxPyramid(capacity)
+        self.pressure_data = MinMaxPyramid(capacity)
+        self._redrawing = False
+        self._last_logged_status = None # 上一条写入日志的产线状态；异常事件也插在日志顶部，不能靠首行文本判断
 
         # UI 布局
         main_layout = QGridLayout(self)
@@ -33,10 +43,12 @@ class PageDashboard(QWidget):
         main_layout.setColumnStretch(0, 3)
         main_layout.setColumnStretch(1, 2)
 
-        # 启动后台模拟器
-        self.simulator = LineSimulatorThread(self)
-        self.simulator.data_updated.connect(self.update_ui)
-        self.simulator.start()
+        # 订阅全局遥测中心 (所有页面共享同一个模拟器)
+        self.hub = get_hub()
+        self.subscription = self.hub.subscribe(self.update_ui)
+        # 异常检测在独立进程中运行，检出的事件推送到日志
+        self.anomalies = get_anomaly_service()
+        self.anomalies.events_ready.connect(self._on_anomalies)
         
     def _create_twin_visualization(self):
         box = QFrame(); box.setFrameShape(QFrame.StyledPanel); layout = QVBoxLayout(box)
@@ -57,11 +69,23 @@ class PageDashboard(QWidget):
         layout = QVBoxLayout(box)
         
         title = QLabel("关键参数实时曲线"); title.setStyleSheet("font-size: 14pt;")
-        layout.addWidget(title)
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(title); header_layout.addStretch()
+        header_layout.addWidget(QLabel("历史长度:"))
+        self.history_selector = QComboBox()
+        for text, seconds in HISTORY_OPTIONS:
+            self.history_selector.addItem(text, seconds)
+        self.history_selector.setCurrentIndex(max(0, self.history_selector.findData(self.history_seconds)))
+        self.history_selector.currentIndexChanged.connect(self._change_history_length)
+        header_layout.addWidget(self.history_selector)
+        layout.addLayout(header_layout)
 
-        # --- 1. 修改：在这里创建并持有 PlotWidget 的引用 ---
-        self.temp_plot_widget = pg.PlotWidget()
-        self.pressure_plot_widget = pg.PlotWidget()
+        # --- 1. 修改：在这里创建并持有 PlotWidget 的引用 (横轴为仿真时间) ---
+        self.temp_plot_widget = pg.PlotWidget(axisItems={'bottom': pg.DateAxisItem()})
+        self.pressure_plot_widget = pg.PlotWidget(axisItems={'bottom': pg.DateAxisItem()})
+        self.pressure_plot_widget.setXLink(self.temp_plot_widget)
+        # 缩放或平移后按新的可见范围重新选择抽稀层级
+        self.temp_plot_widget.sigXRangeChanged.connect(self._redraw_curves)
 
         # --- 2. 修改：将 PlotWidget 传递给 setup 函数，并只接收返回的 curve ---
         self.temp_plot_curve = self._setup_plot(self.temp_plot_widget, "挤出机温度 (°C)", (80, 95))
@@ -82,6 +106,28 @@ class PageDashboard(QWidget):
         # 只返回 PlotDataItem (曲线)
         return plot_widget.plot(pen=pg.mkPen(color='#00BCD4', width=2))
 
+    def _change_history_length(self, index):
+        """切换历史长度：调整缓冲区容量，保留已有数据"""
+        self.history_seconds = self.history_selector.itemData(index)
+        capacity = int(self.history_seconds / SAMPLE_INTERVAL)
+        for pyramid in (self.temp_data, self.pressure_data):
+            pyramid.resize(capacity)
+        self.temp_plot_widget.enableAutoRange(x=True)
+        self._redraw_curves()
+
+    def _redraw_curves(self, *args):
+        """每条曲线最多绘制约 2×像素宽度 个点；原始数据足够稀疏时直接使用零拷贝视图"""
+        if self._redrawing: return
+        self._redrawing = True
+        view_box = self.temp_plot_widget.getViewBox()
+        max_points = 2 * max(int(view_box.width()), 100)
+        x_min = x_max = None
+        if not view_box.autoRangeEnabled()[0]:
+            x_min, x_max = view_box.viewRange()[0]
+        for curve, pyramid in ((self.temp_plot_curve, self.temp_data), (self.pressure_plot_curve, self.pressure_data)):
+            curve.setData(*pyramid.query(x_min, x_max, max_points))
+        self._redrawing = False
+
     def _create_status_log(self):
         box = QFrame(); box.setFrameShape(QFrame.StyledPanel); layout = QVBoxLayout(box)
         title = QLabel("状态与事件日志"); title.setStyleSheet("font-size: 14pt;")
@@ -91,30 +137,52 @@ class PageDashboard(QWidget):
         layout.addWidget(title); layout.addWidget(self.line_status_label); layout.addWidget(self.output_label); layout.addWidget(self.log_list)
         return box
         
-    def update_ui(self, data):
-        devices_data = data['devices']
+    def update_ui(self, batch):
+        """每个批次只刷新一次界面：曲线批量追加，状态取最后一条记录"""
+        batch = batch[batch['line'] == MONITORED_LINE]
+        if not len(batch):
+            return
+        record = batch[-1]
         for key, item in self.machine_items.items():
-            item.set_status(devices_data[key]['status'])
+            item.set_status(device_status(record, key))
             
+        line_status = status_name(record['line_status'])
         status_map = {'running': '运行中', 'idle': '待机', 'fault': '故障', 'stopped': '已停止'}
         color_map = {'running': '#4CAF50', 'idle': '#FFC107', 'fault': '#D32F2F', 'stopped': 'gray'}
-        line_status_text = status_map.get(data['line_status'], '未知')
-        line_status_color = color_map.get(data['line_status'], 'white')
+        line_status_text = status_map.get(line_status, '未知')
+        line_status_color = color_map.get(line_status, 'white')
         self.line_status_label.setText(f"生产线状态: <b style='color:{line_status_color};'>{line_status_text}</b>")
-        self.output_label.setText(f"今日产量: {data['total_output']:.1f} 米")
+        self.output_label.setText(f"今日产量: {record['total_output']:.1f} 米")
         
-        self.temp_data.append(devices_data['extruder']['temp'])
-        self.pressure_data.append(devices_data['extruder']['pressure'])
-        self.temp_plot_curve.setData(list(self.temp_data))
-        self.pressure_plot_curve.setData(list(self.pressure_data))
+        self.temp_data.extend(batch['ts'], batch['extruder_temp'])
+        self.pressure_data.extend(batch['ts'], batch['extruder_pressure'])
+        self._redraw_curves()
         
-        if data['line_status'] == 'fault' and (self.log_list.count() == 0 or self.log_list.item(0).text().find("故障") == -1):
-             self.log_list.insertItem(0, f"[{data['timestamp']}] 严重: 生产线发生故障！")
-        elif data['line_status'] == 'running' and (self.log_list.count() == 0 or self.log_list.item(0).text().find("启动") == -1):
-             self.log_list.insertItem(0, f"[{data['timestamp']}] 信息: 生产线启动运行。")
+        # 只检查批次内状态发生变化的位置，而不是逐条记录
+        for segment_status, segment in status_segments(batch):
+            timestamp = format_time(segment['ts'][0])
+            if segment_status == self._last_logged_status:
+                continue
+            if segment_status == 'fault':
+                self.log_list.insertItem(0, f"[{timestamp}] 严重: 生产线发生故障！")
+            elif segment_status == 'running':
+                self.log_list.insertItem(0, f"[{timestamp}] 信息: 生产线启动运行。")
+            else:
+                continue
+            self._last_logged_status = segment_status
              
+    def _on_anomalies(self, events):
+        for event in events:
+            if event['line'] != MONITORED_LINE:
+                continue
+            self.log_list.insertItem(0, f"[{format_time(event['ts'])}] 警告: {event['message']}")
+
     def closeEvent(self, event):
-        """确保在窗口关闭时停止后台线程"""
-        print("关闭数字孪生页面，正在停止模拟器线程...")
-        self.simulator.stop()
+        """确保在窗口关闭时取消遥测订阅"""
+        print("关闭数字孪生页面，正在取消遥测订阅...")
+        self.hub.unsubscribe(self.subscription)
+        try:
+            self.anomalies.events_ready.disconnect(self._on_anomalies)
+        except TypeError: # 已经断开 (closeEvent 可能被调用多次)
+            pass
         super().closeEvent(event)
\ No newline at end of file
@@ -5,12 +5,34 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt5.QtCore import Qt
 import pyqtgraph as pg
 
+from telemetry_hub import get_hub
+from anomaly_service import get_anomaly_service
+from engine.line_engine import STATUS_FAULT
+from engine.region_stats import region_stats
+from engine.decimation import MinMaxPyramid
+
+# 录制数据中各设备可用的通道 (字段名, 图表标题)
+RECORDED_CHANNELS = {
+    "挤出机": [('extruder_temp', "温度 (°C)"), ('extruder_pressure', "压力 (MPa)"), ('tank_temp', "水槽温度 (°C)")],
+    "牵引机": [('tractor_speed', "速度 (m/min)")],
+    "收卷机": [('winder_tension', "张力 (N)")],
+}
+HISTORY_WINDOW = 8 * 3600 # 默认加载最近一个班次
+MIN_RECORDED_POINTS = 10
+MAX_EVENT_MARKERS = 50
+MONITORED_LINE = 0 # 多产线记录中分析的产线
+
 class PageDeepDive(QWidget):
     def __init__(self):
         super().__init__()
         
         # --- 存储当前的数据 ---
         self.current_data = {}
+        self.plot_keys = [] # 各图表当前显示的数据 key，顺序同 p1..p3
+        self.pyramids = {}  # 各数据 key 的抽稀金字塔
+        self.recorded_range = None # 当前显示的录制数据的 (起点, 终点) 时间戳，模拟数据时为 None
+        self.anomalies = get_anomaly_service()
+        self._redrawing = False
 
         # --- UI 布局 ---
         main_layout = QVBoxLayout(self)
@@ -28,6 +50,7 @@ class PageDeepDive(QWidget):
         main_layout.addLayout(content_layout)
 
         # --- 默认加载数据 ---
+        # 异常标记只反映加载时的数据范围；之后检出的事件在重新加载历史数据时显示
         self._load_data()
 
     def _create_filters_widget(self):
@@ -80,6 +103,9 @@ class PageDeepDive(QWidget):
         # 创建一个代理来连接所有绘图区域的鼠标移动事件
         proxy = pg.SignalProxy(self.plots['p1'].scene().sigMouseMoved, rateLimit=60, slot=self._mouse_moved)
         self.plots['p1'].scene().proxy = proxy # 防止被垃圾回收
+
+        # X 轴已同步，缩放或平移时按可见范围和像素宽度重新选择抽稀层级
+        self.plots['p1'].sigXRangeChanged.connect(self._redraw_curves)
         
         return win
 
@@ -107,11 +133,8 @@ class PageDeepDive(QWidget):
         return box
 
     def _load_data(self):
-        """根据选择的设备加载不同的模拟数据"""
+        """优先加载录制的真实历史数据，没有录制数据时回退到模拟数据"""
         device = self.device_selector.currentText()
-        n_points = 5000
-        time_data = np.arange(n_points)
-        self.current_data = {'time': time_data}
 
         # 清除旧的事件标记
         for p in self.plots.values():
@@ -119,6 +142,69 @@ class PageDeepDive(QWidget):
                 if isinstance(item, (pg.InfiniteLine, pg.TextItem)) and not item in self.v_lines + self.data_labels:
                     p.removeItem(item)
 
+        events = self._load_recorded_data(device)
+        if events is None:
+            events = self._load_mock_data(device)
+
+        self._add_event_markers(events)
+            
+        time_data = self.current_data['time']
+        self.region.setRegion([time_data[0] + (time_data[-1] - time_data[0]) * 0.4,
+                               time_data[0] + (time_data[-1] - time_data[0]) * 0.5])
+        self._update_stats_from_region() # 加载后立即计算一次初始区域的统计
+
+    def _add_event_markers(self, events):
+        """:param events: {横轴位置: 标签}"""
+        for timestamp, label in events.items():
+            line = pg.InfiniteLine(angle=90, movable=False, pen='r')
+            line.setPos(timestamp)
+            text = pg.TextItem(label, color='r', anchor=(0, 1))
+            text.setPos(timestamp, self.plots['p1'].vb.viewRange()[1][1])
+            self.plots['p1'].addItem(line); self.plots['p1'].addItem(text)
+
+    def _anomaly_markers(self, events):
+        """把异常事件换算为当前录制数据的横轴位置；不在显示范围内的忽略"""
+        if self.recorded_range is None:
+            return {}
+        t0, t1 = self.recorded_range
+        return {e['ts'] - t0: e['message'] for e in events if t0 <= e['ts'] <= t1}
+
+    def _load_recorded_data(self, device):
+        """从遥测记录中读取最近一个班次的数据，返回事件标记；数据不足时返回 None"""
+        self.recorded_range = None
+        history = get_hub().history()
+        time_range = history.time_range()
+        if time_range is None: return None
+        t0 = max(time_range[0], time_range[1] - HISTORY_WINDOW)
+        # 多产线记录按时间戳交错存放，只取监控产线的记录
+        mask = history.read('line', t0, time_range[1]) == MONITORED_LINE
+        ts = history.read('ts', t0, time_range[1])[mask]
+        if len(ts) < MIN_RECORDED_POINTS: return None
+
+        # 横轴为相对于窗口起点的秒数
+        self.current_data = {'time': ts - ts[0]}
+        self.recorded_range = (float(ts[0]), float(ts[-1]))
+        for field, _ in RECORDED_CHANNELS[device]:
+            self.current_data[field] = history.read(field, t0, time_range[1])[mask]
+        self._update_plots([field for field, _ in RECORDED_CHANNELS[device]],
+                           [title for _, title in RECORDED_CHANNELS[device]])
+
+        # 事件：产线进入故障的时刻 (只标记最近的若干次)
+        line_status = history.read('line_status', t0, time_range[1])[mask]
+        fault_starts = np.flatnonzero((line_status[1:] == STATUS_FAULT) & (line_status[:-1] != STATUS_FAULT)) + 1
+        events = {float(self.current_data['time'][i]): "故障停机" for i in fault_starts[-MAX_EVENT_MARKERS:]}
+        # 异常检测服务记录的事件 (只保留最近若干条)
+        anomalies = [e for e in self.anomalies.events_between(*self.recorded_range) if e['line'] == MONITORED_LINE]
+        events.update(self._anomaly_markers(anomalies[-MAX_EVENT_MARKERS:]))
+        return events
+
+    def _load_mock_data(self, device):
+        """根据选择的设备生成模拟数据，返回事件标记"""
+        n_points = 5000
+        time_data = np.arange(n_points)
+        self.current_data = {'time': time_data}
+        events = {}
+
         if device == "挤出机":
             self.current_data['temp'] = 85 + np.random.randn(n_points) * 2
             self.current_data['pressure'] = 1.8 + np.random.randn(n_points) * 0.1
@@ -147,24 +233,23 @@ class PageDeepDive(QWidget):
             self._update_plots(['speed', 'torque', 'vibration'],
                                ["速度 (m/min)", "扭矩 (N·m)", "振动 (mm/s)"])
 
-        # 添加事件标记
-        for timestamp, label in events.items():
-            line = pg.InfiniteLine(angle=90, movable=False, pen='r')
-            line.setPos(timestamp)
-            text = pg.TextItem(label, color='r', anchor=(0, 1))
-            text.setPos(timestamp, self.plots['p1'].vb.viewRange()[1][1])
-            self.plots['p1'].addItem(line); self.plots['p1'].addItem(text)
-            
-        self.region.setRegion([n_points * 0.4, n_points * 0.5])
-        self._update_stats_from_region() # 加载后立即计算一次初始区域的统计
+        else:
+            self.current_data['tension'] = 5 + np.random.randn(n_points) * 0.2
+            self._update_plots(['tension'], ["张力 (N)"])
+
+        return events
 
     def _update_plots(self, data_keys, titles):
         """更新所有图表的标题和数据"""
+        self.plot_keys = list(data_keys)
+        self.pyramids = {key: MinMaxPyramid.from_arrays(self.current_data['time'], self.current_data[key]) for key in data_keys}
         for i, key in enumerate(data_keys):
             plot_key = f'p{i+1}'
             self.plots[plot_key].setTitle(titles[i])
-            self.curves[plot_key].setData(self.current_data['time'], self.current_data[key])
             self.param_names_labels[i].setText(f"<b>{titles[i].split(' ')[0]}</b>")
+        for plot in self.plots.values():
+            plot.enableAutoRange(x=True)
+        self._redraw_curves()
         
         # 隐藏未使用的图表和标签
         for i in range(len(data_keys), 3):
@@ -177,41 +262,47 @@ class PageDeepDive(QWidget):
             self.param_names_labels[i].show()
             for label in self.stat_labels[i]: label.show()
 
+    def _redraw_curves(self, *args):
+        """每条曲线只绘制与像素宽度相当的点数，而不是全部原始数据"""
+        if self._redrawing: return
+        self._redrawing = True
+        view_box = self.plots['p1'].vb
+        max_points = 2 * max(int(view_box.width()), 100)
+        x_min = x_max = None
+        if not view_box.autoRangeEnabled()[0]:
+            x_min, x_max = view_box.viewRange()[0]
+        for i, key in enumerate(self.plot_keys):
+            self.curves[f'p{i+1}'].setData(*self.pyramids[key].query(x_min, x_max, max_points))
+        self._redrawing = False
+
     def _update_stats_from_region(self):
         minX, maxX = self.region.getRegion()
         time_data = self.current_data.get('time', np.array([]))
         if len(time_data) == 0: return
 
-        idx1, idx2 = np.searchsorted(time_data, [minX, maxX])
-        if idx1 == idx2: return
-
-        for i, (param_label, stat_row) in enumerate(zip(self.param_names_labels, self.stat_labels)):
-            if not param_label.isVisible(): continue
-            
-            # 从图表标题获取数据key
-            param_key = list(self.current_data.keys())[i+1] # 简单映射
-            data_slice = self.current_data[param_key][idx1:idx2]
-            
-            if len(data_slice) > 0:
-                stats = [np.max(data_slice), np.min(data_slice), np.mean(data_slice), np.std(data_slice)]
-                for j, label in enumerate(stat_row):
-                    label.setText(f"{stats[j]:.2f}")
-            else:
-                for label in stat_row: label.setText("N/A")
+        # 从 current_data 获取各参数 (time 之后按图表顺序排列)
+        param_keys = list(self.current_data.keys())[1:]
+        visible_rows = [i for i, label in enumerate(self.param_names_labels) if label.isVisible() and i < len(param_keys)]
+        stats = region_stats(time_data, [self.current_data[param_keys[i]] for i in visible_rows], minX, maxX)
+        for i, row_stats in zip(visible_rows, stats):
+            for j, label in enumerate(self.stat_labels[i]):
+                label.setText(f"{row_stats[j]:.2f}" if row_stats else "N/A")
                 
     def _mouse_moved(self, evt):
         pos = evt[0]
         for i, p in enumerate(self.plots.values()):
             if p.sceneBoundingRect().contains(pos):
                 mouse_point = p.vb.mapSceneToView(pos)
-                index = int(mouse_point.x())
+                # 录制数据的时间轴可能有间断，按时间查找最近的采样点
+                index = int(np.searchsorted(self.current_data['time'], mouse_point.x()))
                 if 0 <= index < len(self.current_data['time']):
                     # 更新所有垂直线的位置
                     for v_line in self.v_lines: v_line.setPos(mouse_point.x())
                     
                     # 更新所有数据标签
-                    for j, (key, curve) in enumerate(self.curves.items()):
-                        if self.plots[key].isVisible():
-                            y_val = curve.yData[index]
+                    # 曲线上可能是抽稀后的数据，数值从原始数据中读取
+                    for j, data_key in enumerate(self.plot_keys):
+                        if self.plots[f'p{j+1}'].isVisible():
+                            y_val = self.current_data[data_key][index]
                             self.data_labels[j].setText(f"{y_val:.2f}")
-                            self.data_labels[j].setPos(mouse_point.x(), y_val)
\ No newline at end of file
+                            self.data_labels[j].setPos(mouse_point.x(), y_val)
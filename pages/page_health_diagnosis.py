@@ -1,44 +1,35 @@
 # pages/page_health_diagnosis.py
+import time
 import numpy as np
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, 
-                             QGraphicsView, QGraphicsScene, QGraphicsEllipseItem,
-                             QGraphicsTextItem, QGraphicsLineItem, QSplitter)
-from PyQt5.QtCore import Qt, QRectF
-from PyQt5.QtGui import QColor, QBrush, QPen, QFont
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
+                             QGraphicsScene, QSplitter, QComboBox, QPushButton, QListWidget)
+from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtGui import QColor, QBrush
 import pyqtgraph as pg
 
-class ComponentNode(QGraphicsEllipseItem):
-    """设备拓扑图中的一个部件节点"""
-    def __init__(self, name, data, parent=None):
-        super().__init__(-30, -30, 60, 60, parent)
-        self.setBrush(QBrush(Qt.gray))
-        self.name = name
-        self.data = data # 存储关联的传感器数据
-        self.health_score = 100
-
-        self.label = QGraphicsTextItem(name, self)
-        self.label.setDefaultTextColor(Qt.white)
-        self.label.setPos(-self.label.boundingRect().width() / 2, -10)
-        
-        self.setAcceptHoverEvents(True)
-    
-    def hoverEnterEvent(self, event):
-        self.setBrush(QBrush(Qt.cyan))
-        self.setCursor(Qt.PointingHandCursor)
-    
-    def hoverLeaveEvent(self, event):
-        self.update_health_color() # 恢复原来的颜色
-    
-    def update_health_color(self):
-        if self.health_score > 80: color = QColor("#4CAF50") # 健康
-        elif self.health_score > 50: color = QColor("#FFC107") # 警告
-        else: color = QColor("#D32F2F") # 危险
-        self.setBrush(QBrush(color))
+from telemetry_hub import get_hub
+from device_simulator import VibrationStationThread
+from engine.health import (COMPONENT_CHANNELS, StreamingHealth, maintenance_suggestion, create_mock_fleet,
+                           channels_from_telemetry, rule_table)
+from engine.rul import RulService, SECONDS_PER_DAY
+from engine.topology import load_topology, auto_layout
+from pages.widgets.topology_item import TopologyItem, TopologyView
+
+TOPOLOGY_FILE = 'topology.json' # 产线 → 设备 → 部件 的机群结构配置
+MONITORED_LINE = 0    # 接入实时遥测的产线
+MONITORED_MACHINE = 0 # 该产线对应的设备 (拓扑中的第一台)
+HISTORY_DAYS = 30          # 历史数据覆盖的天数，每天一个健康度记录点
+RUL_RECORD_INTERVAL = 60   # 实时设备每隔多少秒更新一次当天的健康度记录点
+RANKING_SIZE = 10
+SPECTROGRAM_ROWS = 300     # 频谱图保留的分段数 (约 30 秒)
 
 class PageHealthDiagnosis(QWidget):
     def __init__(self):
         super().__init__()
+        # 整个机群的部件按拓扑配置中的设备顺序排成一维，健康度一次向量化算出；
+        # 先用历史数据建立流式状态，之后每个遥测样本只做 O(1) 增量更新
         self._create_mock_data()
+        self.current_asset = MONITORED_MACHINE
 
         main_layout = QVBoxLayout(self); main_layout.setContentsMargins(15, 15, 15, 15)
         title = QLabel("挤出机健康诊断与预测性维护"); title.setStyleSheet("font-size: 18pt;")
@@ -56,36 +47,48 @@ class PageHealthDiagnosis(QWidget):
         splitter.setSizes([int(self.width() * 0.4), int(self.width() * 0.6)])
         main_layout.addWidget(splitter)
         
-        # 初始计算并显示健康度
+        # 初始计算并显示健康度，之后随实时遥测持续刷新
         self._calculate_all_health()
+        self._select_asset(self.current_asset)
+        self._refresh_ranking()
+        self.hub = get_hub()
+        self.subscription = self.hub.subscribe(self._on_telemetry, max_rate=1)
+        # 实时设备减速箱的振动测点：采样和频谱分析都在后台线程，GUI 只接收频谱行
+        self.vibration.spectrum_ready.connect(self._on_spectrum)
+        self.vibration.start()
 
     def _create_topology_panel(self):
         panel = QFrame(); panel.setFrameShape(QFrame.StyledPanel)
         layout = QVBoxLayout(panel)
         layout.addWidget(QLabel("设备结构拓扑"))
-        
+        asset_layout = QHBoxLayout()
+        topology = self.topology
+        self.asset_combo = QComboBox()
+        self.asset_combo.addItems([f"{topology.line_names[line]} {name}"
+                                   for line, name in zip(topology.machine_line, topology.machine_names)])
+        self.asset_combo.currentIndexChanged.connect(self._select_asset)
+        worst_button = QPushButton("查看最差设备"); worst_button.clicked.connect(self._select_worst_asset)
+        overview_button = QPushButton("全局"); overview_button.clicked.connect(lambda: self.topology_view.show_all())
+        asset_layout.addWidget(QLabel("设备:")); asset_layout.addWidget(self.asset_combo, 1)
+        asset_layout.addWidget(worst_button); asset_layout.addWidget(overview_button)
+        self.fleet_label = QLabel()
+        layout.addLayout(asset_layout); layout.addWidget(self.fleet_label)
+        self.ranking_list = QListWidget(); self.ranking_list.setMaximumHeight(160)
+        self.ranking_list.itemClicked.connect(self._on_ranking_clicked)
+        
+        # 整个机群画在一个图元中，缩放时自动切换设备级 / 部件级显示
         self.scene = QGraphicsScene(); self.scene.setBackgroundBrush(QBrush(QColor("#263238")))
-        view = QGraphicsView(self.scene)
-        
-        # 创建节点
-        self.nodes = {
-            'motor': ComponentNode("驱动电机", self.db['motor_current']),
-            'gearbox': ComponentNode("减速箱", self.db['gearbox_vibration']),
-            'heater': ComponentNode("加热器", self.db['heater_temp']),
-        }
-        self.nodes['motor'].setPos(0, 0)
-        self.nodes['gearbox'].setPos(-100, 100)
-        self.nodes['heater'].setPos(100, 100)
-        
-        # 创建连接线
-        self.scene.addItem(QGraphicsLineItem(0, 0, -100, 100))
-        self.scene.addItem(QGraphicsLineItem(0, 0, 100, 100))
-        
-        for node in self.nodes.values():
-            self.scene.addItem(node)
-            node.mousePressEvent = lambda event, n=node: self._on_node_clicked(n)
-            
-        layout.addWidget(view)
+        self.machine_pos, component_pos, line_top = auto_layout(topology)
+        self.topology_item = TopologyItem(topology, self.machine_pos, component_pos, line_top)
+        self.topology_item.component_clicked.connect(self._on_component_clicked)
+        self.topology_item.machine_clicked.connect(self.asset_combo.setCurrentIndex)
+        self.scene.addItem(self.topology_item)
+        self.scene.setSceneRect(self.topology_item.boundingRect())
+        self.topology_view = TopologyView(self.scene)
+
+        layout.addWidget(self.topology_view)
+        layout.addWidget(QLabel("距故障最近的部件"))
+        layout.addWidget(self.ranking_list)
         return panel
 
     def _create_details_panel(self):
@@ -105,94 +108,142 @@ class PageHealthDiagnosis(QWidget):
         layout.addWidget(self.health_plot)
         layout.addWidget(self.rul_label)
         layout.addWidget(self.suggestion_label)
+        layout.addWidget(self._create_spectrum_panel())
         return panel
 
+    def _create_spectrum_panel(self):
+        """实时振动频谱图 (横轴频率，纵轴时间) + 频带能量"""
+        self.vibration = VibrationStationThread(self)
+        analyzer = self.vibration.analyzer
+        self.spectrogram = np.full((SPECTROGRAM_ROWS, len(analyzer.freqs)), -120.0, dtype=np.float32)
+        self._spectrogram_row = 0
+        seconds = SPECTROGRAM_ROWS * analyzer.hop / analyzer.fs
+
+        plot = pg.PlotWidget(title=f"{self.topology.machine_names[MONITORED_MACHINE]} 减速箱振动频谱 (实时)")
+        plot.setBackground('#263238')
+        plot.setLabel('bottom', "频率", units='Hz'); plot.setLabel('left', "时间", units='s')
+        self.spectrogram_item = pg.ImageItem(axisOrder='row-major')
+        self.spectrogram_item.setLookupTable(pg.colormap.get('viridis').getLookupTable(nPts=256))
+        self.spectrogram_item.setRect(QRectF(0, -seconds, analyzer.fs / 2, seconds))
+        plot.addItem(self.spectrogram_item)
+        # 标出各分析频带
+        for _, lo, hi in analyzer.bands:
+            plot.addItem(pg.LinearRegionItem((lo, hi), movable=False, brush=(255, 255, 255, 30)))
+        self.band_label = QLabel("频带能量: --")
+        box = QFrame(); box_layout = QVBoxLayout(box); box_layout.setContentsMargins(0, 0, 0, 0)
+        box_layout.addWidget(plot); box_layout.addWidget(self.band_label)
+        return box
+
+    def _on_spectrum(self, rows, energies):
+        """新分段写入频谱图环形缓冲区，按时间顺序显示"""
+        rows = rows[-SPECTROGRAM_ROWS:]
+        slots = (self._spectrogram_row + np.arange(len(rows))) % SPECTROGRAM_ROWS
+        self.spectrogram[slots] = 10 * np.log10(rows + 1e-12)
+        self._spectrogram_row = (self._spectrogram_row + len(rows)) % SPECTROGRAM_ROWS
+        ordered = np.concatenate((self.spectrogram[self._spectrogram_row:], self.spectrogram[:self._spectrogram_row]))
+        self.spectrogram_item.setImage(ordered, autoLevels=False, levels=(-60, -10))
+        analyzer = self.vibration.analyzer
+        self.band_label.setText("频带能量: " + "，".join(
+            f"{name} {energy:.3f}" for (name, _, _), energy in zip(analyzer.bands, energies)) + " (mm/s)²")
+
     def _calculate_all_health(self):
-        """遍历所有部件并计算健康度"""
-        for node in self.nodes.values():
-            score = self._calculate_health_score(node.name, node.data)
-            node.health_score = score
-            node.update_health_color()
-
-    def _calculate_health_score(self, component_name, data):
-        """核心算法 1: 健康度评估引擎"""
-        score = 100.0
-        
-        # 1. 趋势分析 (移动平均)
-        window_size = 50
-        moving_avg = np.convolve(data, np.ones(window_size)/window_size, mode='valid')
-        if len(moving_avg) > 1 and moving_avg[-1] > moving_avg[0] * 1.1: # 如果近期平均值比早期高10%
-            score -= 20
-            
-        # 2. 波动性分析 (标准差)
-        std_dev = np.std(data)
-        if component_name == 'gearbox' and std_dev > 0.8: # 减速箱振动过大
-            score -= 30
-            
-        # 3. 峰值检测
-        max_val = np.max(data)
-        if component_name == 'heater' and max_val > 105: # 加热器曾经过热
-            score -= 25
-        if component_name == 'motor' and max_val > 15: # 电机电流过载
-            score -= 25
-        
-        return max(0, score)
+        """从流式状态读出整个机群的健康度 (一次向量化计算)，刷新拓扑图和机群概况"""
+        self.scores = self.health.scores()
+        self.machine_worst = self.topology.machine_worst(self.scores)
+        self.topology_item.set_scores(self.scores, self.machine_worst)
+        self.fleet_label.setText(f"机群 {self.topology.n_machines} 台：危险 {int((self.machine_worst <= 50).sum())} 台，"
+                                 f"警告 {int(((self.machine_worst > 50) & (self.machine_worst <= 80)).sum())} 台")
+
+    def _select_asset(self, asset):
+        """在拓扑图中选中并放大显示一台设备"""
+        self.current_asset = asset
+        self.topology_item.set_selection(machine=asset)
+        x, y = self.machine_pos[asset]
+        self.topology_view.focus_on(QPointF(x, y))
+        self.details_title.setText("请选择一个部件进行分析")
+
+    def _select_worst_asset(self):
+        self.asset_combo.setCurrentIndex(int(np.argmin(self.machine_worst)))
+
+    def _on_telemetry(self, batch):
+        records = batch[batch['line'] == MONITORED_LINE]
+        if len(records):
+            self.health.extend(channels_from_telemetry(records)[:, self._live_channels], self._live_columns)
+            self._calculate_all_health()
+            now = time.time()
+            if now - self._last_rul_record >= RUL_RECORD_INTERVAL:
+                # 只有实时设备的部件得到新记录点，下次查询时也只重新拟合这几个部件
+                self.rul.record(now, self.scores[self._live_columns], self._live_columns)
+                self._last_rul_record = now
+                self._refresh_ranking()
+
+    def _on_component_clicked(self, column):
+        """当点击拓扑图中的部件时，更新右侧面板；RUL 直接读取缓存的拟合结果"""
+        machine = int(self.topology.component_machine[column])
+        if machine != self.current_asset:
+            self.current_asset = machine
+            self.asset_combo.blockSignals(True) # 只切换选中项，不改变视图的缩放和位置
+            self.asset_combo.setCurrentIndex(machine)
+            self.asset_combo.blockSignals(False)
+        self.topology_item.set_selection(machine=machine, component=column)
+        name = self.topology.component_name(column)
+        self.details_title.setText(f"{name} - 详细分析")
 
-    def _on_node_clicked(self, node):
-        """当点击拓扑图节点时，更新右侧面板"""
-        self.details_title.setText(f"{node.name} - 详细分析")
-        
         # --- 核心算法 2: RUL 预测 (线性回归) ---
-        # 模拟历史健康度（假设健康度随时间线性下降）
-        time_points = np.arange(10)
-        historical_scores = np.linspace(node.health_score + random.randint(5, 15), node.health_score, 10)
-        
-        # 简单线性回归: y = mx + c
-        x = time_points
-        y = historical_scores
-        m, c = np.polyfit(x, y, 1)
-
-        rul_days = "N/A"
-        if m < 0: # 只有在下降趋势时才预测
-            fault_threshold = 20 # 假设健康度低于20为故障
-            days_to_fault = (fault_threshold - c) / m
-            remaining_days = days_to_fault - len(time_points)
-            if remaining_days > 0:
-                rul_days = f"{remaining_days:.1f} 天"
-        
+        now = time.time()
+        rul = self.rul.rul(now, [column])[0]
+        rul_days = "N/A" if np.isinf(rul) else f"{rul:.1f} 天"
         self.rul_label.setText(f"<b>预测剩余寿命 (RUL):</b> {rul_days}")
 
-        # 更新图表
+        # 更新图表：横轴为相对今天的天数
+        today = self.rul.day_of(now)
+        x, y = self.rul.history(column)
         self.health_plot.clear()
-        self.health_plot.setTitle(f"{node.name} 历史健康度趋势")
-        self.health_plot.plot(x, y, pen='c', symbol='o', name='历史健康度')
-        if m < 0: # 绘制预测趋势线
-            predict_x = np.arange(int(days_to_fault) + 1)
-            predict_y = m * predict_x + c
-            self.health_plot.plot(predict_x, predict_y, pen=pg.mkPen('r', style=Qt.DotLine), name='预测趋势')
+        self.health_plot.setTitle(f"{name} 历史健康度趋势")
+        self.health_plot.plot(x - today, y, pen='c', symbol='o', name='历史健康度')
+        m, c = self.rul.slope[column], self.rul.intercept[column]
+        if np.isfinite(rul): # 绘制预测趋势线
+            predict_x = np.array([x[0], today + rul])
+            self.health_plot.plot(predict_x - today, m * predict_x + c, pen=pg.mkPen('r', style=Qt.DotLine), name='预测趋势')
         self.health_plot.addLegend()
 
         # 生成维护建议
-        if node.health_score < 50:
-            suggestion = "立即检查，计划更换"
-        elif node.health_score < 80:
-            suggestion = "增加检查频率，注意异常"
-        else:
-            suggestion = "状态良好，按计划维护"
-        self.suggestion_label.setText(f"<b>维护建议:</b> {suggestion}")
+        self.suggestion_label.setText(f"<b>维护建议:</b> {maintenance_suggestion(float(self.scores[column]))}")
+
+    def _refresh_ranking(self):
+        """全机群距故障最近的部件：排名只读拟合缓存，代价与部件数成线性且很小"""
+        self.ranking = self.rul.ranking(time.time(), RANKING_SIZE)
+        rul = self.rul.rul(time.time(), self.ranking)
+        self.ranking_list.clear()
+        for column, days in zip(self.ranking, rul):
+            self.ranking_list.addItem(f"{self.topology.component_name(column)}  剩余 {days:.1f} 天")
+
+    def _on_ranking_clicked(self, item):
+        column = int(self.ranking[self.ranking_list.row(item)])
+        self.asset_combo.setCurrentIndex(int(self.topology.component_machine[column]))
+        self._on_component_clicked(column)
 
     def _create_mock_data(self):
-        """模拟设备各部件在过去一段时间的传感器数据"""
-        n_points = 1000
-        self.db = {
-            # 驱动电机电流 (A)，正常10A，后期有上升趋势
-            'motor_current': 10 + np.linspace(0, 3, n_points) + np.random.randn(n_points) * 0.5,
-            # 减速箱振动 (mm/s)，正常<0.5，后期波动变大
-            'gearbox_vibration': 0.3 + np.linspace(0, 0.8, n_points)**2 + np.random.randn(n_points) * 0.2,
-            # 加热器温度 (°C)，正常90°C，有几次过热峰值
-            'heater_temp': 90 + np.random.randn(n_points) * 1.5
-        }
-        # 制造峰值
-        self.db['heater_temp'][300] = 108
-        self.db['heater_temp'][700] = 106
-      
\ No newline at end of file
+        """按拓扑配置模拟机群各部件在过去一段时间的传感器数据"""
+        self.topology = topology = load_topology(TOPOLOGY_FILE)
+        kinds = topology.kinds
+        kind_index = np.array([list(COMPONENT_CHANNELS).index(kind) for kind in kinds], dtype=np.int64)
+        # 模拟数据按 设备 × 全部部件类型 生成，只取出拓扑中实际配置的部件
+        _, _, data = create_mock_fleet(topology.n_machines)
+        data = data[topology.component_machine * len(COMPONENT_CHANNELS) + kind_index]
+        # 实时设备的部件列，以及它们在 channels_from_telemetry 结果中对应的通道
+        self._live_columns = topology.machine_components(MONITORED_MACHINE)
+        self._live_channels = kind_index[self._live_columns]
+        self.health = StreamingHealth(rule_table(kinds))
+        # 历史数据按天分段加入，每段结束时记录一次全机群的健康度，作为 RUL 拟合的历史
+        self.rul = RulService(len(kinds))
+        now = time.time()
+        for day, chunk in enumerate(np.array_split(data.T, HISTORY_DAYS)):
+            self.health.extend(chunk)
+            self.rul.record(now - (HISTORY_DAYS - 1 - day) * SECONDS_PER_DAY, self.health.scores())
+        self._last_rul_record = now
+
+    def closeEvent(self, event):
+        self.hub.unsubscribe(self.subscription)
+        self.vibration.stop()
+        super().closeEvent(event)
@@ -1,20 +1,36 @@
 # pages/page_orders.py
-from functools import partial
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QPushButton, QProgressBar, QDialog, QMessageBox)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor
-
-# 导入共享的模拟器线程和新的弹窗
-from device_simulator import LineSimulatorThread
+import time
+import numpy as np
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView,
+                             QHeaderView, QPushButton, QMessageBox)
+
+# 导入全局遥测中心和新的弹窗
+from telemetry_hub import get_hub
+from persistence import get_database
+from engine.telemetry import status_segments, format_time
+from engine.order_store import OrderStore
+from engine.eta import EtaForecaster, OUTPUT_PER_SPEED
 from .widgets.snapshot_dialog import SnapshotDialog
+from .widgets.order_table_model import OrderTableModel, ProgressDelegate, COL_PROGRESS, COL_ACTIONS
+from .widgets.table_delegates import ActionsDelegate
+
+DEFAULT_LEAD_TIME = 24 * 3600 # 新建工单的默认交期 (秒)
+CLOSED_ORDERS_ON_START = 200  # 启动时加载的已结工单数量，更早的只保留在数据库中
+
+def line_device_id(line):
+    """遥测记录中的产线编号 -> 工单使用的设备编号 (0 -> LINE-A)"""
+    return f"LINE-{chr(ord('A') + int(line))}"
 
 class PageOrders(QWidget):
     def __init__(self):
         super().__init__()
         
-        self.orders_data = self._create_mock_data()
-        self.active_order_id = None
+        self.db = get_database()
+        self.store = OrderStore(self._load_orders())
+        self.next_order_number = self.db.count('orders') + 1
+        # 产线 device_id -> 正在生产的工单 id；上次退出时仍在生产的工单继续生产
+        self.active_orders = {order['device_id']: order['id'] for order in self.store if order['status'] == '生产中'}
+        self.forecaster = EtaForecaster(self.store)
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -27,109 +43,96 @@ class PageOrders(QWidget):
         controls_layout.addStretch()
         main_layout.addLayout(controls_layout)
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(["工单ID", "产品名称", "计划数量", "完成进度", "状态", "关联设备", "操作"])
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        # 模型/视图：只绘制可见行，进度和操作列由委托绘制
+        self.model = OrderTableModel(self.store, self, eta=self._order_eta)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(32)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(COL_ACTIONS, QHeaderView.ResizeToContents)
+        self.table.setItemDelegateForColumn(COL_PROGRESS, ProgressDelegate(self.table))
+        self.actions_delegate = ActionsDelegate(self.table)
+        self.actions_delegate.button_clicked.connect(self._on_action_clicked)
+        self.table.setItemDelegateForColumn(COL_ACTIONS, self.actions_delegate)
         main_layout.addWidget(self.table)
         
-        # 连接到同一个模拟器实例 (注意: 这是一个简化的单例模式)
-        # 在真实应用中，应该有一个全局的管理器来提供这个实例
-        # 这里我们为演示方便，每次都创建一个新的
-        self.simulator = LineSimulatorThread(self)
-        self.simulator.data_updated.connect(self._update_from_simulator)
-        self.simulator.start()
-
-        self._populate_table()
-
-    def _update_from_simulator(self, data):
-        """核心逻辑：根据模拟器状态实时更新工单进度"""
-        line_status = data.get('line_status')
-        
-        if line_status == 'running':
-            # 如果产线在运行，激活一个待处理的工单
-            if not self.active_order_id:
-                pending_order = next((o for o in self.orders_data if o['status'] == '待处理'), None)
-                if pending_order:
-                    self.active_order_id = pending_order['id']
-                    pending_order['status'] = '生产中'
-                    # 捕获开始生产时的快照
-                    pending_order['snapshot'] = {
-                        "开始时间": data['timestamp'],
-                        "挤出机温度": f"{data['devices']['extruder']['temp']:.2f} °C",
-                        "挤出机压力": f"{data['devices']['extruder']['pressure']:.2f} MPa",
-                        "牵引速度": f"{data['devices']['tractor']['speed']:.2f} m/min"
-                    }
+        # 订阅全局遥测中心，与其他页面共享同一条产线状态
+        self.hub = get_hub()
+        self.subscription = self.hub.subscribe(self._update_from_simulator)
+
+    def _update_from_simulator(self, batch):
+        """核心逻辑：根据模拟器状态实时更新工单进度 (按产线、按状态片段批量处理，只刷新变化的行)"""
+        self._changed_ids = set()
+        lines = batch['line']
+        for line in np.unique(lines):
+            line_batch = batch if lines[0] == lines[-1] == line else batch[lines == line]
+            line_id = line_device_id(line)
+            self.forecaster.update(line_id, line_batch)
+            for line_status, segment in status_segments(line_batch):
+                if line_status == 'running':
+                    self._apply_running_segment(line_id, segment)
+                elif line_status in ['idle', 'stopped', 'fault']:
+                    # 如果产线停止，则暂停该产线上的当前工单
+                    active_order = self.store.get(self.active_orders.pop(line_id, None))
+                    if active_order and active_order['status'] == '生产中':
+                        self.store.set_status(active_order['id'], '已暂停' if line_status != 'fault' else '故障暂停')
+                        self._changed_ids.add(active_order['id'])
+
+        self.model.orders_changed(self._changed_ids)
+        self.model.eta_changed()
+        # 只标记为待写入，由数据库定时器合并成一次事务提交
+        for order_id in self._changed_ids:
+            self.db.save_order(self.store.get(order_id))
+
+    def _apply_running_segment(self, line_id, segment):
+        """把一段连续运行的记录累加到工单进度上；工单完成后从下一条记录起派发下一个工单"""
+        # 假设速度单位是m/min，每条记录对应一秒的产量
+        production = np.cumsum(segment['tractor_speed'].astype(np.float64) * OUTPUT_PER_SPEED)
+        start = 0
+        while start < len(segment):
+            active_order = self.store.get(self.active_orders.get(line_id))
+            if active_order is None:
+                # 如果产线在运行，从优先队列中派发交期最早的待处理工单
+                active_order = self.store.dispatch(line_id)
+                if active_order is None:
+                    return
+                self.active_orders[line_id] = active_order['id']
+                # 捕获开始生产时的快照
+                record = segment[start]
+                active_order['snapshot'] = {
+                    "开始时间": format_time(record['ts']),
+                    "挤出机温度": f"{record['extruder_temp']:.2f} °C",
+                    "挤出机压力": f"{record['extruder_pressure']:.2f} MPa",
+                    "牵引速度": f"{record['tractor_speed']:.2f} m/min"
+                }
+                self.db.save_snapshot(active_order['id'], active_order['snapshot'], float(record['ts']))
 
             # 更新正在生产的工单进度
-            active_order = next((o for o in self.orders_data if o['id'] == self.active_order_id), None)
-            if active_order:
-                # 模拟产量增加
-                production_per_tick = data['devices']['tractor']['speed'] / 60 * 10 # 假设速度单位是m/min，每秒产量
-                active_order['quantity_done'] = min(active_order['quantity_plan'], active_order['quantity_done'] + production_per_tick)
-                
-                if active_order['quantity_done'] >= active_order['quantity_plan']:
-                    active_order['status'] = '已完成'
-                    self.active_order_id = None # 生产完成，重置激活工单
-                    
-        elif line_status in ['idle', 'stopped', 'fault']:
-            # 如果产线停止，则暂停当前工单
-            if self.active_order_id:
-                active_order = next((o for o in self.orders_data if o['id'] == self.active_order_id), None)
-                if active_order and active_order['status'] == '生产中':
-                    active_order['status'] = '已暂停' if line_status != 'fault' else '故障暂停'
-                self.active_order_id = None # 重置激活工an Dan
-
-        self._populate_table() # 每次接收到数据都刷新表格
-
-    def _populate_table(self):
-        self.table.setRowCount(len(self.orders_data))
-        status_colors = {
-            "待处理": QColor("#B0BEC5"), "生产中": QColor("#00BCD4"), 
-            "已完成": QColor("#4CAF50"), "已取消": QColor("#F44336"),
-            "已暂停": QColor("#FFC107"), "故障暂停": QColor("#D32F2F"),
-        }
-        
-        for row, order in enumerate(self.orders_data):
-            # ... (填充前几列)
-            self.table.setItem(row, 0, QTableWidgetItem(order["id"]))
-            self.table.setItem(row, 1, QTableWidgetItem(order["product"]))
-            self.table.setItem(row, 2, QTableWidgetItem(f"{order['quantity_plan']} 米"))
-            
-            progress = QProgressBar(); 
-            percentage = (order["quantity_done"] / order["quantity_plan"]) * 100 if order["quantity_plan"] > 0 else 0
-            progress.setValue(int(percentage))
-            progress.setFormat(f"{int(order['quantity_done'])} / {order['quantity_plan']}")
-            progress.setAlignment(Qt.AlignCenter); 
-            self.table.setCellWidget(row, 3, progress)
-            
-            status_item = QTableWidgetItem(order["status"])
-            status_item.setBackground(status_colors.get(order["status"], QColor("white")))
-            self.table.setItem(row, 4, status_item)
-            
-            self.table.setItem(row, 5, QTableWidgetItem(order["device_id"]))
-            
-            # 操作按钮
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            snapshot_button = QPushButton("生产快照")
-            cancel_button = QPushButton("取消工单")
-            
-            snapshot_button.clicked.connect(partial(self._show_snapshot, order["id"]))
-            cancel_button.clicked.connect(partial(self._cancel_order, order["id"]))
-            
-            actions_layout.addWidget(snapshot_button)
-            actions_layout.addWidget(cancel_button)
-            actions_layout.setContentsMargins(0,0,0,0)
-            self.table.setCellWidget(row, 6, actions_widget)
+            self._changed_ids.add(active_order['id'])
+            produced_before = production[start - 1] if start > 0 else 0.0
+            remaining = active_order['quantity_plan'] - active_order['quantity_done']
+            finish = int(np.searchsorted(production, produced_before + remaining))
+            if finish >= len(segment):
+                active_order['quantity_done'] += float(production[-1] - produced_before)
+                return
+            active_order['quantity_done'] = active_order['quantity_plan']
+            self.store.set_status(active_order['id'], '已完成')
+            del self.active_orders[line_id] # 生产完成，释放产线
+            start = finish + 1
 
+    def _order_eta(self, order_id):
+        return self.forecaster.eta(order_id, self.active_orders)
+
+    def _on_action_clicked(self, row, label):
+        order_id = self.model.order_at(row)['id']
+        if label == "生产快照": self._show_snapshot(order_id)
+        else: self._cancel_order(order_id)
 
     def _show_snapshot(self, order_id):
-        order = next((o for o in self.orders_data if o['id'] == order_id), None)
+        order = self.store.get(order_id)
         if order and 'snapshot' in order:
             dialog = SnapshotDialog(self, snapshot_data=order['snapshot'])
             dialog.exec_()
@@ -137,30 +140,46 @@ class PageOrders(QWidget):
             QMessageBox.information(self, "无快照", "该工单尚未开始生产，没有可用的过程快照。")
 
     def _cancel_order(self, order_id):
-        order = next((o for o in self.orders_data if o['id'] == order_id), None)
+        order = self.store.get(order_id)
         if order and order['status'] not in ['已完成', '已取消']:
             reply = QMessageBox.question(self, "确认取消", f"确定要取消工单 {order_id} 吗?", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                order['status'] = '已取消'
-                if self.active_order_id == order_id:
-                    self.active_order_id = None
-                self._populate_table()
+                self.store.set_status(order_id, '已取消')
+                if self.active_orders.get(order['device_id']) == order_id:
+                    del self.active_orders[order['device_id']]
+                self.model.orders_changed([order_id])
+                self.db.save_order(order)
 
     def _add_new_order(self):
         # 简化版的新建工单
-        new_id = f"WO-SIM-{len(self.orders_data) + 1:03d}"
-        self.orders_data.append({
-            "id": new_id, "product": "5mm 滴灌管 (模拟)", "quantity_plan": 5000, 
-            "quantity_done": 0, "status": "待处理", "device_id": "LINE-A"
-        })
-        self._populate_table()
+        new_order = {
+            "id": f"WO-SIM-{self.next_order_number:03d}", "product": "5mm 滴灌管 (模拟)", "quantity_plan": 5000, 
+            "quantity_done": 0, "status": "待处理", "device_id": "LINE-A",
+            "due": time.time() + DEFAULT_LEAD_TIME, "priority": 0
+        }
+        self.next_order_number += 1
+        self.model.append_order(new_order)
+        self.db.save_order(new_order)
+
+    def _load_orders(self):
+        """从数据库加载未结工单和最近的已结工单；首次运行时写入示例数据"""
+        orders = self.db.load_orders(closed_limit=CLOSED_ORDERS_ON_START)
+        if not orders and self.db.count('orders') == 0:
+            orders = self._create_mock_data()
+            for order in orders:
+                self.db.save_order(order)
+            self.db.flush()
+        return orders
 
     def _create_mock_data(self):
+        now = time.time()
         return [
-            {"id": "WO-SIM-001", "product": "5mm 滴灌管", "quantity_plan": 10000, "quantity_done": 0, "status": "待处理", "device_id": "LINE-A"},
-            {"id": "WO-SIM-002", "product": "8mm PE管", "quantity_plan": 8000, "quantity_done": 0, "status": "待处理", "device_id": "LINE-A"},
+            {"id": "WO-SIM-001", "product": "5mm 滴灌管", "quantity_plan": 10000, "quantity_done": 0, "status": "待处理", "device_id": "LINE-A",
+             "due": now + 8 * 3600, "priority": 1},
+            {"id": "WO-SIM-002", "product": "8mm PE管", "quantity_plan": 8000, "quantity_done": 0, "status": "待处理", "device_id": "LINE-A",
+             "due": now + DEFAULT_LEAD_TIME, "priority": 0},
         ]
         
     def closeEvent(self, event):
-        self.simulator.stop()
+        self.hub.unsubscribe(self.subscription)
         super().closeEvent(event)
\ No newline at end of file
@@ -1,20 +1,48 @@
 # pages/page_quality_vision.py
-import random
+import time
 from datetime import datetime
 from functools import partial
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QAbstractItemView, QComboBox,
                              QHeaderView, QPushButton, QSplitter, QGraphicsView, QGraphicsScene, 
                              QMessageBox, QDialog)
-from PyQt5.QtCore import Qt, QTimer, QRectF
+from PyQt5.QtCore import Qt, QRectF
 from PyQt5.QtGui import QColor, QBrush, QPen
 
+from persistence import get_database
+from telemetry_hub import get_hub
+from device_simulator import CameraStationThread
+from engine.ring_buffer import FrameRing
+from engine.defect_store import DefectStore, STATUSES, TYPES
+from engine.defect_stats import DefectStats
 from .widgets.defect_dialog import DefectDialog
+from .widgets.frame_item import FrameItem, OverlayPool
+from .widgets.defect_table_model import DefectTableModel, COL_ACTIONS
+from .widgets.table_delegates import ActionsDelegate
+
+DEFECT_PAGE_SIZE = 200 # 每次从数据库加载的缺陷样本数量
+FRAME_HISTORY = 300    # 保留的最近相机帧数 (5 fps 下约 1 分钟)
+INSPECTED_LINE = 0     # 视觉工位所在的产线，按它的产量计算每千米缺陷率
+TIME_WINDOWS = [("全部时间", None), ("最近1小时", 3600), ("最近8小时", 8 * 3600), ("最近24小时", 24 * 3600)]
 
 class PageQualityVision(QWidget):
     def __init__(self):
         super().__init__()
-        self.defects_data = self._create_mock_data()
-        self.next_defect_id = len(self.defects_data) + 1
+        self.db = get_database()
+        # 视觉工位与帧缓冲区：最近的帧及其检测框按帧号保存，高亮历史缺陷时直接取用
+        self.camera = CameraStationThread(self)
+        # 热力图和滚动缺陷率随 store 中样本的增删改增量更新
+        self.stats = DefectStats(frame_size=(self.camera.generator.width, self.camera.generator.height))
+        self.store = DefectStore(stats=self.stats)
+        self._db_cursor = None # 已加载的最早一条样本 (ts, id)，None 表示数据库中没有更早的样本
+        self._load_defects()
+        self.next_defect_id = self.db.max_defect_number() + 1
+        self._last_output = None # 上一批遥测末尾的 (模式, 累计产量)
+        frame_shape = (self.camera.generator.height, self.camera.generator.width)
+        self.frames = FrameRing(FRAME_HISTORY, frame_shape)
+        self.frame_boxes = [()] * FRAME_HISTORY
+        self.held_frame = None # 正在查看的历史帧 (副本)，为 None 时显示实时画面
         
         main_layout = QVBoxLayout(self)
         splitter = QSplitter(Qt.Vertical)
@@ -29,21 +57,58 @@ class PageQualityVision(QWidget):
         splitter.setSizes([int(self.height() * 0.4), int(self.height() * 0.6)])
         main_layout.addWidget(splitter)
         
-        # 启动模拟器
-        self.sim_timer = QTimer(self)
-        self.sim_timer.timeout.connect(self._simulate_vision_feed)
-        self.sim_timer.start(2000) # 每2秒模拟一次检测
+        # 启动视觉工位：合成相机帧在后台线程池中检测，结果回到GUI线程
+        self.camera.frame_ready.connect(self._on_frame)
+        self.camera.stats_ready.connect(self._on_stats)
+        self.camera.start()
+        self.hub = get_hub()
+        self.subscription = self.hub.subscribe(self._on_telemetry, max_rate=1)
 
     def _create_vision_panel(self):
         panel = QWidget()
         layout = QVBoxLayout(panel)
+        title_layout = QHBoxLayout()
         title = QLabel("在线视觉检测"); title.setStyleSheet("font-size: 16pt;")
+        self.fps_label = QLabel("处理帧率: --")
+        self.frame_label = QLabel("实时画面")
+        self.live_button = QPushButton("返回实时画面"); self.live_button.clicked.connect(self._resume_live)
+        self.live_button.setEnabled(False)
+        title_layout.addWidget(title); title_layout.addStretch()
+        title_layout.addWidget(self.frame_label); title_layout.addWidget(self.live_button); title_layout.addWidget(self.fps_label)
         
         self.scene = QGraphicsScene()
         self.scene.setBackgroundBrush(QBrush(QColor("#263238")))
         self.view = QGraphicsView(self.scene)
+        # 场景中的图元只创建一次：图像图元 + 两组可复用的标记框
+        height, width = self.frames.frames.shape[1:]
+        self.scene.setSceneRect(QRectF(0, 0, width, height))
+        self.frame_item = FrameItem(width, height)
+        self.scene.addItem(self.frame_item)
+        self.defect_boxes = OverlayPool(self.scene, QPen(Qt.red, 2))
+        self.highlight_box = OverlayPool(self.scene, QPen(Qt.cyan, 3), z_value=2)
         
-        layout.addWidget(title); layout.addWidget(self.view)
+        view_layout = QHBoxLayout()
+        view_layout.addWidget(self.view, 3); view_layout.addWidget(self._create_stats_panel(), 2)
+        layout.addLayout(title_layout); layout.addLayout(view_layout)
+        return panel
+
+    def _create_stats_panel(self):
+        """缺陷位置热力图 + 各类型滚动缺陷率"""
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        self.heatmap_type = QComboBox(); self.heatmap_type.addItems(["全部类型", *TYPES])
+        self.heatmap_type.currentIndexChanged.connect(self._refresh_stats)
+        heatmap_plot = pg.PlotWidget(title="缺陷位置分布")
+        heatmap_plot.setAspectLocked(True); heatmap_plot.invertY(True)
+        self.heatmap_item = pg.ImageItem(axisOrder='row-major')
+        self.heatmap_item.setLookupTable(pg.colormap.get('inferno').getLookupTable(nPts=256))
+        # 图像按像素坐标铺满画面尺寸，与实时画面的坐标一致
+        width, height = self.stats.frame_size
+        self.heatmap_item.setRect(QRectF(0, 0, width, height))
+        heatmap_plot.addItem(self.heatmap_item)
+        self.rates_label = QLabel()
+        layout.addWidget(self.heatmap_type); layout.addWidget(heatmap_plot); layout.addWidget(self.rates_label)
+        self._refresh_stats()
         return panel
 
     def _create_workbench_panel(self):
@@ -53,134 +118,280 @@ class PageQualityVision(QWidget):
         controls_layout = QHBoxLayout()
         controls_layout.addWidget(QLabel("缺陷样本管理工作台"))
         controls_layout.addStretch()
+        # 过滤条件：状态 / 类型 / 时间范围
+        self.status_filter = QComboBox(); self.status_filter.addItems(["全部状态", *STATUSES])
+        self.type_filter = QComboBox(); self.type_filter.addItems(["全部类型", *TYPES])
+        self.time_filter = QComboBox(); self.time_filter.addItems([name for name, _ in TIME_WINDOWS])
+        for combo in (self.status_filter, self.type_filter, self.time_filter):
+            combo.currentIndexChanged.connect(self._apply_filter)
+            controls_layout.addWidget(combo)
+        self.match_label = QLabel()
+        controls_layout.addWidget(self.match_label)
         add_button = QPushButton("＋ 手动添加样本"); add_button.clicked.connect(self._add_defect)
         controls_layout.addWidget(add_button)
+
+        # 批量操作：作用于表格中选中的全部行，一次提交
+        bulk_layout = QHBoxLayout()
+        select_all_button = QPushButton("全选匹配项"); select_all_button.clicked.connect(self._select_all_matches)
+        confirm_button = QPushButton("批量确认"); confirm_button.clicked.connect(partial(self._bulk_update, status="已确认"))
+        ignore_button = QPushButton("批量忽略"); ignore_button.clicked.connect(partial(self._bulk_update, status="已忽略"))
+        self.bulk_type = QComboBox(); self.bulk_type.addItems(TYPES)
+        retype_button = QPushButton("批量改类型"); retype_button.clicked.connect(self._bulk_retype)
+        delete_button = QPushButton("批量删除"); delete_button.clicked.connect(self._bulk_delete)
+        self.selection_label = QLabel("已选 0 条")
+        for widget in (select_all_button, self.selection_label, confirm_button, ignore_button, self.bulk_type, retype_button, delete_button):
+            bulk_layout.addWidget(widget)
+        bulk_layout.addStretch()
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["ID", "时间", "类型", "状态", "备注", "操作"])
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.itemClicked.connect(self._highlight_defect_in_vision)
+        # 模型/视图：行按需加载，操作按钮由委托绘制
+        self.model = DefectTableModel(self.store, self, fetch_older=self._fetch_older_defects)
+        self.model.rowsInserted.connect(self._update_match_label)
+        self.model.rowsRemoved.connect(self._update_match_label)
+        self.model.modelReset.connect(self._update_match_label)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(COL_ACTIONS, QHeaderView.ResizeToContents)
+        self.actions_delegate = ActionsDelegate(self.table, button_width=48, max_buttons=4)
+        self.actions_delegate.button_clicked.connect(self._on_action_clicked)
+        self.table.setItemDelegateForColumn(COL_ACTIONS, self.actions_delegate)
+        self.table.clicked.connect(self._highlight_defect_in_vision)
+        self.table.selectionModel().selectionChanged.connect(self._update_selection_label)
+        self._update_match_label()
         
         layout.addLayout(controls_layout)
+        layout.addLayout(bulk_layout)
         layout.addWidget(self.table)
-        self._populate_table()
         return panel
 
-    def _simulate_vision_feed(self):
-        """核心逻辑：模拟实时视觉流和缺陷检测"""
-        self.scene.clear()
-        
-        # 模拟产品图像 (一个灰色长方形)
-        pipe_image = self.scene.addRect(0, 0, 400, 100, brush=QBrush(Qt.gray))
-        
-        # 随机决定是否生成缺陷
-        if random.random() < 0.3: # 30%的概率产生缺陷
-            defect_x = random.randint(50, 350)
-            defect_y = random.randint(20, 80)
-            defect_size = random.randint(10, 20)
-            
-            # 在图像上绘制红色标记框
-            defect_box = self.scene.addRect(defect_x, defect_y, defect_size, defect_size, pen=QPen(Qt.red, 3))
-            
+    def _apply_filter(self):
+        window = TIME_WINDOWS[self.time_filter.currentIndex()][1]
+        self.model.set_filter(
+            status=self.status_filter.currentText() if self.status_filter.currentIndex() > 0 else None,
+            type=self.type_filter.currentText() if self.type_filter.currentIndex() > 0 else None,
+            since=time.time() - window if window else None,
+        )
+
+    def _update_match_label(self):
+        self.match_label.setText(f"已加载 {len(self.store)} 条，匹配 {self.model.match_count} 条")
+
+    def _on_frame(self, frame, detections):
+        """核心逻辑：显示最新一帧，并把检测到的缺陷加入工作台"""
+        frame_no = self.frames.put(frame)
+        self.frame_boxes[frame_no % FRAME_HISTORY] = tuple(d["bbox"] for d in detections)
+        if self.held_frame is None:
+            self._show_frame(self.frames.get(frame_no), self.frame_boxes[frame_no % FRAME_HISTORY])
+        if not detections:
+            return
+        for detection in detections:
             # 自动添加一条新的缺陷记录
             new_defect = {
-                "id": f"DEF-{self.next_defect_id:04d}",
+                "id": self._allocate_defect_id("DEF"),
+                "ts": time.time(),
                 "time": datetime.now().strftime("%H:%M:%S"),
-                "type": random.choice(["划痕", "斑点", "凹陷"]),
+                "type": detection["type"],
                 "status": "待复判",
-                "desc": "系统自动检测",
-                "pos": (defect_x, defect_y, defect_size) # 存储位置信息
+                "desc": f"系统自动检测 (面积 {detection['area']} px, 对比度 {detection['contrast']:.0f})",
+                "pos": detection["bbox"], # 存储位置信息 (x, y, w, h)
+                "frame": frame_no # 帧缓冲区中的帧号，不写入数据库
             }
-            self.defects_data.insert(0, new_defect)
+            self._insert_defect(new_defect)
+
+    def _allocate_defect_id(self, prefix):
+        """取下一个空闲编号；手动录入的样本可能已占用计数器之后的编号，跳过 store 或数据库中已存在的 id"""
+        while True:
+            defect_id = f"{prefix}-{self.next_defect_id:04d}"
             self.next_defect_id += 1
-            self._populate_table()
-            
-    def _populate_table(self):
-        self.table.setRowCount(len(self.defects_data))
-        status_colors = {"待复判": QColor("#FFC107"), "已确认": QColor("#4CAF50"), "已忽略": QColor("#9E9E9E")}
-        
-        for row, defect in enumerate(self.defects_data):
-            self.table.setItem(row, 0, QTableWidgetItem(defect["id"]))
-            self.table.setItem(row, 1, QTableWidgetItem(defect["time"]))
-            self.table.setItem(row, 2, QTableWidgetItem(defect["type"]))
-            
-            status_item = QTableWidgetItem(defect["status"])
-            status_item.setBackground(status_colors.get(defect["status"], QColor("white")))
-            self.table.setItem(row, 3, status_item)
+            if defect_id not in self.store and not self.db.has_defect(defect_id):
+                return defect_id
+
+    def _insert_defect(self, defect):
+        """新增样本；id 重复时 store.add 抛出 ValueError，已有样本不会被覆盖"""
+        self.model.defect_added(self.store.add(defect))
+        self.db.save_defect(defect)
+
+    def _on_stats(self, fps, capacity_fps):
+        self.fps_label.setText(f"处理帧率: {fps:.1f} fps (检测能力约 {capacity_fps:.0f} fps)")
+
+    def _on_telemetry(self, batch):
+        """累计视觉工位所在产线的产量；模式切换时累计产量会跳变，跨模式的增量不计入"""
+        records = batch[batch['line'] == INSPECTED_LINE]
+        if not len(records):
+            return
+        modes, output = records['mode'], records['total_output']
+        if self._last_output is not None:
+            modes = np.concatenate(([self._last_output[0]], modes))
+            output = np.concatenate(([self._last_output[1]], output))
+        steps = np.diff(output)
+        meters = steps[(modes[1:] == modes[:-1]) & (steps > 0)].sum()
+        self._last_output = (modes[-1], output[-1])
+        if meters > 0:
+            self.stats.add_output(time.time(), meters)
+        self._refresh_stats()
+
+    def _refresh_stats(self):
+        selected = self.heatmap_type.currentIndex() > 0
+        grid = self.stats.grid(self.store.types.lookup(self.heatmap_type.currentText()) if selected else None)
+        self.heatmap_item.setImage(grid, autoLevels=False, levels=(0, max(1, grid.max())))
+        per_minute, per_km = self.stats.rates(time.time())
+        lines = [f"近 {self.stats.window} 分钟缺陷率："]
+        for name in TYPES:
+            i = self.store.types.lookup(name)
+            text = f"{name}: {per_minute[i]:.2f} /分钟"
+            if per_km is not None:
+                text += f"，{per_km[i]:.1f} /千米"
+            lines.append(text)
+        self.rates_label.setText("\n".join(lines))
+
+    def _show_frame(self, frame, boxes, highlight=None):
+        """切换显示的帧并移动标记框，不重建场景"""
+        self.frame_item.set_frame(frame)
+        self.defect_boxes.show_boxes(boxes)
+        self.highlight_box.show_boxes([highlight] if highlight else [])
+
+    def _resume_live(self):
+        self.held_frame = None
+        self.live_button.setEnabled(False)
+        self.frame_label.setText("实时画面")
+        latest = self.frames.latest_no
+        if latest is not None:
+            self._show_frame(self.frames.get(latest), self.frame_boxes[latest % FRAME_HISTORY])
             
-            self.table.setItem(row, 4, QTableWidgetItem(defect["desc"]))
-            self._create_action_buttons(row, defect)
+    def _selected_indexes(self):
+        """选中行对应的 store 下标；按选择区间展开，不逐个创建 QModelIndex"""
+        ranges = [np.arange(r.top(), r.bottom() + 1) for r in self.table.selectionModel().selection()]
+        if not ranges:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(self.model.indexes_at(np.concatenate(ranges)))
 
-    def _create_action_buttons(self, row, defect):
-        widget = QWidget()
-        layout = QHBoxLayout(widget); layout.setContentsMargins(0,0,0,0)
-        
-        edit_button = QPushButton("编辑"); edit_button.clicked.connect(partial(self._edit_defect, defect["id"]))
-        delete_button = QPushButton("删除"); delete_button.clicked.connect(partial(self._delete_defect, defect["id"]))
-        
+    def _update_selection_label(self):
+        self.selection_label.setText(f"已选 {len(self._selected_indexes())} 条")
+
+    def _select_all_matches(self):
+        self.model.show_all()
+        self.table.selectAll()
+
+    def _bulk_update(self, **fields):
+        """批量修改状态或类型：一次向量化更新 + 一次表格刷新 + 一个数据库事务"""
+        indexes = self._selected_indexes()
+        if not len(indexes):
+            return
+        self.db.save_defects(self.store.update_many(indexes, **fields))
+        self.db.flush()
+        self.model.defects_changed()
+
+    def _bulk_retype(self):
+        self._bulk_update(type=self.bulk_type.currentText())
+
+    def _bulk_delete(self):
+        indexes = self._selected_indexes()
+        if not len(indexes):
+            return
+        reply = QMessageBox.question(self, "确认删除", f"确定删除选中的 {len(indexes)} 个样本？", QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        self.db.delete_defects(self.store.remove_many(indexes))
+        self.model.defects_removed(indexes)
+        self.db.flush()
+        self._update_selection_label()
+
+    def _on_action_clicked(self, row, label):
+        defect_id = self.model.defect_at(row)["id"]
+        if label == "编辑": self._edit_defect(defect_id)
+        elif label == "删除": self._delete_defect(defect_id)
         # 核心业务逻辑：状态流转
-        confirm_button = QPushButton("确认"); confirm_button.clicked.connect(partial(self._change_status, defect["id"], "已确认"))
-        ignore_button = QPushButton("忽略"); ignore_button.clicked.connect(partial(self._change_status, defect["id"], "已忽略"))
-        
-        layout.addWidget(edit_button); layout.addWidget(delete_button)
-        # 只有“待复判”状态下才显示确认和忽略按钮
-        if defect["status"] == "待复判":
-            layout.addWidget(confirm_button); layout.addWidget(ignore_button)
-            
-        self.table.setCellWidget(row, 5, widget)
+        elif label == "确认": self._change_status(defect_id, "已确认")
+        elif label == "忽略": self._change_status(defect_id, "已忽略")
 
-    def _highlight_defect_in_vision(self, item):
+    def _highlight_defect_in_vision(self, index):
         """数据与图像联动"""
-        row = item.row()
-        defect = self.defects_data[row]
-        self._simulate_vision_feed() # 重绘场景
-        if "pos" in defect:
-            x, y, size = defect["pos"]
-            self.scene.addRect(x, y, size, size, pen=QPen(Qt.cyan, 5)) # 用更醒目的颜色高亮
+        defect = self.model.defect_at(index.row())
+        frame = self.frames.get(defect.get("frame"))
+        if frame is None or "pos" not in defect:
+            self.frame_label.setText(f"{defect['id']} 的原始帧已不在缓冲区")
+            return
+        # 定格在缺陷所在的帧；复制一份，避免查看期间槽位被新帧覆盖
+        self.held_frame = frame.copy()
+        self._show_frame(self.held_frame, self.frame_boxes[defect["frame"] % FRAME_HISTORY], highlight=defect["pos"])
+        self.frame_label.setText(f"历史帧 #{defect['frame']} ({defect['time']})")
+        self.live_button.setEnabled(True)
 
     def _add_defect(self):
         dialog = DefectDialog(self)
         if dialog.exec_() == QDialog.Accepted:
             data = dialog.get_data()
+            # 只加载了最新一页样本，id 是否被占用要同时查询数据库
+            if data["id"] and (data["id"] in self.store or self.db.has_defect(data["id"])):
+                QMessageBox.warning(self, "样本ID重复", f"样本 {data['id']} 已存在，请使用其他ID或编辑原样本。")
+                return
             new_defect = {
-                "id": data["id"] or f"MAN-{self.next_defect_id:04d}",
+                "id": data["id"] or self._allocate_defect_id("MAN"),
+                "ts": time.time(),
                 "time": datetime.now().strftime("%H:%M:%S"),
                 "type": data["type"],
                 "status": "已确认", # 手动添加的默认为已确认
                 "desc": data["desc"]
             }
-            self.defects_data.insert(0, new_defect)
-            self.next_defect_id += 1
-            self._populate_table()
+            self._insert_defect(new_defect)
 
     def _edit_defect(self, defect_id):
-        defect = next((d for d in self.defects_data if d["id"] == defect_id), None)
+        defect = self.store.get(defect_id)
         if not defect: return
         dialog = DefectDialog(self, defect_data=defect)
         if dialog.exec_() == QDialog.Accepted:
             data = dialog.get_data()
-            defect.update(data)
-            self._populate_table()
+            del data["id"] # 编辑时 id 只读
+            self.store.update(defect_id, **data)
+            self.db.save_defect(defect)
+            self.model.defect_changed(defect_id)
             
     def _delete_defect(self, defect_id):
         reply = QMessageBox.question(self, "确认删除", f"确定删除样本 {defect_id}？", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.defects_data = [d for d in self.defects_data if d["id"] != defect_id]
-            self._populate_table()
+            self.model.defect_removed(self.store.index_of(defect_id))
+            self.store.remove(defect_id)
+            self.db.delete_defect(defect_id)
 
     def _change_status(self, defect_id, new_status):
-        defect = next((d for d in self.defects_data if d["id"] == defect_id), None)
-        if defect:
-            defect["status"] = new_status
-            self._populate_table()
+        if defect_id in self.store:
+            self.db.save_defect(self.store.update(defect_id, status=new_status))
+            self.model.defect_changed(defect_id)
             
+    def _load_defects(self):
+        """只加载最新一页缺陷样本，更早的在表格滚动到底部时再翻页；首次运行时写入示例数据"""
+        defects = self.db.load_defects(DEFECT_PAGE_SIZE)
+        if not defects:
+            defects = self._create_mock_data()
+            for defect in defects:
+                self.db.save_defect(defect)
+            self.db.flush()
+        self.store.extend_older(defects)
+        if len(defects) == DEFECT_PAGE_SIZE:
+            self._db_cursor = (defects[-1]["ts"], defects[-1]["id"])
+        # 滚动缺陷率窗口内的样本全部加载，统计才完整
+        window_start = time.time() - self.stats.window * 60
+        while self._db_cursor is not None and self._db_cursor[0] >= window_start:
+            self._fetch_older_defects()
+
+    def _fetch_older_defects(self):
+        """按时间倒序从数据库读取下一页 (键集分页)，返回新样本在 store 中的下标"""
+        if self._db_cursor is None:
+            return np.zeros(0, dtype=np.int64)
+        page = self.db.load_defects(DEFECT_PAGE_SIZE, before=self._db_cursor)
+        self._db_cursor = (page[-1]["ts"], page[-1]["id"]) if len(page) == DEFECT_PAGE_SIZE else None
+        return self.store.extend_older(page)
+
     def _create_mock_data(self):
+        now = time.time()
         return [
-            {"id": "DEF-0001", "time": "10:30:15", "type": "划痕", "status": "已确认", "desc": "换料时操作不当导致"},
-            {"id": "DEF-0002", "time": "10:32:45", "type": "斑点", "status": "已忽略", "desc": "传感器上的灰尘，已清理"},
+            {"id": "DEF-0002", "ts": now, "time": "10:32:45", "type": "斑点", "status": "已忽略", "desc": "传感器上的灰尘，已清理"},
+            {"id": "DEF-0001", "ts": now - 150, "time": "10:30:15", "type": "划痕", "status": "已确认", "desc": "换料时操作不当导致"},
         ]
         
     def closeEvent(self, event):
-        self.sim_timer.stop()
+        self.hub.unsubscribe(self.subscription)
+        self.camera.stop()
         super().closeEvent(event)
\ No newline at end of file
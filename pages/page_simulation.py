@@ -8,7 +8,7 @@ import pyqtgraph as pg
 import numpy as np
 from functools import partial
 
-from .widgets.simulation_kernel import SimulationKernel, GeneticOptimizer
+from engine.simulation_kernel import SimulationKernel, GeneticOptimizer
 
 class OptimizationThread(QThread):
     """将耗时的优化算法放在后台线程中"""
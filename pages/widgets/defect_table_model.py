@@ -0,0 +1,171 @@
+# pages/widgets/defect_table_model.py
+# 缺陷样本表格模型：以 engine.defect_store.DefectStore 为数据源，当前过滤条件的结果只保存为下标数组，
+# 行按需分批暴露给视图 (canFetchMore/fetchMore)，滚动到底部时再从数据库翻页读取更早的样本。
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+from .table_delegates import ActionLabelsRole
+
+STATUS_COLORS = {"待复判": QColor("#FFC107"), "已确认": QColor("#4CAF50"), "已忽略": QColor("#9E9E9E")}
+
+COL_ID, COL_TIME, COL_TYPE, COL_STATUS, COL_DESC, COL_ACTIONS = range(6)
+HEADERS = ["ID", "时间", "类型", "状态", "备注", "操作"]
+
+FETCH_BATCH = 200         # 每次向视图暴露的行数
+MAX_PAGES_PER_FETCH = 20  # 过滤条件很严格时，单次 fetchMore 最多向数据库翻的页数
+
+
+class DefectTableModel(QAbstractTableModel):
+    """按时间倒序显示过滤后的缺陷样本"""
+    def __init__(self, store, parent=None, fetch_older=None):
+        """
+        :param fetch_older: 可选，从数据库读取下一页更早样本并放入 store 的函数，返回新样本的虚拟下标 (按时间倒序)
+        """
+        super().__init__(parent)
+        self.store = store
+        self.fetch_older = fetch_older
+        self.conditions = {}
+        self._view = store.query()
+        self._shown = min(FETCH_BATCH, len(self._view))
+        self._source_exhausted = fetch_older is None
+
+    # --- 过滤 ---
+    def set_filter(self, **conditions):
+        """应用新的过滤条件 (status / type / since / until)，值为 None 的条件忽略"""
+        self.beginResetModel()
+        self.conditions = {k: v for k, v in conditions.items() if v is not None}
+        self._view = self.store.query(**self.conditions)
+        self._shown = min(FETCH_BATCH, len(self._view))
+        self.endResetModel()
+
+    @property
+    def match_count(self):
+        """内存中满足当前过滤条件的样本数 (包括尚未暴露给视图的行)"""
+        return len(self._view)
+
+    def matches(self, index):
+        return len(self.store.filter([index], **self.conditions)) == 1
+
+    # --- 惰性加载 ---
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._shown < len(self._view) or not self._source_exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._shown == len(self._view) and not self._source_exhausted:
+            for _ in range(MAX_PAGES_PER_FETCH):
+                added = self.fetch_older()
+                if not len(added):
+                    self._source_exhausted = True
+                    break
+                matched = self.store.filter(added, **self.conditions)
+                if len(matched):
+                    self._view = np.concatenate((self._view, matched))
+                    break
+        count = min(FETCH_BATCH, len(self._view) - self._shown)
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self._shown, self._shown + count - 1)
+            self._shown += count
+            self.endInsertRows()
+
+    # --- 表格接口 ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._shown
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        defect = self.defect_at(index.row())
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == COL_ID: return defect["id"]
+            if column == COL_TIME: return defect["time"]
+            if column == COL_TYPE: return defect["type"]
+            if column == COL_STATUS: return defect["status"]
+            if column == COL_DESC: return defect["desc"]
+        elif role == Qt.BackgroundRole and column == COL_STATUS:
+            return STATUS_COLORS.get(defect["status"], QColor("white"))
+        elif role == ActionLabelsRole and column == COL_ACTIONS:
+            # 只有“待复判”状态下才显示确认和忽略按钮
+            return ["编辑", "删除", "确认", "忽略"] if defect["status"] == "待复判" else ["编辑", "删除"]
+        return None
+
+    def defect_at(self, row):
+        return self.store.record(self._view[row])
+
+    def indexes_at(self, rows):
+        """一组行号对应的 store 虚拟下标"""
+        return self._view[np.asarray(rows, dtype=np.int64)]
+
+    def all_indexes(self):
+        """当前过滤结果的全部下标 (包括尚未暴露给视图的行)"""
+        return self._view.copy()
+
+    def show_all(self):
+        """把内存中的全部匹配行暴露给视图 (用于全选)"""
+        count = len(self._view) - self._shown
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self._shown, len(self._view) - 1)
+            self._shown = len(self._view)
+            self.endInsertRows()
+
+    def row_of(self, defect_id):
+        index = self.store.index_of(defect_id)
+        if index is None:
+            return None
+        rows = np.nonzero(self._view[:self._shown] == index)[0]
+        return int(rows[0]) if len(rows) else None
+
+    # --- 数据变化通知 ---
+    def defect_added(self, index):
+        """新样本 (最新) 满足过滤条件时插到第一行"""
+        if not self.matches(index):
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._view = np.concatenate(([index], self._view))
+        self._shown += 1
+        self.endInsertRows()
+
+    def defect_changed(self, defect_id):
+        """样本内容变化时只刷新对应的行；不满足过滤条件的行保留到下次过滤"""
+        row = self.row_of(defect_id)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+
+    def defects_changed(self):
+        """批量修改后一次性刷新；视图只会重新查询可见行"""
+        if self._shown:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._shown - 1, len(HEADERS) - 1))
+
+    def defects_removed(self, indexes):
+        """批量删除后一次性重建行映射，而不是逐行发出删除通知"""
+        self.beginResetModel()
+        keep = ~np.isin(self._view, indexes)
+        self._shown = int(keep[:self._shown].sum())
+        self._view = self._view[keep]
+        self.endResetModel()
+
+    def defect_removed(self, index):
+        rows = np.nonzero(self._view == index)[0]
+        if not len(rows):
+            return
+        row = int(rows[0])
+        if row < self._shown:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._view = np.delete(self._view, row)
+            self._shown -= 1
+            self.endRemoveRows()
+        else:
+            self._view = np.delete(self._view, row)
@@ -0,0 +1,59 @@
+# pages/widgets/frame_item.py
+# 视觉检测画面的场景图元：图像直接引用 NumPy 帧缓冲区的内存绘制 (不逐像素拷贝)，
+# 缺陷标记框从对象池中取用，只移动位置，不反复创建和销毁图元。
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsRectItem
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage
+from PyQt5 import sip
+
+
+class FrameItem(QGraphicsItem):
+    """显示一帧 uint8 灰度图像；set_frame 只替换引用的内存，不创建新图元"""
+    def __init__(self, width, height, parent=None):
+        super().__init__(parent)
+        self._rect = QRectF(0, 0, width, height)
+        self._array = None
+        self._image = None
+
+    def set_frame(self, frame):
+        """
+        :param frame: C 连续的 (H, W) uint8 数组，显示期间必须保持有效 (通常是环形缓冲区中的槽位)
+        """
+        height, width = frame.shape
+        self._array = frame # 持有引用，保证 QImage 使用的内存有效
+        self._image = QImage(sip.voidptr(frame.ctypes.data), width, height, frame.strides[0], QImage.Format_Grayscale8)
+        if self._rect.width() != width or self._rect.height() != height:
+            self.prepareGeometryChange()
+            self._rect = QRectF(0, 0, width, height)
+        self.update()
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        if self._image is not None:
+            painter.drawImage(0, 0, self._image)
+
+
+class OverlayPool:
+    """可复用的矩形标记框池"""
+    def __init__(self, scene, pen, z_value=1):
+        self.scene = scene
+        self.pen = pen
+        self.z_value = z_value
+        self._items = []
+
+    def show_boxes(self, boxes):
+        """显示给定的 (x, y, w, h) 框，多余的图元隐藏；只在数量不够时创建新图元"""
+        boxes = list(boxes)
+        while len(self._items) < len(boxes):
+            item = QGraphicsRectItem()
+            item.setPen(self.pen)
+            item.setZValue(self.z_value)
+            self.scene.addItem(item)
+            self._items.append(item)
+        for item, box in zip(self._items, boxes):
+            item.setRect(*box)
+            item.setVisible(True)
+        for item in self._items[len(boxes):]:
+            item.setVisible(False)
@@ -0,0 +1,105 @@
+# pages/widgets/order_table_model.py
+# 工单表格的模型/视图实现：行数据按需绘制，进度和操作列由委托绘制，不再为每行创建控件。
+import time
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionProgressBar, QApplication
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+from .table_delegates import ActionLabelsRole
+
+STATUS_COLORS = {
+    "待处理": QColor("#B0BEC5"), "生产中": QColor("#00BCD4"),
+    "已完成": QColor("#4CAF50"), "已取消": QColor("#F44336"),
+    "已暂停": QColor("#FFC107"), "故障暂停": QColor("#D32F2F"),
+}
+
+COL_ID, COL_PRODUCT, COL_PLAN, COL_PROGRESS, COL_ETA, COL_STATUS, COL_DEVICE, COL_ACTIONS = range(8)
+HEADERS = ["工单ID", "产品名称", "计划数量", "完成进度", "预计完工", "状态", "关联设备", "操作"]
+ACTION_LABELS = ["生产快照", "取消工单"]
+
+# 自定义角色：返回整条工单数据，供委托绘制
+OrderRole = Qt.UserRole + 1
+
+
+class OrderTableModel(QAbstractTableModel):
+    """以 engine.order_store.OrderStore 为数据源的表格模型，只对发生变化的行发出 dataChanged"""
+    def __init__(self, store, parent=None, eta=None):
+        """
+        :param eta: 可选，工单 id -> 预计完工时间戳 (或 None) 的函数，只在绘制可见行时调用
+        """
+        super().__init__(parent)
+        self.store = store
+        self.eta = eta
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        order = self.store.orders[index.row()]
+        column = index.column()
+        if role == OrderRole:
+            return order
+        if role == ActionLabelsRole:
+            return ACTION_LABELS
+        if role == Qt.DisplayRole:
+            if column == COL_ID: return order["id"]
+            if column == COL_PRODUCT: return order["product"]
+            if column == COL_PLAN: return f"{order['quantity_plan']} 米"
+            if column == COL_PROGRESS: return f"{int(order['quantity_done'])} / {order['quantity_plan']}"
+            if column == COL_ETA:
+                eta = self.eta(order["id"]) if self.eta else None
+                return time.strftime("%m-%d %H:%M", time.localtime(eta)) if eta is not None else "--"
+            if column == COL_STATUS: return order["status"]
+            if column == COL_DEVICE: return order["device_id"]
+        elif role == Qt.BackgroundRole and column == COL_STATUS:
+            return STATUS_COLORS.get(order["status"], QColor("white"))
+        elif role == Qt.TextAlignmentRole and column in (COL_PROGRESS, COL_ETA):
+            return Qt.AlignCenter
+        return None
+
+    def order_at(self, row):
+        return self.store.orders[row]
+
+    def append_order(self, order):
+        row = len(self.store)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.store.add(order)
+        self.endInsertRows()
+
+    def orders_changed(self, order_ids):
+        """通知视图这些工单的数据已变化，只重绘对应的行"""
+        for order_id in order_ids:
+            row = self.store.row_of(order_id)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+
+    def eta_changed(self):
+        """速率估计更新后整列失效；视图只会重新查询可见行"""
+        if len(self.store):
+            self.dataChanged.emit(self.index(0, COL_ETA), self.index(len(self.store) - 1, COL_ETA))
+
+
+class ProgressDelegate(QStyledItemDelegate):
+    """用样式直接绘制进度条，不创建 QProgressBar 控件"""
+    def paint(self, painter, option, index):
+        order = index.data(OrderRole)
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(2, 2, -2, -2)
+        bar.minimum, bar.maximum = 0, 100
+        bar.progress = int(order["quantity_done"] / order["quantity_plan"] * 100) if order["quantity_plan"] > 0 else 0
+        bar.text = index.data(Qt.DisplayRole)
+        bar.textVisible = True
+        bar.textAlignment = Qt.AlignCenter
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, bar, painter, option.widget)
@@ -0,0 +1,53 @@
+# pages/widgets/table_delegates.py
+# 表格视图共用的委托：在单元格内直接绘制操作按钮，不为每行创建按钮控件。
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QApplication
+from PyQt5.QtCore import Qt, QRect, QSize, QEvent, pyqtSignal
+
+# 自定义角色：模型返回该行要显示的按钮文字列表 (每行可以不同)
+ActionLabelsRole = Qt.UserRole + 100
+
+
+class ActionsDelegate(QStyledItemDelegate):
+    """绘制操作按钮并处理点击，点击时发出 (行号, 按钮文字)"""
+    button_clicked = pyqtSignal(int, str)
+
+    SPACING = 4
+
+    def __init__(self, parent=None, button_width=80, max_buttons=2):
+        """
+        :param max_buttons: 一行最多的按钮数，决定列宽
+        """
+        super().__init__(parent)
+        self.button_width = button_width
+        self.max_buttons = max_buttons
+
+    def _button_rects(self, rect, count):
+        rects = []
+        x = rect.x() + self.SPACING
+        for _ in range(count):
+            rects.append(QRect(x, rect.y() + 2, self.button_width, rect.height() - 4))
+            x += self.button_width + self.SPACING
+        return rects
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        labels = index.data(ActionLabelsRole) or []
+        for text, rect in zip(labels, self._button_rects(option.rect, len(labels))):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        width = self.max_buttons * (self.button_width + self.SPACING) + self.SPACING
+        return QSize(width, 30)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            labels = index.data(ActionLabelsRole) or []
+            for text, rect in zip(labels, self._button_rects(option.rect, len(labels))):
+                if rect.contains(event.pos()):
+                    self.button_clicked.emit(index.row(), text)
+                    return True
+        return super().editorEvent(event, model, option, index)
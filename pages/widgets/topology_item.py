@@ -0,0 +1,252 @@
+# pages/widgets/topology_item.py
+# 机群拓扑图：整张图只有一个图元，设备和部件的坐标、健康等级都保存在 NumPy 数组中。
+# 绘制时按缩放级别选择细节：缩小时每台设备画成一个方块 (颜色取最差部件)，放大后画出各个部件和连线，
+# 再放大显示名称；只绘制与重绘区域相交的节点，点击和悬停用数组做命中测试。
+import numpy as np
+from PyQt5.QtWidgets import QGraphicsObject, QGraphicsItem, QGraphicsView
+from PyQt5.QtCore import Qt, QRectF, QLineF, pyqtSignal
+from PyQt5.QtGui import QColor, QBrush, QPen, QFont, QPainter, QTransform
+
+from engine.topology import COMPONENT_NAMES
+
+MACHINE_HALF = 30        # 设备方块的半边长 (场景坐标)
+COMPONENT_RADIUS = 14
+COMPONENT_LOD = 0.5      # 缩放比例达到此值时显示单个部件
+LABEL_LOD = 1.0          # 缩放比例达到此值时显示名称
+MARGIN = 120             # 图元边界在节点外留出的空白，左侧用于显示产线名称
+
+# 健康等级：0 危险 (≤50)，1 警告 (≤80)，2 健康，与健康度颜色规则一致
+LEVEL_BINS = [50, 80]
+LEVEL_BRUSHES = [QBrush(QColor(c)) for c in ("#D32F2F", "#FFC107", "#4CAF50")]
+LEVEL_PENS = [QPen(QColor(c), 4) for c in ("#D32F2F", "#FFC107", "#4CAF50")]
+MACHINE_BRUSH = QBrush(QColor("#37474F"))
+BAND_BRUSHES = [QBrush(QColor("#263238")), QBrush(QColor("#2C3A41"))]
+LINK_PEN = QPen(QColor("#90A4AE"), 1.5)
+HIGHLIGHT_PEN = QPen(Qt.cyan, 4)
+HOVER_BRUSH = QBrush(Qt.cyan)
+
+
+def health_levels(scores):
+    return np.digitize(scores, LEVEL_BINS, right=True).astype(np.int8)
+
+
+def _visible(pos, rect, margin):
+    """坐标落在 rect (向外扩展 margin) 内的节点掩码"""
+    return ((pos[:, 0] >= rect.left() - margin) & (pos[:, 0] <= rect.right() + margin)
+            & (pos[:, 1] >= rect.top() - margin) & (pos[:, 1] <= rect.bottom() + margin))
+
+
+class TopologyItem(QGraphicsObject):
+    """整个机群的拓扑图"""
+    component_clicked = pyqtSignal(int) # 部件下标
+    machine_clicked = pyqtSignal(int)   # 设备下标
+
+    def __init__(self, topology, machine_pos, component_pos, line_top, parent=None):
+        super().__init__(parent)
+        # 需要 option.exposedRect 做视口裁剪
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setAcceptHoverEvents(True)
+        self.topology = topology
+        self.machine_pos = machine_pos
+        self.component_pos = component_pos
+        lo = np.minimum(machine_pos.min(axis=0), component_pos.min(axis=0)) - MARGIN
+        hi = np.maximum(machine_pos.max(axis=0), component_pos.max(axis=0)) + MARGIN
+        self._rect = QRectF(lo[0], min(lo[1], line_top[0]), hi[0] - lo[0], hi[1] - min(lo[1], line_top[0]))
+        bottoms = np.append(line_top[1:], self._rect.bottom())
+        self._bands = [QRectF(self._rect.left(), top, self._rect.width(), bottom - top)
+                       for top, bottom in zip(line_top, bottoms)]
+
+        # 绘制用的几何对象只创建一次，paint 中按下标取用
+        self._machine_rects = [QRectF(x - MACHINE_HALF, y - MACHINE_HALF, 2 * MACHINE_HALF, 2 * MACHINE_HALF)
+                               for x, y in machine_pos]
+        self._component_rects = [QRectF(x - COMPONENT_RADIUS, y - COMPONENT_RADIUS, 2 * COMPONENT_RADIUS, 2 * COMPONENT_RADIUS)
+                                 for x, y in component_pos]
+        owner = machine_pos[topology.component_machine]
+        self._links = [QLineF(mx, my + MACHINE_HALF, cx, cy - COMPONENT_RADIUS)
+                       for (mx, my), (cx, cy) in zip(owner, component_pos)]
+        self._component_labels = [COMPONENT_NAMES[kind] for kind in topology.kinds]
+        # 部件离所属设备中心的最大距离，裁剪设备时据此放宽范围，保证部件可见时连线的起点也被绘制
+        self._reach = float(np.abs(component_pos - owner).max()) + MACHINE_HALF if len(owner) else 0.0
+
+        self._machine_level = np.full(topology.n_machines, 2, dtype=np.int8)
+        self._component_level = np.full(topology.n_components, 2, dtype=np.int8)
+        self._lod = 1.0 # 最近一次绘制时的缩放比例，命中测试据此判断显示的是设备还是部件
+        self.selected_machine = None
+        self.selected_component = None
+        self._hover = None # ('machine' | 'component', 下标)
+        self._fonts = {}
+
+    def _font(self, pixel_size):
+        """按场景坐标中的像素高度取字体 (随视图缩放)"""
+        if pixel_size not in self._fonts:
+            font = QFont()
+            font.setPixelSize(pixel_size)
+            self._fonts[pixel_size] = font
+        return self._fonts[pixel_size]
+
+    def boundingRect(self):
+        return self._rect
+
+    def set_scores(self, component_scores, machine_worst):
+        """更新健康等级，只重绘等级发生变化的节点所在区域"""
+        component_level = health_levels(component_scores)
+        machine_level = health_levels(machine_worst)
+        changed = np.flatnonzero(machine_level != self._machine_level)
+        changed = np.union1d(changed, self.topology.component_machine[component_level != self._component_level])
+        self._component_level = component_level
+        self._machine_level = machine_level
+        if len(changed):
+            pos = self.machine_pos[changed]
+            lo, hi = pos.min(axis=0) - self._reach, pos.max(axis=0) + self._reach
+            self.update(QRectF(lo[0], lo[1], hi[0] - lo[0], hi[1] - lo[1]))
+
+    def set_selection(self, machine=None, component=None):
+        self.selected_machine = machine
+        self.selected_component = component
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        self._lod = lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        # exposedRect 在整体渲染 (如 QGraphicsView.render) 时是整个图元，再与绘制设备的可见范围取交集
+        device = painter.device()
+        visible = painter.worldTransform().inverted()[0].mapRect(QRectF(0, 0, device.width(), device.height()))
+        exposed = option.exposedRect.intersected(visible)
+        painter.setPen(Qt.NoPen)
+        for i, band in enumerate(self._bands):
+            if band.intersects(exposed):
+                painter.setBrush(BAND_BRUSHES[i % 2])
+                painter.drawRect(band)
+        painter.setPen(Qt.white)
+        painter.setFont(self._font(36))
+        for name, band in zip(self.topology.line_names, self._bands):
+            if band.intersects(exposed):
+                painter.drawText(QRectF(band.left() + 10, band.top(), 400, 60), Qt.AlignLeft | Qt.AlignVCenter, name)
+
+        machines = _visible(self.machine_pos, exposed, MACHINE_HALF)
+        if lod < COMPONENT_LOD:
+            # 缩小：每台设备一个方块，按健康等级分组批量绘制
+            painter.setPen(Qt.NoPen)
+            for level, brush in enumerate(LEVEL_BRUSHES):
+                index = np.flatnonzero(machines & (self._machine_level == level))
+                if len(index):
+                    painter.setBrush(brush)
+                    painter.drawRects([self._machine_rects[i] for i in index])
+        else:
+            machines = _visible(self.machine_pos, exposed, self._reach)
+            components = np.flatnonzero(_visible(self.component_pos, exposed, COMPONENT_RADIUS)
+                                        | machines[self.topology.component_machine])
+            painter.setPen(LINK_PEN)
+            painter.drawLines([self._links[i] for i in components])
+            # 设备方块以最差部件的颜色描边
+            painter.setBrush(MACHINE_BRUSH)
+            for level, pen in enumerate(LEVEL_PENS):
+                index = np.flatnonzero(machines & (self._machine_level == level))
+                if len(index):
+                    painter.setPen(pen)
+                    painter.drawRects([self._machine_rects[i] for i in index])
+            painter.setPen(Qt.NoPen)
+            for level, brush in enumerate(LEVEL_BRUSHES):
+                painter.setBrush(brush)
+                for i in components[self._component_level[components] == level]:
+                    painter.drawEllipse(self._component_rects[i])
+            if lod >= LABEL_LOD:
+                painter.setPen(Qt.white)
+                painter.setFont(self._font(12))
+                for i in np.flatnonzero(machines):
+                    painter.drawText(self._machine_rects[i], Qt.AlignCenter, self.topology.machine_names[i])
+                painter.setFont(self._font(9))
+                for i in components:
+                    rect = self._component_rects[i]
+                    painter.drawText(rect.adjusted(-10, rect.height(), 10, rect.height()), Qt.AlignHCenter | Qt.AlignTop,
+                                     self._component_labels[i])
+        self._paint_highlights(painter, lod)
+
+    def _paint_highlights(self, painter, lod):
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(HIGHLIGHT_PEN)
+        if self.selected_machine is not None:
+            painter.drawRect(self._machine_rects[self.selected_machine].adjusted(-6, -6, 6, 6))
+        if self.selected_component is not None and lod >= COMPONENT_LOD:
+            painter.drawEllipse(self._component_rects[self.selected_component].adjusted(-4, -4, 4, 4))
+        if self._hover is not None:
+            kind, i = self._hover
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(HOVER_BRUSH)
+            if kind == 'component':
+                painter.drawEllipse(self._component_rects[i])
+            else:
+                painter.drawRect(self._machine_rects[i])
+
+    def _node_at(self, pos):
+        """当前显示级别下 pos 处的节点 ('machine' | 'component', 下标)，没有时为 None"""
+        x, y = pos.x(), pos.y()
+        if self._lod >= COMPONENT_LOD and len(self.component_pos):
+            d2 = (self.component_pos[:, 0] - x) ** 2 + (self.component_pos[:, 1] - y) ** 2
+            i = int(np.argmin(d2))
+            if d2[i] <= COMPONENT_RADIUS ** 2:
+                return 'component', i
+        hit = np.flatnonzero((np.abs(self.machine_pos[:, 0] - x) <= MACHINE_HALF)
+                             & (np.abs(self.machine_pos[:, 1] - y) <= MACHINE_HALF))
+        return ('machine', int(hit[0])) if len(hit) else None
+
+    def _node_rect(self, node):
+        kind, i = node
+        rect = self._component_rects[i] if kind == 'component' else self._machine_rects[i]
+        return rect.adjusted(-8, -8, 8, 8)
+
+    def hoverMoveEvent(self, event):
+        node = self._node_at(event.pos())
+        if node == self._hover:
+            return
+        for old in (self._hover, node):
+            if old is not None:
+                self.update(self._node_rect(old))
+        self._hover = node
+        if node is None:
+            self.unsetCursor()
+        else:
+            self.setCursor(Qt.PointingHandCursor)
+
+    def hoverLeaveEvent(self, event):
+        if self._hover is not None:
+            self.update(self._node_rect(self._hover))
+            self._hover = None
+        self.unsetCursor()
+
+    def mousePressEvent(self, event):
+        node = self._node_at(event.pos()) if event.button() == Qt.LeftButton else None
+        if node is None:
+            event.ignore() # 交给视图做拖动平移
+            return
+        kind, i = node
+        if kind == 'component':
+            self.component_clicked.emit(i)
+        else:
+            self.machine_clicked.emit(i)
+        event.accept()
+
+
+class TopologyView(QGraphicsView):
+    """拓扑图视图：滚轮以鼠标位置为中心缩放，在空白处按住左键拖动平移"""
+    ZOOM_STEP = 1.25
+    MIN_SCALE, MAX_SCALE = 0.02, 4.0
+
+    def __init__(self, scene, parent=None):
+        super().__init__(scene, parent)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setRenderHint(QPainter.Antialiasing)
+
+    def wheelEvent(self, event):
+        factor = self.ZOOM_STEP ** (event.angleDelta().y() / 120)
+        scale = self.transform().m11() * factor
+        if self.MIN_SCALE <= scale <= self.MAX_SCALE:
+            self.scale(factor, factor)
+
+    def focus_on(self, point, scale=1.0):
+        """以给定缩放比例居中显示场景中的一点"""
+        self.setTransform(QTransform.fromScale(scale, scale))
+        self.centerOn(point)
+
+    def show_all(self):
+        self.fitInView(self.sceneRect(), Qt.KeepAspectRatio)
@@ -0,0 +1,31 @@
+# persistence.py
+# 进程级数据库入口：全局共享一个 engine.database.Database，并用定时器周期性地批量提交写入。
+from PyQt5.QtCore import QTimer, QCoreApplication
+
+from engine.database import Database
+
+DATABASE_PATH = 'factory.db'
+FLUSH_INTERVAL_MS = 2000
+
+_database = None
+_flush_timer = None
+
+def get_database():
+    """返回全局唯一的数据库实例 (首次调用时打开并启动定时提交)"""
+    global _database, _flush_timer
+    if _database is None:
+        _database = Database(DATABASE_PATH)
+        _flush_timer = QTimer(QCoreApplication.instance())
+        _flush_timer.timeout.connect(_database.flush)
+        _flush_timer.start(FLUSH_INTERVAL_MS)
+    return _database
+
+def close_database():
+    """提交剩余写入并关闭数据库"""
+    global _database, _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.stop()
+        _flush_timer = None
+    if _database is not None:
+        _database.close()
+        _database = None
@@ -0,0 +1,188 @@
+# telemetry_hub.py
+# 进程级遥测中心：全局只持有一个模拟器线程，把每次数据推送分发给所有订阅的页面。
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+from device_simulator import LineSimulatorThread, ReplaySourceThread
+from engine.recorder import TelemetryRecorder, TelemetryReader
+from engine.telemetry import concat_batches
+
+RECORDING_DIR = 'telemetry_data'
+RECORDING_FLUSH_MS = 10000
+RATE_TOLERANCE = 0.1 # 限速订阅允许提前送达的比例 (相对间隔)，吸收定时器抖动
+
+
+class _Subscription:
+    """单个订阅者的回调与限速状态"""
+    def __init__(self, callback, max_rate):
+        self.callback = callback
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.last_delivery = 0.0 # 上一次送达的计划时间 (不是实际时间)
+        self.pending = [] # 限速期间暂存的批次，到期后合并一次性送达
+
+
+class TelemetryHub(QObject):
+    """单一数据生产者 + 多订阅者扇出"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subscriptions = {}
+        self._next_token = 1
+        self._latest = None
+        self._producer = None
+        self._mode = 'normal'
+        self._source_cls = LineSimulatorThread
+        self._producer_kwargs = {}
+        self._recorder = None
+        self._recording_token = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.timeout.connect(self._flush_recording)
+
+    # --- 订阅管理 ---
+    def subscribe(self, callback, max_rate=None):
+        """
+        注册一个订阅者，首个订阅者到来时自动启动生产者。
+        :param callback: 接收遥测批次 (结构化数组) 的可调用对象 (在GUI线程中调用)
+        :param max_rate: 每秒最多推送次数，None 表示不限速；限速期间的批次会合并后送达
+        :return: 用于取消订阅的令牌
+        """
+        token = self._next_token
+        self._next_token += 1
+        self._subscriptions[token] = _Subscription(callback, max_rate)
+        self._ensure_producer()
+        return token
+
+    def unsubscribe(self, token):
+        """取消订阅，最后一个订阅者离开时停止生产者"""
+        self._subscriptions.pop(token, None)
+        if not self._subscriptions:
+            self._stop_producer()
+
+    def latest(self):
+        """返回最近一条遥测记录，尚无数据时返回 None"""
+        return self._latest
+
+    # --- 生产者控制 ---
+    @property
+    def mode(self):
+        return self._mode
+
+    def set_mode(self, mode):
+        """切换仿真模式，生产者重启后仍然保持"""
+        self._mode = mode
+        if self._producer:
+            self._producer.set_mode(mode)
+
+    @property
+    def producer(self):
+        """当前的数据生产者 (模拟器或回放线程)，尚未启动时为 None"""
+        return self._producer
+
+    @property
+    def is_replay(self):
+        return self._source_cls is ReplaySourceThread
+
+    def configure(self, **producer_kwargs):
+        """
+        设置生产者的构造参数 (例如 clock=SimClock(speed=None), seed=42)。
+        若生产者已在运行，则以新参数重启。
+        """
+        self._producer_kwargs = producer_kwargs
+        self._restart_producer()
+
+    def use_simulator(self, **producer_kwargs):
+        """切换为实时模拟器数据源"""
+        self._source_cls = LineSimulatorThread
+        self.configure(**producer_kwargs)
+
+    def use_replay(self, root=RECORDING_DIR, speed=1.0):
+        """切换为记录回放数据源；回放期间不再录制，避免把回放数据写回记录"""
+        self.stop_recording()
+        self._source_cls = ReplaySourceThread
+        self.configure(root=root, speed=speed)
+
+    def _restart_producer(self):
+        if self._producer is not None:
+            self._stop_producer()
+            self._ensure_producer()
+
+    # --- 历史记录 ---
+    def start_recording(self, root=RECORDING_DIR):
+        """订阅全部遥测并追加写入列存段文件，定期落盘"""
+        if self._recorder is not None or self.is_replay:
+            return
+        self._recorder = TelemetryRecorder(root)
+        self._recording_token = self.subscribe(self._record)
+        self._flush_timer.start(RECORDING_FLUSH_MS)
+
+    def stop_recording(self):
+        if self._recorder is None:
+            return
+        self._flush_timer.stop()
+        self.unsubscribe(self._recording_token)
+        self._recorder.close()
+        self._recorder = None
+
+    def _record(self, batch):
+        try:
+            self._recorder.append(batch)
+        except ValueError as e: # 时间戳回退 (例如切换了时钟)，停止录制而不是写入乱序数据
+            print(f"停止录制遥测: {e}")
+            self.stop_recording()
+
+    def history(self, root=RECORDING_DIR):
+        """打开历史记录的只读视图；正在录制时先落盘，保证能读到最新数据"""
+        self._flush_recording()
+        return TelemetryReader(root)
+
+    def _flush_recording(self):
+        if self._recorder is not None:
+            self._recorder.flush()
+
+    def shutdown(self):
+        """应用退出时调用，停止生产者并清空订阅"""
+        self.stop_recording()
+        self._subscriptions.clear()
+        self._stop_producer()
+
+    def _ensure_producer(self):
+        if self._producer is None:
+            self._producer = self._source_cls(**self._producer_kwargs)
+            self._producer.set_mode(self._mode)
+            self._producer.batch_ready.connect(self._dispatch)
+            self._producer.start()
+
+    def _stop_producer(self):
+        if self._producer is not None:
+            self._producer.batch_ready.disconnect(self._dispatch)
+            self._producer.stop()
+            self._producer = None
+
+    def _dispatch(self, batch):
+        self._latest = batch[-1]
+        now = time.monotonic()
+        # 复制一份列表，允许回调中取消订阅
+        for sub in list(self._subscriptions.values()):
+            if sub.min_interval:
+                sub.pending.append(batch)
+                due = sub.last_delivery + sub.min_interval
+                if now < due - RATE_TOLERANCE * sub.min_interval:
+                    continue
+                # 按计划时间递推而不是按实际到达时间：与限速同频的数据源略早到达时不会被推迟整整一个周期；
+                # 落后超过一个周期 (首次送达或长时间无数据) 时重新对齐到当前时间，不补发
+                sub.last_delivery = due if now - due < sub.min_interval else now
+                merged = concat_batches(sub.pending)
+                sub.pending = []
+                sub.callback(merged)
+            else:
+                sub.callback(batch)
+
+
+_hub = None
+
+def get_hub():
+    """获取全局唯一的遥测中心实例"""
+    global _hub
+    if _hub is None:
+        _hub = TelemetryHub()
+    return _hub